@@ -0,0 +1,174 @@
+"""Load test of the game API: simulated players against main.app, in process.
+
+Each player starts a game, then alternates bursts of moves with ticks (and the
+occasional batched /game/actions call) until the game ends or it runs out of
+rounds, and finally fetches the full state. Every game is seeded from --seed,
+so runs play the same mazes and moves; --mazes N makes the players share N
+mazes (served from the layout cache). Requests go through an httpx ASGI
+transport, so the numbers cover routing, validation, game logic and
+serialization without any network in between.
+
+Writes throughput and p50/p95/p99 latency per route plus per-session memory to
+a JSON file. With --baseline, exits non-zero when a route's p95 got slower than
+the baseline by more than --tolerance.
+
+    cd Backend && python -m benchmarks.bench_api --players 50 --out bench_api.json
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.bench_memory import measure as measure_memory
+from core.maze_pool import MAZE_POOL
+from core.storage import GAMES
+from game.state import Difficulty
+from main import app
+
+DIRECTIONS = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    async def call(self, client: httpx.AsyncClient, route: str, method: str, url: str, **kwargs) -> dict:
+        started = time.perf_counter()
+        res = await client.request(method, url, **kwargs)
+        self.latencies[route].append(time.perf_counter() - started)
+        if res.status_code >= 400:
+            self.errors[route] += 1
+            return {}
+        return res.json()
+
+
+async def player(client: httpx.AsyncClient, rec: Recorder, difficulty: str, rounds: int, burst: int, rng: random.Random, maze_seed: int) -> None:
+    state = await rec.call(client, "/game/start", "POST", "/game/start", json={"difficulty": difficulty, "seed": maze_seed})
+    if not state:
+        return
+    game_id, version = state["game_id"], state["version"]
+    for n in range(rounds):
+        if n % 4 == 3:
+            # a held key sent as one batch
+            dx, dy = rng.choice(DIRECTIONS)
+            actions = [{"type": "move", "dx": dx, "dy": dy}] * burst
+            state = await rec.call(client, "/game/actions", "POST", "/game/actions", json={"game_id": game_id, "actions": actions, "version": version})
+            version = state.get("version", version)
+        else:
+            for _ in range(burst):
+                dx, dy = rng.choice(DIRECTIONS)
+                state = await rec.call(client, "/game/move", "POST", "/game/move", json={"game_id": game_id, "dx": dx, "dy": dy, "version": version})
+                version = state.get("version", version)
+        state = await rec.call(client, "/game/tick", "POST", "/game/tick", json={"game_id": game_id, "version": version})
+        version = state.get("version", version)
+        if state.get("phase", "playing") != "playing":
+            break
+    await rec.call(client, "/game/state/{game_id}", "GET", f"/game/state/{game_id}")
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    i = min(len(sorted_values) - 1, max(0, round(q * len(sorted_values)) - 1))
+    return sorted_values[i]
+
+
+def summarize(rec: Recorder, elapsed: float) -> dict:
+    routes = {}
+    for route, values in sorted(rec.latencies.items()):
+        values.sort()
+        routes[route] = {
+            "requests": len(values),
+            "errors": rec.errors.get(route, 0),
+            "rps": round(len(values) / elapsed, 1),
+            "p50_ms": round(percentile(values, 0.50) * 1000, 3),
+            "p95_ms": round(percentile(values, 0.95) * 1000, 3),
+            "p99_ms": round(percentile(values, 0.99) * 1000, 3),
+            "max_ms": round(values[-1] * 1000, 3),
+        }
+    return routes
+
+
+async def run(players: int, rounds: int, burst: int, seed: int, mazes: int = 0) -> dict:
+    rng = random.Random(seed)
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    # the transport does not run the app's lifespan: start the maze pool's
+    # worker processes as the server does, so slow starts are measured as served
+    MAZE_POOL.start()
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for difficulty in ("easy", "normal", "impossible"):
+            GAMES.clear()
+            rec = Recorder()
+            started = time.perf_counter()
+            await asyncio.gather(*(
+                player(client, rec, difficulty, rounds, burst, random.Random(rng.random()), rng.randrange(mazes or 2 ** 31))
+                for _ in range(players)
+            ))
+            elapsed = time.perf_counter() - started
+            results[difficulty] = {
+                "seconds": round(elapsed, 3),
+                "requests_per_s": round(sum(map(len, rec.latencies.values())) / elapsed, 1),
+                "routes": summarize(rec, elapsed),
+            }
+    GAMES.clear()
+    MAZE_POOL.shutdown()
+    return results
+
+
+def regressions(results: dict, baseline: dict, tolerance: float) -> List[str]:
+    found = []
+    for difficulty, result in results["difficulties"].items():
+        base_routes = baseline.get("difficulties", {}).get(difficulty, {}).get("routes", {})
+        for route, stats in result["routes"].items():
+            base = base_routes.get(route)
+            if base and stats["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+                found.append(f"{difficulty} {route}: p95 {base['p95_ms']}ms -> {stats['p95_ms']}ms")
+    return found
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--players", type=int, default=50, help="concurrent players per difficulty")
+    parser.add_argument("--rounds", type=int, default=20, help="move bursts per player")
+    parser.add_argument("--burst", type=int, default=4, help="moves per burst")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--mazes", type=int, default=0, help="distinct mazes shared by the players (0 = one per player)")
+    parser.add_argument("--out", default="bench_api.json")
+    parser.add_argument("--baseline", help="earlier results file to compare p95 latencies against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p95 slowdown (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    results = {
+        "config": {**vars(args), "python": platform.python_version()},
+        "difficulties": asyncio.run(run(args.players, args.rounds, args.burst, args.seed, args.mazes)),
+        "memory": [measure_memory(d, 200, lists=False) for d in Difficulty],
+    }
+    with open(args.out, "w") as f:
+        json.dump(results, f, indent=2)
+
+    for difficulty, result in results["difficulties"].items():
+        print(f"{difficulty}: {result['requests_per_s']} req/s")
+        for route, stats in result["routes"].items():
+            print(f"  {route:24} p50 {stats['p50_ms']:8.3f}ms  p95 {stats['p95_ms']:8.3f}ms  p99 {stats['p99_ms']:8.3f}ms  ({stats['requests']} req)")
+    for row in results["memory"]:
+        print(f"{row['difficulty']}: {row['bytes_per_session']} bytes/session")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(results, json.load(f), args.tolerance)
+        if found:
+            print("p95 regressions:\n  " + "\n  ".join(found))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Concurrent moves and ticks on the same games: throughput and lost updates.
+
+Every game gets `--clients` concurrent clients, each sending a stream of moves
+and client ticks at once, so requests for one game constantly race each other.
+Runs against main.app (async endpoints, per-game command queue) and against the
+previous shape of the endpoints (sync handlers in the threadpool, nothing
+ordering the updates of one game) for comparison.
+
+A tick takes exactly one second off `time_left`, and each applied action adds
+one record to the game's action log, so after the run every game must show
+exactly as many of both as requests were sent; anything less is a lost update.
+
+    cd Backend && python -m benchmarks.bench_commands --games 20 --clients 8 --requests 50
+"""
+import argparse
+import asyncio
+import random
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from core.game_manager import create_game, encode_state, update_game
+from core.storage import GAMES
+from game.action_log import read_header, start_log
+from game.actions import move_player
+from game.replay import verify
+from game.state import Difficulty
+from main import app, client_tick, json_bytes
+from schemas import MoveRequest, TickRequest
+
+DIRECTIONS = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+# plenty of everything, so no game ends during the run
+PLENTY = 10 ** 6
+
+
+def threaded_app() -> FastAPI:
+    # the endpoints as they were: each request is its own threadpool job
+    legacy = FastAPI()
+
+    @legacy.post("/game/move")
+    def move(req: MoveRequest):
+        return json_bytes(update_game(req.game_id, lambda state: encode_state(move_player(state, req.dx, req.dy), since=req.version)))
+
+    @legacy.post("/game/tick")
+    def tick(req: TickRequest):
+        return json_bytes(update_game(req.game_id, lambda state: encode_state(client_tick(state), since=req.version)))
+
+    return legacy
+
+
+def new_game(seed: int):
+    state = create_game(Difficulty.MEDIUM, seed=seed)
+    state.time_left = state.player.energy = state.player.health = PLENTY
+    start_log(state)
+    return state
+
+
+async def client(http: httpx.AsyncClient, game_id: str, requests: int, rng: random.Random, sent: dict) -> None:
+    for _ in range(requests):
+        if rng.random() < 0.5:
+            dx, dy = rng.choice(DIRECTIONS)
+            await http.post("/game/move", json={"game_id": game_id, "dx": dx, "dy": dy})
+            sent["moves"] += 1
+        else:
+            await http.post("/game/tick", json={"game_id": game_id})
+            sent["ticks"] += 1
+
+
+async def run(target: FastAPI, games: int, clients: int, requests: int, seed: int) -> dict:
+    GAMES.clear()
+    rng = random.Random(seed)
+    states = [new_game(rng.randrange(2 ** 31)) for _ in range(games)]
+    sent = {state.game_id: {"moves": 0, "ticks": 0} for state in states}
+    transport = httpx.ASGITransport(app=target)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            client(http, state.game_id, requests, random.Random(rng.random()), sent[state.game_id])
+            for state in states for _ in range(clients)
+        ))
+        elapsed = time.perf_counter() - started
+
+    lost_ticks = lost_actions = diverged = 0
+    for state in states:
+        counts = sent[state.game_id]
+        lost_ticks += counts["ticks"] - (PLENTY - state.time_left)
+        # only one-byte records (unit moves and ticks) are sent here
+        _, header = read_header(state.action_log)
+        lost_actions += counts["moves"] + counts["ticks"] - (len(state.action_log) - header)
+        # interleaved updates also leave a state its own log does not reproduce
+        diverged += bool(verify(state))
+    GAMES.clear()
+    total = games * clients * requests
+    return {
+        "requests": total,
+        "seconds": round(elapsed, 3),
+        "requests_per_s": round(total / elapsed),
+        "lost_ticks": lost_ticks,
+        "lost_actions": lost_actions,
+        "diverged_games": diverged,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=20)
+    parser.add_argument("--clients", type=int, default=8, help="concurrent clients per game")
+    parser.add_argument("--requests", type=int, default=50, help="requests per client")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    failed = False
+    for name, target in (("threaded", threaded_app()), ("async", app)):
+        row = asyncio.run(run(target, args.games, args.clients, args.requests, args.seed))
+        print(f"{name:8} {row['requests_per_s']:7} req/s  lost ticks {row['lost_ticks']}  lost actions {row['lost_actions']}  diverged games {row['diverged_games']}")
+        failed |= name == "async" and any((row["lost_ticks"], row["lost_actions"], row["diverged_games"]))
+    if failed:
+        raise SystemExit("lost updates with the command queue")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Memory held per game session, the main limit on sessions per host.
+
+Creates sessions through create_game and measures the heap they retain with
+tracemalloc, once as stored (Grid maze) and once with the maze converted back to
+lists of rows for comparison. The pickled size is what the SQLite backend stores.
+
+    cd Backend && python -m benchmarks.bench_memory --sessions 2000
+"""
+import argparse
+import gc
+import pickle
+import tracemalloc
+import zlib
+
+from core.game_manager import create_game
+from core.storage import GAMES
+from game.state import Difficulty
+
+
+def measure(difficulty: Difficulty, sessions: int, lists: bool) -> dict:
+    GAMES.clear()
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for _ in range(sessions):
+        state = create_game(difficulty)
+        if lists:
+            state.maze = state.maze.to_rows()
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    sample = next(iter(GAMES.values()))
+    pickled = pickle.dumps(sample, protocol=pickle.HIGHEST_PROTOCOL)
+    GAMES.clear()
+    return {
+        "difficulty": difficulty.value,
+        "maze": "lists" if lists else "grid",
+        "maze_size": len(sample.maze),
+        "bytes_per_session": used // sessions,
+        "pickled_bytes": len(pickled),
+        "stored_bytes": len(zlib.compress(pickled, 1)),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=2000)
+    args = parser.parse_args()
+
+    GAMES.max_sessions = max(GAMES.max_sessions, args.sessions)
+    for difficulty in Difficulty:
+        for lists in (False, True):
+            print(measure(difficulty, args.sessions, lists))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Replay speed: how fast recorded games are re-run from their action logs.
+
+Plays games with random moves, ticks, items and puzzles through game.actions
+(as the API does), then replays every log with game.replay and checks each
+replayed game ends where the live one did. Reports actions replayed per second
+and the log bytes per action.
+
+    cd Backend && python -m benchmarks.bench_replay --games 200 --actions 2000
+"""
+import argparse
+import random
+import time
+
+from core.game_manager import create_game
+from core.storage import GAMES
+from game.action_log import start_log
+from game.actions import apply_item, apply_puzzle_result, apply_tick, move_player
+from game.replay import outcome, replay
+from game.state import Difficulty
+
+DIRECTIONS = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+
+
+def play(state, rng: random.Random, actions: int) -> None:
+    # mostly moves, a tick every few of them, the rare item or puzzle
+    for _ in range(actions):
+        r = rng.random()
+        if r < 0.75:
+            move_player(state, *rng.choice(DIRECTIONS))
+        elif r < 0.95:
+            apply_tick(state)
+        elif r < 0.98:
+            apply_item(state, "health_potion")
+        else:
+            apply_puzzle_result(state, r < 0.99)
+
+
+def measure(difficulty: Difficulty, games: int, actions: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    played = []
+    for n in range(games):
+        state = create_game(difficulty, level=1 + n % 3, seed=rng.randrange(2 ** 31))
+        # keep the games going for the whole run so every action does real work
+        state.time_left = state.player.energy = state.player.health = 10 ** 6
+        state.inventory = {"health_potion": 10 ** 6}
+        start_log(state)
+        play(state, rng, actions)
+        played.append(state)
+    GAMES.clear()
+
+    started = time.perf_counter()
+    replayed = [replay(state.action_log) for state in played]
+    elapsed = time.perf_counter() - started
+    mismatches = sum(outcome(a) != outcome(b) for a, b in zip(played, replayed))
+    log_bytes = sum(len(state.action_log) for state in played)
+    return {
+        "difficulty": difficulty.value,
+        "actions": games * actions,
+        "seconds": round(elapsed, 3),
+        "actions_per_s": round(games * actions / elapsed),
+        "log_bytes_per_game": log_bytes // games,
+        "mismatches": mismatches,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=200)
+    parser.add_argument("--actions", type=int, default=2000, help="actions played per game")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    for difficulty in Difficulty:
+        row = measure(difficulty, args.games, args.actions, args.seed)
+        print(f"{row['difficulty']}: {row['actions_per_s']} actions/s, {row['log_bytes_per_game']} log bytes/game, {row['mismatches']} mismatches")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Throughput of the shared SQLite session backend as worker processes are added.
+
+Every worker hammers the same set of games with read-modify-write updates, the
+way several uvicorn workers would serve one player population. Afterwards the
+scores must add up to the number of updates: a lost update fails the run.
+
+    cd Backend && python -m benchmarks.bench_workers --workers 1 2 4 --ops 2000
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+from core.sqlite_storage import SqliteSessionStore
+from core.storage import SessionConflict
+from game.state import Difficulty, GameState, Player
+
+
+def make_state(game_id: str) -> GameState:
+    return GameState(
+        game_id=game_id,
+        difficulty=Difficulty.MEDIUM,
+        player=Player(x=1, y=1, health=100, energy=50),
+        enemies=[],
+        maze=[[1] * 13 for _ in range(13)],
+        time_left=60,
+        score=0,
+        inventory={},
+    )
+
+
+def _bump(state: GameState) -> None:
+    state.score += 1
+
+
+def _worker(path: str, games: int, ops: int, seed: int) -> int:
+    store = SqliteSessionStore(path)
+    rng = random.Random(seed)
+    failed = 0
+    for _ in range(ops):
+        try:
+            store.update(f"g{rng.randrange(games)}", _bump, retries=64)
+        except SessionConflict:
+            failed += 1
+    return failed
+
+
+def run(workers: int, games: int, ops: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sessions.db")
+        store = SqliteSessionStore(path, max_sessions=games)
+        for i in range(games):
+            store[f"g{i}"] = make_state(f"g{i}")
+
+        ctx = multiprocessing.get_context("spawn")
+        with ctx.Pool(workers) as pool:
+            started = time.perf_counter()
+            failed = sum(pool.starmap(_worker, [(path, games, ops, seed) for seed in range(workers)]))
+            elapsed = time.perf_counter() - started
+
+        total = sum(store.peek(f"g{i}").score for i in range(games))
+    expected = workers * ops - failed
+    return {
+        "workers": workers,
+        "updates": workers * ops,
+        "seconds": round(elapsed, 3),
+        "updates_per_s": round(workers * ops / elapsed),
+        "gave_up": failed,
+        "lost": expected - total,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--games", type=int, default=64, help="shared games; fewer means more contention")
+    parser.add_argument("--ops", type=int, default=2000, help="updates per worker")
+    args = parser.parse_args()
+
+    lost = 0
+    for workers in args.workers:
+        result = run(workers, args.games, args.ops)
+        lost += result["lost"]
+        print(result)
+    if lost:
+        raise SystemExit(f"{lost} updates were lost")
+
+
+if __name__ == "__main__":
+    main()
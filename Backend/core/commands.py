@@ -0,0 +1,56 @@
+# per-game command serialization for the async endpoints
+import asyncio
+from typing import Callable, Dict, Optional, TypeVar
+
+from core.game_manager import update_game
+from core.storage import GAMES, SessionBackend
+from game.state import GameState
+
+T = TypeVar("T")
+
+
+class CommandQueue:
+    """Run commands against one game strictly one after another, in arrival order.
+
+    Each game gets an asyncio.Lock while it has commands waiting (asyncio locks
+    are FIFO), so a tick racing a move for the same game is applied after it
+    instead of on top of it, while other games proceed concurrently.
+
+    With an in-memory backend the command runs right on the event loop: game
+    actions take microseconds and a thread hop would cost more than the work.
+    A blocking backend (SQLite) runs it in a worker thread instead, so the loop
+    keeps serving other games meanwhile.
+    """
+
+    def __init__(self, games: SessionBackend, offload: Optional[bool] = None):
+        self.games = games
+        self.offload = games.blocking if offload is None else offload
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._waiting: Dict[str, int] = {}
+
+    async def run(self, game_id: str, fn: Callable[[GameState], T]) -> T:
+        """update_game(game_id, fn), after every earlier command for this game."""
+        lock = self._locks.get(game_id)
+        if lock is None:
+            lock = self._locks[game_id] = asyncio.Lock()
+        self._waiting[game_id] = self._waiting.get(game_id, 0) + 1
+        try:
+            async with lock:
+                if self.offload:
+                    return await asyncio.to_thread(update_game, game_id, fn)
+                return update_game(game_id, fn)
+        finally:
+            # drop the lock with its last user, so idle games cost nothing here
+            waiting = self._waiting[game_id] - 1
+            if waiting:
+                self._waiting[game_id] = waiting
+            else:
+                del self._waiting[game_id]
+                del self._locks[game_id]
+
+    def pending(self) -> int:
+        # commands running or waiting, across all games
+        return sum(self._waiting.values())
+
+
+COMMANDS = CommandQueue(GAMES)
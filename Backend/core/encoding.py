@@ -0,0 +1,25 @@
+# JSON encoding for game responses, bypassing FastAPI's jsonable_encoder
+import json
+
+from game.grid import Grid
+
+try:
+    import orjson
+except ImportError:  # optional: stdlib json is used without it
+    orjson = None
+
+
+def dumps(obj) -> bytes:
+    # payloads are plain dicts/lists of str, int, bool and None
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+def maze_bytes(maze) -> bytes:
+    """The maze as a JSON array of rows; cached on a Grid until a cell changes."""
+    if not isinstance(maze, Grid):
+        return dumps(maze)
+    if maze.encoded is None:
+        maze.encoded = dumps(maze.to_rows())
+    return maze.encoded
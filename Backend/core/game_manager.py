@@ -1,55 +1,119 @@
+import random
+import time
 import uuid
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple, TypeVar
+from game.grid import Grid
+from game.maze import LEVEL_GROWTH, maze_size
+from game.action_log import start_log
+from game.chunks import CHUNK_SIZE, ChunkedGrid, chunk_payload, viewport_chunks
 from game.state import GameState, Player, Difficulty, Enemy
-from game.maze import generate_maze
+from game.visibility import fogged_rows, is_fogged, reveal, visible_cells
+from core.encoding import dumps, maze_bytes
+from core.leaderboard import LEADERBOARD
+from core.maze_pool import MAZE_POOL
+from core.metrics import GAMES_FINISHED, GAMES_STARTED, SERIALIZE_SECONDS, mark_outcome
+from core.scheduler import SCHEDULER
 from core.storage import GAMES
 
+T = TypeVar("T")
 
-def create_game(difficulty: Difficulty, level: int = 1) -> GameState:
+# maze size per difficulty (also used to warm the maze pool at startup)
+MAZE_SIZES = {
+    Difficulty.EASY: 8,
+    Difficulty.MEDIUM: 12,
+    Difficulty.IMPOSSIBLE: 8,
+}
+# each level's maze edge is LEVEL_GROWTH longer than the previous one's, up to
+# MAX_LEVEL_SIZE (below the chunked sizes, so every level is a whole maze)
+MAX_LEVEL_SIZE = 255
+# starting time, starting energy and moving enemies of level 1, by difficulty
+_LEVEL_ONE = {
+    Difficulty.EASY: (120, 50, 0),
+    Difficulty.MEDIUM: (180, 100, 2),
+    Difficulty.IMPOSSIBLE: (150, 50, 0),
+}
+# energy check_victory counts as full marks on level 1
+ENERGY_PAR = 50
+MAX_ENEMIES = 8
+
+
+@dataclass(slots=True)
+class LevelSettings:
+    size: int
+    time_left: int
+    energy: int
+    enemies: int
+    # the energy that scores full marks (see game.victory)
+    energy_limit: int
+
+
+def level_settings(difficulty: Difficulty, level: int) -> LevelSettings:
+    """Maze size, timer, energy and enemies of one level (trap density: game.maze).
+
+    The maze edge grows by LEVEL_GROWTH per level. Energy (one per move) grows
+    with the edge to the power 1.5, as routes get longer and twistier; the
+    timer grows with the edge but loses 10% per level, so later levels leave
+    less time to spare. Medium gains an enemy per level, easy one every other
+    level; impossible keeps none, its traps and darkness are hard enough.
+    """
+    time_left, energy, enemies = _LEVEL_ONE[difficulty]
+    base = MAZE_SIZES[difficulty]
+    steps = min(max(0, level - 1), 64)
+    scale = min(LEVEL_GROWTH ** steps, MAX_LEVEL_SIZE / base)
+    if difficulty == Difficulty.MEDIUM:
+        enemies += steps
+    elif difficulty == Difficulty.EASY:
+        enemies += steps // 2
+    return LevelSettings(
+        size=round(base * scale),
+        time_left=max(time_left, round(time_left * scale * 0.9 ** steps)),
+        energy=round(energy * scale ** 1.5),
+        enemies=min(enemies, MAX_ENEMIES),
+        energy_limit=round(ENERGY_PAR * scale ** 1.5),
+    )
+
+
+def create_game(difficulty: Difficulty, level: int = 1, seed: Optional[int] = None, size: Optional[int] = None, previous_game_id: Optional[str] = None) -> GameState:
+    # a seed fixes the maze and the enemy spawns, so everyone given it plays the same game;
+    # `size` overrides the level's maze size (huge sizes get a chunked maze);
+    # seeded games and other sizes than the level's are unranked;
+    # `previous_game_id` is the game just won, whose next-level maze may be ready
     game_id = str(uuid.uuid4())
-    # size and parameters by difficulty
+    settings = level_settings(difficulty, level)
+    # parameters by difficulty
     if difficulty == Difficulty.EASY:
-        size = 8
-        time_left = 120
         lives = 3
         # Require key for all difficulties
         keys_required = 1
         darkness = False
     elif difficulty == Difficulty.MEDIUM:
-        size = 12
-        time_left = 180
         lives = 3
         keys_required = 1
         darkness = False
     elif difficulty == Difficulty.IMPOSSIBLE:
-        size = 8
-        time_left = 150
         lives = 5
         keys_required = 1
         darkness = True
 
-    maze, traps, keys, exit_pos = generate_maze(size, difficulty.value)
-
-    # determine player start from generated maze (cell 3) if present
-    start_x, start_y = 0, 0
-    try:
-        for y, row in enumerate(maze):
-            for x, cell in enumerate(row):
-                if cell == 3:
-                    start_x, start_y = x, y
-                    raise StopIteration
-    except StopIteration:
-        pass
-
-    # starting energy: Normal (MEDIUM) gets full 100 energy; others keep previous defaults
-    starting_energy = 100 if difficulty == Difficulty.MEDIUM else 50
+    # layouts (maze + critical path) are pre-generated by the pool; an empty
+    # pool generates synchronously; seeded layouts come from a shared cache
+    layout = MAZE_POOL.acquire(difficulty.value, size or settings.size, seed, level, owner=previous_game_id)
+    maze = layout.maze
+    chunked = isinstance(maze, ChunkedGrid)
+    if chunked:
+        # explored a viewport at a time, and the viewport already limits what is sent
+        darkness = False
+    traps = layout.traps
+    start_x, start_y = layout.landmarks.start
 
     state = GameState(
         game_id=game_id,
         difficulty=difficulty,
         maze=maze,
-        player=Player(x=start_x, y=start_y, health=100, energy=starting_energy, lives=lives),
+        player=Player(x=start_x, y=start_y, health=100, energy=settings.energy, lives=lives),
         enemies=[],
-        time_left=time_left,
+        time_left=settings.time_left,
         score=0,
         inventory={},
         lives=lives,
@@ -59,74 +123,27 @@ def create_game(difficulty: Difficulty, level: int = 1) -> GameState:
         darkness=darkness,
         map_preview_time=5 if difficulty == Difficulty.IMPOSSIBLE else 0,
         level=level,
+        landmarks=layout.landmarks,
+        seed=seed,
+        ranked=seed is None and (size is None or maze_size(size) == maze_size(settings.size)),
+        time_limit=settings.time_left,
+        energy_limit=settings.energy_limit,
     )
     # spawn enemies for medium (moving enemies). For Impossible we remove moving enemies (only static traps remain)
-    import random
+    # its own generator, so the spawns do not depend on how the maze was drawn
+    rng = random.Random(f"enemies:{seed}") if seed is not None else random
     enemies = []
-    if difficulty == Difficulty.MEDIUM:
-        num_enemies = 2
-    elif difficulty == Difficulty.IMPOSSIBLE:
-        # Do not spawn moving enemies on IMPOSSIBLE; player must memorise arena instead
-        num_enemies = 0
-    else:
-        num_enemies = 0
+    # none on IMPOSSIBLE; player must memorise arena instead
+    num_enemies = settings.enemies
 
-    size = len(maze)
+    # chunked mazes only spawn enemies in the first chunk, so the rest stays ungenerated
+    size = min(len(maze), CHUNK_SIZE) if chunked else len(maze)
     # avoid placing enemies on start cell and on the exit cell
-    exit_coords = tuple(exit_pos) if exit_pos else (size-1, size-1)
+    exit_coords = layout.exit_pos
     empty_cells = [(x, y) for y in range(size) for x in range(size) if maze[y][x] == 0 and (x, y) not in [(start_x, start_y), exit_coords]]
-    random.shuffle(empty_cells)
+    rng.shuffle(empty_cells)
     # Avoid placing enemies on critical paths (start->key and key->exit) if possible
-    critical = set()
-    try:
-        # compute shortest path helper
-        from collections import deque
-
-        def shortest_path(sx, sy, tx, ty):
-            q = deque([(sx, sy)])
-            prev = { (sx, sy): None }
-            while q:
-                cx, cy = q.popleft()
-                if (cx, cy) == (tx, ty):
-                    # reconstruct
-                    path = []
-                    cur = (tx, ty)
-                    while cur is not None:
-                        path.append(cur)
-                        cur = prev.get(cur)
-                    path.reverse()
-                    return path
-                for ox, oy in ((1,0),(-1,0),(0,1),(0,-1)):
-                    nx, ny = cx+ox, cy+oy
-                    if 0 <= nx < size and 0 <= ny < size and maze[ny][nx] != 1 and (nx, ny) not in prev:
-                        prev[(nx, ny)] = (cx, cy)
-                        q.append((nx, ny))
-            return None
-
-        # find key position (first cell with value 5)
-        key_pos = None
-        for y, row in enumerate(maze):
-            for x, cell in enumerate(row):
-                if cell == 5:
-                    key_pos = (x, y)
-                    break
-            if key_pos:
-                break
-
-        # always include the shortest path from start -> exit as critical
-        p0 = shortest_path(start_x, start_y, exit_coords[0], exit_coords[1])
-        if p0:
-            critical.update(p0)
-
-        if key_pos:
-            p1 = shortest_path(start_x, start_y, key_pos[0], key_pos[1])
-            p2 = shortest_path(key_pos[0], key_pos[1], exit_coords[0], exit_coords[1])
-            if p1:
-                critical.update(p1)
-            if p2:
-                critical.update(p2)
-    except Exception:
-        critical = set()
+    critical = layout.critical
 
     # choose enemy spawn cells avoiding critical path cells when possible
     spawn_cells = [c for c in empty_cells if c not in critical]
@@ -136,25 +153,126 @@ def create_game(difficulty: Difficulty, level: int = 1) -> GameState:
     for i in range(min(num_enemies, len(spawn_cells))):
         x, y = spawn_cells[i]
         # random patrol direction
-        if random.random() < 0.5:
+        if rng.random() < 0.5:
             dx, dy = 1, 0
         else:
             dx, dy = 0, 1
-        enemies.append(Enemy(id=str(uuid.uuid4()), x=x, y=y, pattern="patrol", dx=dx, dy=dy))
+        # chasers follow a flow field over the whole maze, too costly on a chunked one
+        pattern = "patrol" if chunked else enemy_pattern(level, i)
+        enemies.append(Enemy(id=str(uuid.uuid4()), x=x, y=y, pattern=pattern, dx=dx, dy=dy))
 
     state.enemies = enemies
+    # the game as created heads its action log (see game.replay)
+    start_log(state)
+    # darkness: the cells around the start are the first ones seen
+    reveal(state)
 
     # place keys count
     GAMES[game_id] = state
+    GAMES_STARTED.inc(difficulty.value)
     return state
 
 
+def enemy_pattern(level: int, index: int) -> str:
+    # from level 2 the second enemy lies in ambush, from level 3 the first one chases
+    if index == 0 and level >= 3:
+        return "chase"
+    if index == 1 and level >= 2:
+        return "ambush"
+    return "patrol"
+
+
+def warm_maze_pool() -> None:
+    MAZE_POOL.start()
+    for difficulty, size in MAZE_SIZES.items():
+        MAZE_POOL.warm(difficulty.value, size)
+
+
+def _next_level(state: GameState) -> Optional[Tuple[str, int, int]]:
+    # once the key is in hand the level is as good as won: the first update to
+    # see it asks for the next level's maze (unseeded, normal-sized games only)
+    if state.next_level_reserved or state.keys_collected < state.keys_required or state.is_game_over:
+        return None
+    if state.seed is not None or isinstance(state.maze, ChunkedGrid) or len(state.maze) != maze_size(level_settings(state.difficulty, state.level).size):
+        return None
+    state.next_level_reserved = True
+    level = state.level + 1
+    return state.difficulty.value, level_settings(state.difficulty, level).size, level
+
+
 def get_game(game_id: str) -> GameState:
     return GAMES[game_id]
 
 
-def serialize_state(state: GameState) -> dict:
-    # Map backend GameState to frontend-friendly shape
+def update_game(game_id: str, fn: Callable[[GameState], T]) -> T:
+    """Load the game, apply fn and persist the result (retrying on concurrent saves).
+
+    fn may run more than once with a shared backend, so it must only touch the state.
+    """
+    # only the attempt that was saved counts a finished game, ranks a victory
+    # or reserves the next maze
+    outcome = next_level = finished = None
+
+    def run(state: GameState) -> T:
+        nonlocal outcome, next_level, finished
+        result = fn(state)
+        outcome = mark_outcome(state)
+        finished = state if outcome else None
+        next_level = _next_level(state)
+        return result
+
+    result = GAMES.update(game_id, run)
+    if outcome:
+        GAMES_FINISHED.inc(*outcome)
+        # written by the leaderboard's own thread: this may be running on the event loop
+        LEADERBOARD.submit(finished)
+    if next_level:
+        MAZE_POOL.reserve(game_id, *next_level)
+    return result
+
+
+def serialize_state(state: GameState, since: Optional[int] = None) -> dict:
+    """Map backend GameState to frontend-friendly shape.
+
+    Every distinct snapshot gets a new per-game `version`. A client that passes
+    the version it already holds as `since` receives only a delta: the fields
+    that changed plus the maze cells written since (`cells` as [x, y, value]).
+    Any other `since` (or None) yields the full snapshot including the maze.
+    In darkness, once the map preview is over, unseen cells are sent as HIDDEN
+    and deltas only carry changes to seen cells plus the newly seen ones.
+    Chunked mazes are never sent whole: snapshots carry the `chunks` around the
+    player that the client does not have yet (see game.chunks).
+    """
+    started = time.perf_counter()
+    payload, full = _snapshot(state, since)
+    if full and is_fogged(state):
+        payload["maze"] = fogged_rows(state)
+    elif full and not isinstance(state.maze, ChunkedGrid):
+        payload["maze"] = state.maze.to_rows() if isinstance(state.maze, Grid) else state.maze
+    SERIALIZE_SECONDS.observe(time.perf_counter() - started, "full" if full else "delta")
+    return payload
+
+
+def encode_state(state: GameState, since: Optional[int] = None, **extra) -> bytes:
+    """serialize_state encoded straight to JSON bytes, plus any `extra` fields.
+
+    The maze, the bulk of a full snapshot, is spliced in from bytes cached on the
+    game, so it is only encoded again after a cell changed.
+    """
+    started = time.perf_counter()
+    payload, full = _snapshot(state, since)
+    payload.update(extra)
+    body = dumps(payload)
+    if full and not isinstance(state.maze, ChunkedGrid):
+        # fogged mazes differ per game and step, so they are not worth caching
+        maze = dumps(fogged_rows(state)) if is_fogged(state) else maze_bytes(state.maze)
+        body = body[:-1] + b',"maze":' + maze + b"}"
+    SERIALIZE_SECONDS.observe(time.perf_counter() - started, "full" if full else "delta")
+    return body
+
+
+def _snapshot(state: GameState, since: Optional[int]) -> Tuple[dict, bool]:
+    # the payload without the maze, and whether it is a full snapshot (needs the maze)
     phase = "playing"
     if state.is_victory:
         phase = "victory"
@@ -162,7 +280,7 @@ def serialize_state(state: GameState) -> dict:
         phase = "gameOver"
 
     enemies = [
-        {"id": e.id, "position": {"x": e.x, "y": e.y}} for e in state.enemies
+        {"id": e.id, "position": {"x": e.x, "y": e.y}, "pattern": e.pattern} for e in state.enemies
     ]
 
     items = [{"type": k, "uses": v} for k, v in state.inventory.items()]
@@ -172,18 +290,16 @@ def serialize_state(state: GameState) -> dict:
     if diff_val == "medium":
         diff_val = "normal"
 
-    player_hit_flag = getattr(state, "player_hit", False)
-    try:
-        setattr(state, "player_hit", False)
-    except Exception:
-        pass
+    player_hit_flag = state.player_hit
+    state.player_hit = False
 
-    return {
+    fields = {
         "game_id": state.game_id,
         "phase": phase,
         "difficulty": diff_val,
         "level": getattr(state, "level", 1),
-        "maze": state.maze,
+        "seed": state.seed,
+        "ranked": state.ranked,
         "player_position": {"x": state.player.x, "y": state.player.y},
         "energy": state.player.energy,
         "health": state.player.health,
@@ -197,11 +313,43 @@ def serialize_state(state: GameState) -> dict:
         # map is visible if darkness is disabled (easy/medium) or when a preview time is running (Impossible preview)
         "map_visible": (not getattr(state, "darkness", False)) or (getattr(state, "map_preview_time", 0) > 0),
         "map_timer": state.map_preview_time,
-        "puzzle": getattr(state, "puzzle", None),
+        "puzzle": state.puzzle,
         "player_hit": player_hit_flag,
+        # true when time advances on the server and the client should not send ticks
+        "server_clock": SCHEDULER.running,
     }
-    # clear transient flag
-    try:
-        setattr(state, "player_hit", False)
-    except Exception:
-        pass
+
+    base = state.version
+    previous = state.sent_fields
+    cells = visible_cells(state) if is_fogged(state) else state.cell_log
+    delta = since is not None and previous is not None and since == base
+
+    # chunked mazes: the viewport chunks this client has not been sent yet
+    chunks: List[Tuple[int, int]] = []
+    if isinstance(state.maze, ChunkedGrid):
+        known = state.sent_chunks if delta and state.sent_chunks is not None else set()
+        chunks = [c for c in viewport_chunks(state.maze, state.player.x, state.player.y) if c not in known]
+        state.sent_chunks = known.union(chunks)
+
+    if previous is None or cells or chunks or fields != previous:
+        state.version += 1
+        state.sent_fields = fields
+        state.cell_log = []
+    state.reveal_log = []
+
+    if delta:
+        changes = {k: v for k, v in fields.items() if previous.get(k) != v}
+        changes.update(game_id=state.game_id, version=state.version, delta=True, cells=[list(c) for c in cells])
+        if chunks:
+            changes["chunks"] = [chunk_payload(state.maze, cx, cy) for cx, cy in chunks]
+        return changes, False
+
+    payload = {**fields, "version": state.version, "delta": False}
+    if isinstance(state.maze, ChunkedGrid):
+        payload.update(
+            maze_width=state.maze.width,
+            maze_height=state.maze.height,
+            chunk_size=CHUNK_SIZE,
+            chunks=[chunk_payload(state.maze, cx, cy) for cx, cy in chunks],
+        )
+    return payload, True
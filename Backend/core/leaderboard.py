@@ -0,0 +1,246 @@
+# finished games ranked by score, per difficulty and level (local SQLite)
+import bisect
+import os
+import queue
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from game.state import GameState
+
+# one board is a contiguous range of scores_board, already in rank order (best
+# score first, earlier finish first on a tie), so a page of it is read straight
+# off the index: no table scan, no sort
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    id INTEGER PRIMARY KEY,
+    game_id TEXT NOT NULL UNIQUE,
+    difficulty TEXT NOT NULL,
+    level INTEGER NOT NULL,
+    score INTEGER NOT NULL,
+    time_left INTEGER NOT NULL,
+    seed INTEGER,
+    finished_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scores_board ON scores (difficulty, level, score DESC, id);
+"""
+_COLUMNS = "id, game_id, difficulty, level, score, time_left, seed, finished_at"
+
+Board = Tuple[str, int]
+
+
+@dataclass(slots=True)
+class ScoreEntry:
+    game_id: str
+    difficulty: str
+    level: int
+    score: int
+    time_left: int
+    seed: Optional[int]
+    finished_at: float
+    # row id, assigned on insert; breaks ties between equal scores
+    id: int = 0
+
+    @classmethod
+    def from_state(cls, state: GameState, finished_at: float) -> "ScoreEntry":
+        difficulty = getattr(state.difficulty, "value", state.difficulty)
+        return cls(state.game_id, difficulty, state.level, state.score, state.time_left, state.seed, finished_at)
+
+    def to_dict(self, rank: int) -> dict:
+        return {
+            "rank": rank,
+            "game_id": self.game_id,
+            "difficulty": self.difficulty,
+            "level": self.level,
+            "score": self.score,
+            "time_left": self.time_left,
+            "seed": self.seed,
+            "finished_at": self.finished_at,
+        }
+
+
+class Leaderboard:
+    """Victories by (difficulty, level), best score first, in one SQLite database.
+
+    The best `top_k` entries of every board that has been read are cached in
+    memory and kept current by `record`, so the first pages are served without
+    touching the database. Other processes writing the same file (several
+    uvicorn workers) are noticed through SQLite's data_version, which drops the
+    cache. Deeper pages and rank lookups are index range queries.
+
+    The database is opened on first use; one connection is shared by all
+    threads behind a lock, as writes are one small row per won game.
+
+    Only ranked games are recorded: a custom maze size or a chosen seed (a
+    replayable, known maze) would not compete on equal terms.
+
+    Games are won inside update_game, which may run on the event loop, so
+    they are handed over with `submit` and written by a background thread;
+    reads wait for what this process submitted, so a player always finds
+    their own win.
+    """
+
+    def __init__(self, path: str, top_k: int = 100, clock=time.time):
+        self.path = path
+        self.top_k = top_k
+        self._clock = clock
+        self._lock = threading.RLock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._data_version = 0
+        # per board: (-score, id, entry) for the best min(top_k, board size) entries
+        self._top: Dict[Board, List[Tuple[int, int, ScoreEntry]]] = {}
+        self._queue: "queue.Queue[Optional[ScoreEntry]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+        # wins that could not be written (e.g. the database stayed locked past the timeout)
+        self.dropped = 0
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            conn = sqlite3.connect(self.path, timeout=10.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._db = conn
+            self._data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+        return self._db
+
+    def _fresh(self) -> sqlite3.Connection:
+        # the connection, with the cache dropped if another connection wrote since
+        conn = self._conn()
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if version != self._data_version:
+            self._data_version = version
+            self._top.clear()
+        return conn
+
+    def submit(self, state: GameState) -> None:
+        """Queue a won game for the writer thread; returns at once."""
+        if not state.is_victory or not state.ranked:
+            return
+        entry = ScoreEntry.from_state(state, self._clock())
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="leaderboard-writer", daemon=True)
+                self._writer.start()
+            self._queue.put(entry)
+
+    def flush(self) -> None:
+        # wait until every submitted win is written
+        self._queue.join()
+
+    def record(self, state: GameState) -> Optional[ScoreEntry]:
+        """Add a won game now; None if it is not a ranked victory or was recorded already."""
+        if not state.is_victory or not state.ranked:
+            return None
+        return self._insert(ScoreEntry.from_state(state, self._clock()))
+
+    def _write_loop(self) -> None:
+        while True:
+            entry = self._queue.get()
+            try:
+                if entry is None:
+                    return
+                self._insert(entry)
+            except sqlite3.Error:
+                self.dropped += 1
+            finally:
+                self._queue.task_done()
+
+    def _insert(self, entry: ScoreEntry) -> Optional[ScoreEntry]:
+        with self._lock:
+            conn = self._fresh()
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO scores (game_id, difficulty, level, score, time_left, seed, finished_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (entry.game_id, entry.difficulty, entry.level, entry.score, entry.time_left, entry.seed, entry.finished_at),
+            )
+            if cur.rowcount == 0:
+                return None
+            entry.id = cur.lastrowid
+            top = self._top.get((entry.difficulty, entry.level))
+            if top is not None:
+                # a cached board holds the top min(top_k, size) entries: a new one either
+                # belongs among them or (when the board is full) falls off the end
+                bisect.insort(top, (-entry.score, entry.id, entry))
+                if len(top) > self.top_k:
+                    top.pop()
+        return entry
+
+    def top(self, difficulty: str, level: int, limit: int = 100, offset: int = 0) -> List[dict]:
+        """One page of a board, each entry with its 1-based rank."""
+        self.flush()
+        board = (difficulty, level)
+        with self._lock:
+            conn = self._fresh()
+            if offset + limit <= self.top_k:
+                top = self._top.get(board)
+                if top is None:
+                    top = self._top[board] = [
+                        (-e.score, e.id, e) for e in self._select(conn, board, self.top_k, 0)
+                    ]
+                entries = [e for _, _, e in top[offset:offset + limit]]
+            else:
+                entries = self._select(conn, board, limit, offset)
+        return [e.to_dict(offset + i + 1) for i, e in enumerate(entries)]
+
+    def rank(self, game_id: str) -> Optional[dict]:
+        """A recorded game's entry with its rank on its board, None if it is not on one."""
+        self.flush()
+        with self._lock:
+            conn = self._fresh()
+            row = conn.execute(f"SELECT {_COLUMNS} FROM scores WHERE game_id = ?", (game_id,)).fetchone()
+            if row is None:
+                return None
+            entry = _entry(row)
+            board = (entry.difficulty, entry.level)
+            top = self._top.get(board)
+            if top is not None:
+                i = bisect.bisect_left(top, (-entry.score, entry.id))
+                if i < len(top) and top[i][1] == entry.id:
+                    return entry.to_dict(i + 1)
+            # entries ahead: every better score, then equal scores recorded earlier
+            better = conn.execute(
+                "SELECT COUNT(*) FROM scores WHERE difficulty = ? AND level = ? AND score > ?",
+                (entry.difficulty, entry.level, entry.score),
+            ).fetchone()[0]
+            earlier = conn.execute(
+                "SELECT COUNT(*) FROM scores WHERE difficulty = ? AND level = ? AND score = ? AND id < ?",
+                (entry.difficulty, entry.level, entry.score, entry.id),
+            ).fetchone()[0]
+        return entry.to_dict(better + earlier + 1)
+
+    def close(self) -> None:
+        with self._writer_lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            # the writer drains what is queued, then stops
+            self._queue.put(None)
+            writer.join()
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+            self._top.clear()
+
+    def _select(self, conn: sqlite3.Connection, board: Board, limit: int, offset: int) -> List[ScoreEntry]:
+        rows = conn.execute(
+            f"SELECT {_COLUMNS} FROM scores WHERE difficulty = ? AND level = ? ORDER BY score DESC, id LIMIT ? OFFSET ?",
+            (board[0], board[1], limit, offset),
+        )
+        return [_entry(row) for row in rows]
+
+
+def _entry(row) -> ScoreEntry:
+    row_id, game_id, difficulty, level, score, time_left, seed, finished_at = row
+    return ScoreEntry(game_id, difficulty, level, score, time_left, seed, finished_at, row_id)
+
+
+# next to the Backend package, wherever the server was started from
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "leaderboard.db")
+
+LEADERBOARD = Leaderboard(
+    os.environ.get("MINDMAZE_LEADERBOARD", DEFAULT_PATH),
+    top_k=int(os.environ.get("MINDMAZE_LEADERBOARD_TOP", "100")),
+)
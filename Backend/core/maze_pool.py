@@ -0,0 +1,339 @@
+# pre-generated maze layouts, refilled in the background
+import os
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+from core.metrics import GENERATE_SECONDS, LAYOUT_CACHE, NEXT_LEVEL
+from game.chunks import ChunkedGrid
+from game.grid import Grid
+from game.landmarks import build_landmarks
+from game.maze import generate_maze
+from game.pathing import bfs, distance_field
+from game.state import Landmarks
+
+
+@dataclass
+class MazeLayout:
+    maze: Grid
+    traps: List[Tuple[int, int]]
+    keys: List[Tuple[int, int]]
+    exit_pos: Tuple[int, int]
+    landmarks: Landmarks
+    # cells on the start->exit, start->key and key->exit shortest paths; enemies avoid spawning here
+    critical: Set[Tuple[int, int]] = field(default_factory=set)
+    # time generate_maze took (measured in the worker, recorded by the pool)
+    generate_seconds: float = 0.0
+    # seed the maze was generated from (None for unseeded pool layouts)
+    seed: Optional[int] = None
+
+    def copy(self) -> "MazeLayout":
+        # a copy one game can play on: the maze and landmarks change when the key is
+        # taken; cached distance fields and encoded rows are read-only and shared
+        maze = Grid(self.maze.width, self.maze.height, self.maze.cells)
+        maze.paths = dict(self.maze.paths) if self.maze.paths else None
+        maze.encoded = self.maze.encoded
+        marks = self.landmarks
+        return MazeLayout(
+            maze=maze,
+            traps=list(self.traps),
+            keys=list(self.keys),
+            exit_pos=self.exit_pos,
+            landmarks=Landmarks(start=marks.start, exit=marks.exit, keys=set(marks.keys), traps=set(marks.traps)),
+            critical=self.critical,
+            generate_seconds=self.generate_seconds,
+            seed=self.seed,
+        )
+
+
+def build_layout(size: int, difficulty: str, seed: Optional[int] = None, level: int = 1) -> MazeLayout:
+    """Generate a maze plus everything create_game needs to place the player and enemies.
+
+    With a seed the layout is fully determined by (size, difficulty, seed, level).
+    Top-level so it can run in a worker process.
+    """
+    rng = random.Random(seed) if seed is not None else None
+    started = time.perf_counter()
+    maze, traps, keys, exit_pos = generate_maze(size, difficulty, rng, level)
+    generate_seconds = time.perf_counter() - started
+
+    # index of start/exit/key/trap cells; generation already knows all but the start
+    landmarks = build_landmarks(maze, exit=exit_pos, keys=keys, traps=traps)
+    start_x, start_y = landmarks.start or (0, 0)
+
+    size = len(maze)
+    exit_coords = tuple(exit_pos) if exit_pos else (size-1, size-1)
+
+    # Avoid placing enemies on critical paths (start->key and key->exit) if possible.
+    # The field from the exit is the one generate_maze already cached on the maze,
+    # so only the key needs a new search (not cached: it is useless once the key is taken).
+    critical = set()
+    start = (start_x, start_y)
+    from_exit = distance_field(maze, exit_coords)
+    # always include the shortest path from start -> exit as critical
+    critical.update(from_exit.path_from(*start) or ())
+    if keys:
+        key_pos = keys[0]
+        critical.update(bfs(maze, [key_pos]).path_from(*start) or ())
+        critical.update(from_exit.path_from(*key_pos) or ())
+
+    return MazeLayout(
+        maze=maze,
+        traps=traps,
+        keys=keys,
+        exit_pos=exit_coords,
+        landmarks=landmarks,
+        critical=critical,
+        generate_seconds=generate_seconds,
+        seed=seed,
+    )
+
+
+def build_chunked_layout(size: int, difficulty: str, seed: Optional[int] = None) -> MazeLayout:
+    """A layout over a ChunkedGrid: instant at any size, chunks appear as they are read.
+
+    Start and exit sit in the usual corners; the key is on a cell in the far
+    quarter, which every cell of a chunked maze can reach.
+    """
+    if size % 2 == 0:
+        size += 1
+    maze_seed = seed if seed is not None else random.getrandbits(63)
+    rng = random.Random(f"{maze_seed}:key")
+    start, exit_pos = (1, 1), (size - 2, size - 2)
+    key = exit_pos
+    while key == exit_pos:
+        key = (rng.randrange(size // 2 | 1, size - 1, 2), rng.randrange(size // 2 | 1, size - 1, 2))
+    maze = ChunkedGrid(size, size, maze_seed, difficulty, {start: 3, exit_pos: 2, key: 5})
+    return MazeLayout(
+        maze=maze,
+        traps=[],
+        keys=[key],
+        exit_pos=exit_pos,
+        # traps are only known for the chunks generated so far, so none are indexed
+        landmarks=build_landmarks(maze, start=start, exit=exit_pos, keys=[key], traps=()),
+        seed=seed,
+    )
+
+
+class LayoutCache:
+    """Seeded layouts by (size, difficulty, seed, level), least recently used evicted first.
+
+    A seed always yields the same layout, so a maze everyone plays (a daily
+    challenge, a benchmark run) is generated once and then only copied.
+    """
+
+    def __init__(self, limit: int = 256):
+        self.limit = limit
+        self._layouts: "OrderedDict[Tuple[int, str, int, int], MazeLayout]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, size: int, difficulty: str, seed: int, level: int = 1) -> MazeLayout:
+        """A fresh copy of the layout for (size, difficulty, seed, level), generated on a miss."""
+        key = (size, difficulty, seed, level)
+        with self._lock:
+            layout = self._layouts.get(key)
+            if layout is not None:
+                self._layouts.move_to_end(key)
+        LAYOUT_CACHE.inc("hit" if layout is not None else "miss")
+        if layout is None:
+            # generated outside the lock; two misses on one key build the same layout
+            layout = build_layout(size, difficulty, seed, level)
+            GENERATE_SECONDS.observe(layout.generate_seconds, str(size), difficulty)
+            with self._lock:
+                self._layouts[key] = layout
+                while len(self._layouts) > self.limit:
+                    self._layouts.popitem(last=False)
+        return layout.copy()
+
+    def cached(self, size: int, difficulty: str, seed: int, level: int = 1) -> bool:
+        with self._lock:
+            return (size, difficulty, seed, level) in self._layouts
+
+    def __len__(self) -> int:
+        return len(self._layouts)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._layouts.clear()
+
+
+class MazePool:
+    """Per-(difficulty, size, level) stock of ready layouts.
+
+    When a stock drops below `low_watermark` it is topped back up to
+    `high_watermark` by a process pool; an empty stock falls back to
+    generating synchronously, so `acquire` always returns a layout.
+    The pool does nothing in the background until `start()` is called.
+    Seeded layouts bypass the stock and come from the shared `seeded` cache;
+    sizes above `chunked_min_size` are chunked mazes, built on the spot.
+
+    A layout can also be reserved for one owner (a game about to be won)
+    with `reserve`; the owner's next `acquire` for the same parameters takes
+    it, even while it is still being generated. At most `reservations` are
+    kept, the oldest dropped first.
+
+    `ready` tells whether an acquire returns at once: mazes below
+    `inline_max_size` generate in about a millisecond, less than handing the
+    work to a thread costs on a busy server.
+    """
+
+    def __init__(self, low_watermark: int = 2, high_watermark: int = 8, workers: Optional[int] = None, cache_size: int = 256, chunked_min_size: int = 257, reservations: int = 256, inline_max_size: int = 32):
+        if high_watermark < low_watermark:
+            raise ValueError("high_watermark must be >= low_watermark")
+        self.low_watermark = low_watermark
+        self.high_watermark = high_watermark
+        self.workers = workers
+        self._stock: Dict[Tuple[str, int, int], Deque[MazeLayout]] = {}
+        self._pending: Dict[Tuple[str, int, int], int] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[Executor] = None
+        self.seeded = LayoutCache(cache_size)
+        self.chunked_min_size = chunked_min_size
+        self.reservations = reservations
+        self.inline_max_size = inline_max_size
+        self._reserved: "OrderedDict[str, Tuple[Tuple[str, int, int], Future]]" = OrderedDict()
+
+    def start(self, executor: Optional[Executor] = None) -> None:
+        with self._lock:
+            if self._executor is None:
+                self._executor = executor or ProcessPoolExecutor(max_workers=self.workers)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self._reserved.clear()
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def warm(self, difficulty: str, size: int, level: int = 1) -> None:
+        """Start filling the stock for (difficulty, size, level) up to the high watermark."""
+        self._refill((difficulty, size, level))
+
+    def reserve(self, owner: str, difficulty: str, size: int, level: int = 1) -> bool:
+        """Start generating a layout in the background for `owner`'s next acquire.
+
+        Returns False when there is nothing to do: the pool is not started, the
+        size is chunked (built instantly anyway) or `owner` already holds one.
+        """
+        if size >= self.chunked_min_size:
+            return False
+        key = (difficulty, size, level)
+        with self._lock:
+            if self._executor is None or owner in self._reserved:
+                return False
+            executor = self._executor
+        try:
+            future = executor.submit(build_layout, size, difficulty, None, level)
+        except RuntimeError:
+            return False
+        with self._lock:
+            self._reserved[owner] = (key, future)
+            while len(self._reserved) > self.reservations:
+                _, (_, dropped) = self._reserved.popitem(last=False)
+                dropped.cancel()
+        return True
+
+    def acquire(self, difficulty: str, size: int, seed: Optional[int] = None, level: int = 1, owner: Optional[str] = None) -> MazeLayout:
+        if size >= self.chunked_min_size:
+            return build_chunked_layout(size, difficulty, seed)
+        if seed is not None:
+            return self.seeded.get(size, difficulty, seed, level)
+        key = (difficulty, size, level)
+        if owner is not None:
+            layout = self._take_reserved(owner, key)
+            if layout is not None:
+                return layout
+        with self._lock:
+            stock = self._stock.get(key)
+            layout = stock.popleft() if stock else None
+        self._refill(key)
+        if layout is None:
+            layout = build_layout(size, difficulty, level=level)
+            GENERATE_SECONDS.observe(layout.generate_seconds, str(size), difficulty)
+        return layout
+
+    def ready(self, difficulty: str, size: int, seed: Optional[int] = None, level: int = 1, owner: Optional[str] = None) -> bool:
+        """Whether acquire would return without generating a sizeable maze or waiting for one."""
+        if size < self.inline_max_size or size >= self.chunked_min_size:
+            return True
+        if seed is not None:
+            return self.seeded.cached(size, difficulty, seed, level)
+        key = (difficulty, size, level)
+        with self._lock:
+            entry = self._reserved.get(owner) if owner is not None else None
+            if entry is not None and entry[0] == key:
+                return entry[1].done()
+            return bool(self._stock.get(key))
+
+    def available(self, difficulty: str, size: int, level: int = 1) -> int:
+        with self._lock:
+            return len(self._stock.get((difficulty, size, level), ()))
+
+    def reserved(self) -> int:
+        with self._lock:
+            return len(self._reserved)
+
+    def _take_reserved(self, owner: str, key: Tuple[str, int, int]) -> Optional[MazeLayout]:
+        with self._lock:
+            entry = self._reserved.pop(owner, None)
+        if entry is None or entry[0] != key:
+            # asked for something else than was reserved (a different difficulty or size)
+            NEXT_LEVEL.inc("miss")
+            if entry is not None:
+                entry[1].cancel()
+            return None
+        future = entry[1]
+        try:
+            # usually done long ago; otherwise waiting is still quicker than starting over
+            layout = future.result()
+        except Exception:
+            NEXT_LEVEL.inc("miss")
+            return None
+        NEXT_LEVEL.inc("hit")
+        GENERATE_SECONDS.observe(layout.generate_seconds, str(key[1]), key[0])
+        return layout
+
+    def _refill(self, key: Tuple[str, int, int]) -> None:
+        with self._lock:
+            if self._executor is None:
+                return
+            stock = self._stock.setdefault(key, deque())
+            pending = self._pending.get(key, 0)
+            if len(stock) + pending >= self.low_watermark:
+                return
+            missing = self.high_watermark - len(stock) - pending
+            self._pending[key] = pending + missing
+            executor = self._executor
+        for _ in range(missing):
+            try:
+                future = executor.submit(build_layout, key[1], key[0], None, key[2])
+            except RuntimeError:
+                # executor shut down underneath us; acquire() falls back to sync generation
+                self._done(key, None)
+                continue
+            future.add_done_callback(lambda f, key=key: self._done(key, f))
+
+    def _done(self, key: Tuple[str, int, int], future) -> None:
+        layout = None
+        if future is not None and not future.cancelled() and future.exception() is None:
+            layout = future.result()
+            GENERATE_SECONDS.observe(layout.generate_seconds, str(key[1]), key[0])
+        with self._lock:
+            self._pending[key] = max(0, self._pending.get(key, 0) - 1)
+            if layout is not None and len(self._stock.setdefault(key, deque())) < self.high_watermark:
+                self._stock[key].append(layout)
+
+
+MAZE_POOL = MazePool(
+    low_watermark=int(os.environ.get("MINDMAZE_POOL_LOW", "2")),
+    high_watermark=int(os.environ.get("MINDMAZE_POOL_HIGH", "8")),
+    workers=int(os.environ["MINDMAZE_POOL_WORKERS"]) if os.environ.get("MINDMAZE_POOL_WORKERS") else None,
+    cache_size=int(os.environ.get("MINDMAZE_LAYOUT_CACHE", "256")),
+    chunked_min_size=int(os.environ.get("MINDMAZE_CHUNKED_MIN_SIZE", "257")),
+    reservations=int(os.environ.get("MINDMAZE_NEXT_LEVEL_RESERVATIONS", "256")),
+    inline_max_size=int(os.environ.get("MINDMAZE_POOL_INLINE_MAX_SIZE", "32")),
+)
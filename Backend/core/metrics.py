@@ -0,0 +1,178 @@
+# in-process metrics, exposed in Prometheus text format on /metrics
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# seconds; request latencies and game-engine timings
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+GENERATE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_METRICS: List["_Metric"] = []
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        # held only for the few instructions of an update
+        self._lock = threading.Lock()
+        _METRICS.append(self)
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.kind}"
+        yield from self._samples()
+
+    @abstractmethod
+    def _samples(self) -> Iterable[str]:
+        ...
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def _samples(self) -> Iterable[str]:
+        for labels, value in sorted(self._values.items()):
+            yield f"{self.name}{_labels(self.label_names, labels)} {value}"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+        # per label set: [count per bucket (+Inf last)..., sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(labels)
+            if row is None:
+                row = self._values[labels] = [0] * (len(self.buckets) + 2)
+            row[i] += 1
+            row[-1] += value
+
+    def count(self, *labels: str) -> int:
+        row = self._values.get(labels)
+        return sum(row[:-1]) if row else 0
+
+    def _samples(self) -> Iterable[str]:
+        for labels, row in sorted(self._values.items()):
+            with self._lock:
+                row = list(row)
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), row):
+                cumulative += n
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                yield f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.label_names, labels)} {row[-1]}"
+            yield f"{self.name}_count{_labels(self.label_names, labels)} {cumulative}"
+
+
+class Gauge(_Metric):
+    # read from `fn` at scrape time, so there is nothing to update on the hot path
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, fn: Callable[[], float]):
+        super().__init__(name, help)
+        self.fn = fn
+
+    def _samples(self) -> Iterable[str]:
+        yield f"{self.name} {self.fn()}"
+
+
+def render() -> str:
+    return "\n".join(line for metric in _METRICS for line in metric.render()) + "\n"
+
+
+HTTP_REQUESTS = Counter("mindmaze_http_requests_total", "HTTP requests by route, method and status.", ("route", "method", "status"))
+HTTP_ERRORS = Counter("mindmaze_http_errors_total", "HTTP requests that failed with a 5xx or an exception.", ("route", "method"))
+HTTP_LATENCY = Histogram("mindmaze_http_request_seconds", "HTTP request latency by route.", ("route", "method"))
+GENERATE_SECONDS = Histogram(
+    "mindmaze_generate_maze_seconds", "Maze layout generation time by size and difficulty.",
+    ("size", "difficulty"), buckets=GENERATE_BUCKETS,
+)
+LAYOUT_CACHE = Counter("mindmaze_layout_cache_total", "Seeded layout lookups by result (hit/miss).", ("result",))
+NEXT_LEVEL = Counter("mindmaze_next_level_layouts_total", "Starts that asked for a reserved next-level layout, by result (hit/miss).", ("result",))
+SERIALIZE_SECONDS = Histogram("mindmaze_serialize_state_seconds", "Time spent in serialize_state.", ("kind",))
+GAMES_STARTED = Counter("mindmaze_games_started_total", "Games created by difficulty.", ("difficulty",))
+GAMES_FINISHED = Counter("mindmaze_games_finished_total", "Finished games by difficulty and outcome.", ("difficulty", "outcome"))
+
+
+def mark_outcome(state) -> Optional[Tuple[str, str]]:
+    """Flag a newly finished game and return its (difficulty, outcome) labels.
+
+    The caller counts them with GAMES_FINISHED.inc once the state is saved, so a
+    retried update does not count the same game twice.
+    """
+    if not state.is_game_over or state.outcome_recorded:
+        return None
+    state.outcome_recorded = True
+    difficulty = getattr(state.difficulty, "value", state.difficulty)
+    return difficulty, "victory" if state.is_victory else "game_over"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, request and error counts per route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            status = 500
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            # the router stores the matched route in the scope; label by its template
+            # so /game/state/<id> does not create one series per game
+            route = getattr(scope.get("route"), "path", "unmatched")
+            method = scope["method"]
+            HTTP_LATENCY.observe(elapsed, route, method)
+            HTTP_REQUESTS.inc(route, method, str(status))
+            if status >= 500:
+                HTTP_ERRORS.inc(route, method)
@@ -0,0 +1,168 @@
+# server-owned game clock: advances every live game at a fixed rate
+import asyncio
+import os
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from core.metrics import GAMES_FINISHED, mark_outcome
+from core.storage import GAMES, SessionBackend, SessionConflict
+from game.actions import apply_tick
+from game.state import GameState
+
+
+class TickScheduler:
+    """Advance all running games in `games` once per `interval` seconds from one asyncio task.
+
+    Games are ticked in batches of `batch_size`, yielding to the event loop between
+    batches so requests keep flowing. When the loop falls behind, missed ticks are
+    replayed up to `max_catch_up` per wake-up and the rest are skipped (and counted),
+    so an overloaded server slows down instead of spiralling.
+    """
+
+    def __init__(
+        self,
+        games: SessionBackend,
+        interval: float = 1.0,
+        batch_size: int = 256,
+        max_catch_up: int = 3,
+    ):
+        self.games = games
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_catch_up = max_catch_up
+        self.ticks = 0
+        self.skipped_ticks = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.last_duration = 0.0
+        self._listeners: Dict[str, Set[Callable[[], None]]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if not self.running:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def subscribe(self, game_id: str, callback: Callable[[], None]) -> None:
+        # callback runs on the event loop after each tick of that game
+        self._listeners.setdefault(game_id, set()).add(callback)
+
+    def unsubscribe(self, game_id: str, callback: Callable[[], None]) -> None:
+        callbacks = self._listeners.get(game_id)
+        if callbacks is not None:
+            callbacks.discard(callback)
+            if not callbacks:
+                del self._listeners[game_id]
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "interval": self.interval,
+            "ticks": self.ticks,
+            "skipped_ticks": self.skipped_ticks,
+            "last_lag": self.last_lag,
+            "max_lag": self.max_lag,
+            "last_duration": self.last_duration,
+        }
+
+    async def _run(self) -> None:
+        # Wake-ups are aligned to wall-clock epochs of `interval` seconds, and each
+        # tick is tagged with its epoch; a game never applies the same epoch twice,
+        # so several workers sharing one session backend advance it only once.
+        offset = self.interval * 0.01
+        last_epoch = int(time.time() // self.interval)
+        while True:
+            target = (last_epoch + 1) * self.interval + offset
+            await asyncio.sleep(max(0.0, target - time.time()))
+            now = time.time()
+            epoch = int((now - offset) // self.interval)
+            if epoch <= last_epoch:
+                # woke up early
+                continue
+            lag = now - target
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+
+            due = epoch - last_epoch
+            run = min(due, self.max_catch_up)
+            self.skipped_ticks += due - run
+            last_epoch = epoch
+
+            started = time.perf_counter()
+            for tick_epoch in range(epoch - run + 1, epoch + 1):
+                await self.tick_all(tick_epoch)
+            self.last_duration = time.perf_counter() - started
+
+    async def tick_all(self, epoch: Optional[int] = None) -> None:
+        if epoch is None:
+            epoch = int(time.time() // self.interval)
+
+        # a blocking backend (SQLite) loads and saves in a worker thread, as
+        # CommandQueue does, so the loop keeps serving requests meanwhile
+        offload = self.games.blocking
+        game_ids = await asyncio.to_thread(self.games.active_ids) if offload else self.games.active_ids()
+        for offset in range(0, len(game_ids), self.batch_size):
+            batch_ids = game_ids[offset:offset + self.batch_size]
+            if offload:
+                await asyncio.to_thread(self._tick_batch, batch_ids, epoch)
+            else:
+                self._tick_batch(batch_ids, epoch)
+            for game_id in batch_ids:
+                for callback in tuple(self._listeners.get(game_id, ())):
+                    callback()
+            # let pending requests run between batches
+            await asyncio.sleep(0)
+        self.ticks += 1
+
+    def _tick_batch(self, batch_ids: List[str], epoch: int) -> None:
+        def due(state: Optional[GameState]) -> bool:
+            return state is not None and not state.is_game_over and state.clock_epoch < epoch
+
+        def advance(state: GameState) -> Optional[Tuple[str, str]]:
+            if not due(state):
+                return None
+            state.clock_epoch = epoch
+            apply_tick(state)
+            return mark_outcome(state)
+
+        # skip without writing when another worker already ticked it
+        states = [state for state in map(self.games.peek, batch_ids) if due(state)]
+        for state in states:
+            state.clock_epoch = epoch
+            apply_tick(state)
+            outcome = mark_outcome(state)
+            try:
+                self.games.save(state, touch=False)
+            except SessionConflict:
+                # changed by a request since the peek: redo this one on fresh state
+                try:
+                    outcome = self.games.update(state.game_id, advance, touch=False)
+                except KeyError:
+                    outcome = None
+            except KeyError:
+                # expired meanwhile
+                outcome = None
+            if outcome:
+                GAMES_FINISHED.inc(*outcome)
+
+
+# MINDMAZE_SERVER_TICKS=0 turns the server clock off and lets clients drive /game/tick again
+SERVER_TICKS = os.environ.get("MINDMAZE_SERVER_TICKS", "1") != "0"
+
+SCHEDULER = TickScheduler(
+    GAMES,
+    interval=float(os.environ.get("MINDMAZE_TICK_INTERVAL", "1.0")),
+    batch_size=int(os.environ.get("MINDMAZE_TICK_BATCH", "256")),
+)
@@ -0,0 +1,200 @@
+# SQLite (WAL) session backend shared by several uvicorn workers
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from typing import Iterator, List, Optional
+
+from core.storage import SessionBackend, SessionConflict, SessionGone, SessionNotFound
+from game.state import GameState
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id TEXT PRIMARY KEY,
+    rev INTEGER NOT NULL,
+    finished INTEGER NOT NULL,
+    last_seen REAL NOT NULL,
+    data BLOB NOT NULL,
+    owner TEXT
+);
+CREATE INDEX IF NOT EXISTS games_last_seen ON games (last_seen);
+CREATE INDEX IF NOT EXISTS games_finished ON games (finished);
+CREATE TABLE IF NOT EXISTS gone (
+    id TEXT PRIMARY KEY,
+    reason TEXT NOT NULL,
+    at REAL NOT NULL
+);
+"""
+
+
+def encode_state(state: GameState) -> bytes:
+    # pickled and lightly compressed: mazes are mostly repeated small ints
+    return zlib.compress(pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL), 1)
+
+
+def decode_state(data: bytes) -> GameState:
+    # only ever reads blobs this backend wrote itself
+    return pickle.loads(zlib.decompress(data))
+
+
+class SqliteSessionStore(SessionBackend):
+    """Sessions in one SQLite database in WAL mode, shared by every worker process.
+
+    Each row carries a revision; `save` only succeeds if the row still has the
+    revision the state was loaded with, so concurrent workers never overwrite
+    each other's updates (the loser gets SessionConflict and `update` retries).
+    Expiry uses wall-clock `last_seen`, refreshed whenever a player action is saved.
+
+    Every game is owned by one worker: the one that created it or last saved a
+    player action for it. Only the owner's tick scheduler advances the game, so
+    a tick reads each running game once, not once per worker.
+    """
+
+    blocking = True
+
+    def __init__(
+        self,
+        path: str,
+        idle_ttl: float = 1800.0,
+        finished_ttl: float = 300.0,
+        max_sessions: int = 10000,
+        clock=time.time,
+    ):
+        self.path = path
+        self.idle_ttl = idle_ttl
+        self.finished_ttl = finished_ttl
+        self.max_sessions = max_sessions
+        self._clock = clock
+        self._local = threading.local()
+        # this store's id in the owner column
+        self.worker = uuid.uuid4().hex
+        self.created = 0
+        self.evicted = 0
+        self.expired = 0
+        conn = self._conn()
+        conn.executescript(_SCHEMA)
+        if "owner" not in {row[1] for row in conn.execute("PRAGMA table_info(games)")}:
+            # a database from before games had owners
+            conn.execute("ALTER TABLE games ADD COLUMN owner TEXT")
+        conn.execute("CREATE INDEX IF NOT EXISTS games_owner ON games (owner, finished)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _load(self, game_id: str) -> Optional[GameState]:
+        row = self._conn().execute("SELECT rev, data FROM games WHERE id = ?", (game_id,)).fetchone()
+        if row is None:
+            return None
+        state = decode_state(row[1])
+        state.revision = row[0]
+        return state
+
+    def __getitem__(self, game_id: str) -> GameState:
+        state = self._load(game_id)
+        if state is None:
+            row = self._conn().execute("SELECT reason FROM gone WHERE id = ?", (game_id,)).fetchone()
+            if row is not None:
+                raise SessionGone(game_id, row[0])
+            raise SessionNotFound(game_id)
+        return state
+
+    def peek(self, game_id: str) -> Optional[GameState]:
+        return self._load(game_id)
+
+    def __setitem__(self, game_id: str, state: GameState) -> None:
+        conn = self._conn()
+        state.revision = 0
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT OR REPLACE INTO games (id, rev, finished, last_seen, data, owner) VALUES (?, 0, ?, ?, ?, ?)",
+                (game_id, int(state.is_game_over), self._clock(), encode_state(state), self.worker),
+            )
+            conn.execute("DELETE FROM gone WHERE id = ?", (game_id,))
+            over = conn.execute("SELECT COUNT(*) FROM games").fetchone()[0] - self.max_sessions
+            if over > 0:
+                # least recently active sessions go first
+                victims = [r[0] for r in conn.execute("SELECT id FROM games ORDER BY last_seen LIMIT ?", (over,))]
+                self._drop(conn, victims, "evicted")
+                self.evicted += len(victims)
+        self.created += 1
+
+    def save(self, state: GameState, touch: bool = True) -> None:
+        data = encode_state(state)
+        conn = self._conn()
+        if touch:
+            cur = conn.execute(
+                "UPDATE games SET rev = rev + 1, finished = ?, last_seen = ?, data = ?, owner = ? WHERE id = ? AND rev = ?",
+                (int(state.is_game_over), self._clock(), data, self.worker, state.game_id, state.revision),
+            )
+        else:
+            cur = conn.execute(
+                "UPDATE games SET rev = rev + 1, finished = ?, data = ? WHERE id = ? AND rev = ?",
+                (int(state.is_game_over), data, state.game_id, state.revision),
+            )
+        if cur.rowcount == 0:
+            if _exists(conn, state.game_id):
+                raise SessionConflict(state.game_id)
+            raise SessionNotFound(state.game_id)
+        state.revision += 1
+
+    def __delitem__(self, game_id: str) -> None:
+        cur = self._conn().execute("DELETE FROM games WHERE id = ?", (game_id,))
+        if cur.rowcount == 0:
+            raise SessionNotFound(game_id)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter([r[0] for r in self._conn().execute("SELECT id FROM games")])
+
+    def __len__(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM games").fetchone()[0]
+
+    def __contains__(self, game_id: object) -> bool:
+        return _exists(self._conn(), game_id)
+
+    def active_ids(self) -> List[str]:
+        return [r[0] for r in self._conn().execute("SELECT id FROM games WHERE owner = ? AND finished = 0", (self.worker,))]
+
+    def sweep(self) -> int:
+        now = self._clock()
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            victims = [
+                r[0]
+                for r in conn.execute(
+                    "SELECT id FROM games WHERE (finished = 0 AND last_seen <= ?) OR (finished = 1 AND last_seen <= ?)",
+                    (now - self.idle_ttl, now - self.finished_ttl),
+                )
+            ]
+            self._drop(conn, victims, "expired")
+            # forget tombstones after a day
+            conn.execute("DELETE FROM gone WHERE at < ?", (now - 86400,))
+        self.expired += len(victims)
+        return len(victims)
+
+    def stats(self) -> dict:
+        # created/evicted/expired are counted per worker process
+        return {
+            "live": len(self),
+            "created": self.created,
+            "evicted": self.evicted,
+            "expired": self.expired,
+        }
+
+    def _drop(self, conn: sqlite3.Connection, game_ids: List[str], reason: str) -> None:
+        now = self._clock()
+        conn.executemany("DELETE FROM games WHERE id = ?", [(g,) for g in game_ids])
+        conn.executemany("INSERT OR REPLACE INTO gone (id, reason, at) VALUES (?, ?, ?)", [(g, reason, now) for g in game_ids])
+
+
+def _exists(conn: sqlite3.Connection, game_id) -> bool:
+    return conn.execute("SELECT 1 FROM games WHERE id = ?", (game_id,)).fetchone() is not None
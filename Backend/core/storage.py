@@ -1,4 +1,276 @@
-from typing import Dict
+import asyncio
+import os
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, List, MutableMapping, Optional
+
 from game.state import GameState
 
-GAMES: Dict[str, GameState] = {}
+
+class SessionNotFound(KeyError):
+    """No session with this id (never existed, or forgotten long ago)."""
+
+
+class SessionGone(SessionNotFound):
+    """The session existed but was evicted or expired."""
+
+    def __init__(self, game_id: str, reason: str):
+        super().__init__(game_id)
+        self.game_id = game_id
+        self.reason = reason
+
+
+class SessionConflict(Exception):
+    """The session was saved by someone else since it was loaded; reload and retry."""
+
+
+class SessionBackend(MutableMapping[str, GameState], ABC):
+    """Storage interface behind create_game/get_game.
+
+    `store[game_id] = state` creates a session and `store[game_id]` loads it,
+    counting as player activity. Changes are persisted with `save`, which raises
+    SessionConflict when the stored revision moved on since the load (another
+    worker won the race); `update` wraps load -> change -> save with retries.
+    A backend missing any of the abstract methods cannot be instantiated.
+    """
+
+    # loads and saves do I/O, so async callers run them off the event loop
+    blocking = False
+
+    @abstractmethod
+    def peek(self, game_id: str) -> Optional[GameState]:
+        # load without counting as player activity
+        ...
+
+    @abstractmethod
+    def save(self, state: GameState, touch: bool = True) -> None:
+        ...
+
+    @abstractmethod
+    def active_ids(self) -> List[str]:
+        # ids of the running games this worker's tick scheduler advances
+        ...
+
+    @abstractmethod
+    def sweep(self) -> int:
+        ...
+
+    async def run_sweeper(self, interval: float = 30.0) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            await asyncio.to_thread(self.sweep)
+
+    @abstractmethod
+    def stats(self) -> dict:
+        ...
+
+    def update(self, game_id: str, fn: Callable[[GameState], Any], touch: bool = True, retries: int = 8) -> Any:
+        """Apply fn to the session and persist it; returns fn's result."""
+        for _ in range(retries):
+            state = self[game_id] if touch else self.peek(game_id)
+            if state is None:
+                raise SessionNotFound(game_id)
+            result = fn(state)
+            try:
+                self.save(state, touch=touch)
+            except SessionConflict:
+                continue
+            return result
+        raise SessionConflict(game_id)
+
+
+def estimate_session_bytes(state: GameState) -> int:
+    # rough footprint, dominated by the maze; computed once per session
+    maze = state.maze
+    size = sys.getsizeof(maze)
+    if isinstance(maze, list):
+        size += sum(sys.getsizeof(row) for row in maze)
+    return size + 2048
+
+
+class SessionStore(SessionBackend):
+    """In-memory game sessions with idle expiry and LRU eviction (the default backend).
+
+    Reading a session (`store[game_id]`) counts as activity and moves it to the
+    most-recently-used end. Sessions idle for longer than `idle_ttl` seconds
+    (or `finished_ttl` once the game is over) are dropped by `sweep()`, and
+    inserting beyond `max_sessions` / `max_bytes` evicts the least recently
+    used sessions. Ids of dropped sessions are remembered for a while so lookups
+    can tell "gone" from "never existed".
+    """
+
+    def __init__(
+        self,
+        idle_ttl: float = 1800.0,
+        finished_ttl: float = 300.0,
+        max_sessions: int = 10000,
+        max_bytes: Optional[int] = None,
+        clock=time.monotonic,
+    ):
+        self.idle_ttl = idle_ttl
+        self.finished_ttl = finished_ttl
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._data: "OrderedDict[str, GameState]" = OrderedDict()
+        self._last_seen: Dict[str, float] = {}
+        self._sizes: Dict[str, int] = {}
+        self._bytes = 0
+        self._gone: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.created = 0
+        self.evicted = 0
+        self.expired = 0
+
+    def __getitem__(self, game_id: str) -> GameState:
+        with self._lock:
+            try:
+                state = self._data[game_id]
+            except KeyError:
+                reason = self._gone.get(game_id)
+                if reason is not None:
+                    raise SessionGone(game_id, reason) from None
+                raise SessionNotFound(game_id) from None
+            self._data.move_to_end(game_id)
+            self._last_seen[game_id] = self._clock()
+            return state
+
+    def peek(self, game_id: str) -> Optional[GameState]:
+        # lookup that does not count as activity (used by the tick scheduler);
+        # locked, as the sweeper and evictions change the dict from other threads
+        with self._lock:
+            return self._data.get(game_id)
+
+    def save(self, state: GameState, touch: bool = True) -> None:
+        # sessions are live objects here: changes are already in place
+        pass
+
+    def active_ids(self) -> List[str]:
+        with self._lock:
+            return [game_id for game_id, state in self._data.items() if not state.is_game_over]
+
+    def __setitem__(self, game_id: str, state: GameState) -> None:
+        size = estimate_session_bytes(state)
+        with self._lock:
+            if game_id in self._data:
+                self._bytes -= self._sizes[game_id]
+            else:
+                self.created += 1
+            self._data[game_id] = state
+            self._data.move_to_end(game_id)
+            self._last_seen[game_id] = self._clock()
+            self._sizes[game_id] = size
+            self._bytes += size
+            self._gone.pop(game_id, None)
+            self._enforce_limits()
+
+    def __delitem__(self, game_id: str) -> None:
+        with self._lock:
+            del self._data[game_id]
+            self._forget(game_id)
+
+    def __iter__(self) -> Iterator[str]:
+        # iterate over a snapshot so callers may mutate the store meanwhile
+        with self._lock:
+            return iter(list(self._data))
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, game_id: object) -> bool:
+        return game_id in self._data
+
+    def sweep(self) -> int:
+        """Expire idle sessions now; returns how many were removed."""
+        return self._expire(self._idle_candidates())
+
+    async def run_sweeper(self, interval: float = 30.0, chunk: int = 500) -> None:
+        # expire in chunks so a large sweep never holds the lock (or the loop) for long
+        while True:
+            await asyncio.sleep(interval)
+            candidates = self._idle_candidates()
+            for offset in range(0, len(candidates), chunk):
+                self._expire(candidates[offset:offset + chunk])
+                await asyncio.sleep(0)
+
+    def _idle_candidates(self) -> list:
+        # sessions are kept least recently used first, so stop at the first one
+        # that is fresh for both TTLs: everything after it was used more recently
+        cutoff = self._clock() - min(self.idle_ttl, self.finished_ttl)
+        candidates = []
+        with self._lock:
+            for game_id in self._data:
+                if self._last_seen[game_id] > cutoff:
+                    break
+                candidates.append(game_id)
+        return candidates
+
+    def _expire(self, game_ids) -> int:
+        now = self._clock()
+        removed = 0
+        with self._lock:
+            for game_id in game_ids:
+                state = self._data.get(game_id)
+                if state is None:
+                    continue
+                ttl = self.finished_ttl if state.is_game_over else self.idle_ttl
+                if now - self._last_seen[game_id] >= ttl:
+                    self._drop(game_id, "expired")
+                    self.expired += 1
+                    removed += 1
+        return removed
+
+    def stats(self) -> dict:
+        return {
+            "live": len(self._data),
+            "bytes": self._bytes,
+            "created": self.created,
+            "evicted": self.evicted,
+            "expired": self.expired,
+        }
+
+    def _enforce_limits(self) -> None:
+        while self._data and (
+            len(self._data) > self.max_sessions
+            or (self.max_bytes is not None and self._bytes > self.max_bytes and len(self._data) > 1)
+        ):
+            game_id = next(iter(self._data))
+            self._drop(game_id, "evicted")
+            self.evicted += 1
+
+    def _drop(self, game_id: str, reason: str) -> None:
+        del self._data[game_id]
+        self._forget(game_id)
+        self._gone[game_id] = reason
+        # remember roughly as many dropped ids as live sessions
+        while len(self._gone) > max(1000, self.max_sessions):
+            self._gone.popitem(last=False)
+
+    def _forget(self, game_id: str) -> None:
+        self._last_seen.pop(game_id, None)
+        self._bytes -= self._sizes.pop(game_id, 0)
+
+
+def _backend_from_env() -> SessionBackend:
+    # MINDMAZE_SESSION_BACKEND=sqlite:/path/to/sessions.db shares sessions between
+    # uvicorn workers; the default keeps them in this process
+    backend = os.environ.get("MINDMAZE_SESSION_BACKEND", "memory")
+    limits = dict(
+        idle_ttl=float(os.environ.get("MINDMAZE_SESSION_TTL", "1800")),
+        finished_ttl=float(os.environ.get("MINDMAZE_FINISHED_TTL", "300")),
+        max_sessions=int(os.environ.get("MINDMAZE_MAX_SESSIONS", "10000")),
+    )
+    if backend.startswith("sqlite:"):
+        from core.sqlite_storage import SqliteSessionStore
+
+        return SqliteSessionStore(backend[len("sqlite:"):], **limits)
+    if backend != "memory":
+        raise ValueError(f"unknown MINDMAZE_SESSION_BACKEND: {backend}")
+    max_bytes = os.environ.get("MINDMAZE_MAX_SESSION_BYTES")
+    return SessionStore(max_bytes=int(max_bytes) if max_bytes else None, **limits)
+
+
+GAMES: SessionBackend = _backend_from_env()
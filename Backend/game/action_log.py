@@ -0,0 +1,168 @@
+# compact append-only record of how a game was played (see game.replay)
+import struct
+import zlib
+from typing import Tuple
+
+from game.chunks import ChunkedGrid
+from game.grid import Grid
+from game.landmarks import EXIT, KEY, START, build_landmarks
+from game.state import Difficulty, Enemy, GameState, Player
+
+# log = header (the game as created) followed by one record per action, each
+# an opcode byte plus operands; a unit move, by far the most common, is one byte
+MAGIC = b"MZL2"
+
+MOVE_RIGHT, MOVE_LEFT, MOVE_DOWN, MOVE_UP = 0, 1, 2, 3
+MOVE = 4            # + dx, dy as int32
+ITEM = 5            # + id length (one byte) and the utf-8 id
+PUZZLE_WRONG = 6
+PUZZLE_RIGHT = 7
+TICK = 8
+
+UNIT_MOVES = ((1, 0), (-1, 0), (0, 1), (0, -1))
+_UNIT_OPS = {delta: op for op, delta in enumerate(UNIT_MOVES)}
+MOVE_ARGS = struct.Struct("<ii")
+_INT32 = 2 ** 31
+
+DIFFICULTIES = tuple(Difficulty)
+PATTERNS = ("patrol", "chase", "ambush")
+
+# magic, difficulty, level, seed (-1 = unseeded), time_left, lives, keys_required,
+# keys_collected, darkness, map_preview_time, score, time/energy limits, player
+# x/y/health/energy/lives, maze width/height, compressed maze length (0 = chunked
+# maze), enemy count, inventory size
+_HEADER = struct.Struct("<4sBiqiiiiBiiiiiiiiiiiIHH")
+# chunked mazes are stored as their seed plus the cells written over it
+_CHUNKED = struct.Struct("<qI")
+_OVERRIDE = struct.Struct("<iiB")
+# x, y, pattern, dx, dy, alive
+_ENEMY = struct.Struct("<iiBbbB")
+_USES = struct.Struct("<i")
+
+
+def record_move(state: GameState, dx: int, dy: int) -> None:
+    op = _UNIT_OPS.get((dx, dy))
+    if op is not None:
+        state.action_log.append(op)
+        return
+    # anything past int32 is off every maze either way
+    dx = max(-_INT32, min(dx, _INT32 - 1))
+    dy = max(-_INT32, min(dy, _INT32 - 1))
+    state.action_log.append(MOVE)
+    state.action_log += MOVE_ARGS.pack(dx, dy)
+
+
+def record_item(state: GameState, item_id: str) -> None:
+    # inventory ids are short names; a longer one is cut, and is just as unknown
+    raw = item_id.encode()[:255]
+    state.action_log.append(ITEM)
+    state.action_log.append(len(raw))
+    state.action_log += raw
+
+
+def record_puzzle(state: GameState, correct: bool) -> None:
+    state.action_log.append(PUZZLE_RIGHT if correct else PUZZLE_WRONG)
+
+
+def record_tick(state: GameState) -> None:
+    state.action_log.append(TICK)
+
+
+def start_log(state: GameState) -> None:
+    """Start the log of a newly created game with everything needed to rebuild it."""
+    player = state.player
+    maze = state.maze
+    if isinstance(maze, ChunkedGrid):
+        cells = b""
+    else:
+        maze = maze if isinstance(maze, Grid) else Grid.from_rows(maze)
+        cells = zlib.compress(bytes(maze.cells))
+    out = bytearray(_HEADER.pack(
+        MAGIC, DIFFICULTIES.index(Difficulty(state.difficulty)), state.level,
+        -1 if state.seed is None else state.seed,
+        state.time_left, state.lives, state.keys_required, state.keys_collected,
+        state.darkness, state.map_preview_time, state.score, state.time_limit, state.energy_limit,
+        player.x, player.y, player.health, player.energy, player.lives,
+        maze.width, maze.height, len(cells), len(state.enemies), len(state.inventory),
+    ))
+    if isinstance(maze, ChunkedGrid):
+        out += _CHUNKED.pack(maze.seed, len(maze.overrides))
+        for (x, y), value in maze.overrides.items():
+            out += _OVERRIDE.pack(x, y, value)
+    out += cells
+    for e in state.enemies:
+        out += _ENEMY.pack(e.x, e.y, PATTERNS.index(e.pattern), e.dx, e.dy, e.alive)
+    for item_id, uses in state.inventory.items():
+        raw = item_id.encode()[:255]
+        out.append(len(raw))
+        out += raw + _USES.pack(uses)
+    state.action_log = out
+
+
+def read_header(log, game_id: str = "replay") -> Tuple[GameState, int]:
+    """The game as it was created, and the offset of the first action record."""
+    if bytes(log[:4]) != MAGIC:
+        raise ValueError("not a game action log")
+    (_, difficulty, level, seed, time_left, lives, keys_required, keys_collected,
+     darkness, map_preview_time, score, time_limit, energy_limit, px, py, health, energy, player_lives,
+     width, height, packed, enemy_count, item_count) = _HEADER.unpack_from(log, 0)
+    i = _HEADER.size
+    if packed:
+        maze = Grid(width, height, zlib.decompress(log[i:i + packed]))
+        i += packed
+    else:
+        maze_seed, count = _CHUNKED.unpack_from(log, i)
+        i += _CHUNKED.size
+        overrides = {}
+        for _ in range(count):
+            x, y, value = _OVERRIDE.unpack_from(log, i)
+            i += _OVERRIDE.size
+            overrides[(x, y)] = value
+        maze = ChunkedGrid(width, height, maze_seed, DIFFICULTIES[difficulty].value, overrides)
+
+    enemies = []
+    for n in range(enemy_count):
+        x, y, pattern, dx, dy, alive = _ENEMY.unpack_from(log, i)
+        i += _ENEMY.size
+        enemies.append(Enemy(id=f"e{n}", x=x, y=y, pattern=PATTERNS[pattern], dx=dx, dy=dy, alive=bool(alive)))
+
+    inventory = {}
+    for _ in range(item_count):
+        length = log[i]
+        item_id = bytes(log[i + 1:i + 1 + length]).decode()
+        i += 1 + length
+        inventory[item_id], = _USES.unpack_from(log, i)
+        i += _USES.size
+
+    w = maze.width
+    traps = [(j % w, j // w) for j, cell in enumerate(maze.cells) if cell == 4] if packed else []
+    landmarks = None
+    if not packed:
+        # a chunked maze cannot be scanned; its landmarks are among the overrides
+        marks = {value: pos for pos, value in overrides.items()}
+        keys = [pos for pos, value in overrides.items() if value == KEY]
+        landmarks = build_landmarks(maze, start=marks.get(START), exit=marks.get(EXIT), keys=keys, traps=())
+    state = GameState(
+        game_id=game_id,
+        difficulty=DIFFICULTIES[difficulty],
+        player=Player(x=px, y=py, health=health, energy=energy, lives=player_lives),
+        enemies=enemies,
+        maze=maze,
+        time_left=time_left,
+        score=score,
+        inventory=inventory,
+        level=level,
+        lives=lives,
+        keys_required=keys_required,
+        keys_collected=keys_collected,
+        traps=traps,
+        darkness=bool(darkness),
+        map_preview_time=map_preview_time,
+        seed=None if seed < 0 else seed,
+        time_limit=time_limit,
+        energy_limit=energy_limit,
+        landmarks=landmarks,
+    )
+    # the replayed game records its own log again, starting from the same header
+    state.action_log = bytearray(log[:i])
+    return state, i
@@ -1,11 +1,17 @@
+import logging
+from game.grid import Grid
 from game.state import GameState, Player, Difficulty
+from game.action_log import record_item, record_move, record_puzzle, record_tick
 from game.rules import can_player_move, can_use_item
 from game.maze import can_move
 from game.enemies import move_enemies
+from game.events import emit
 from game.victory import check_victory
 from game.items import use_item
+from game.landmarks import set_cell
 from game.puzzle import solve_puzzle
 from game.timer import tick
+from game.visibility import reveal
 
 
 def _damage_player_on_collision(state: GameState):
@@ -13,17 +19,18 @@ def _damage_player_on_collision(state: GameState):
     # On MEDIUM (normal) difficulty, reduce player's health instead of removing a life
     if state.difficulty == Difficulty.MEDIUM:
         state.player.health -= 10
-        print(f"[DAMAGE] Collision in MEDIUM: game={getattr(state,'game_id',None)} health={state.player.health}")
     else:
         # For other difficulties keep existing behavior (reduce health)
         state.player.health -= 10
-        print(f"[DAMAGE] Collision in non-MEDIUM: game={getattr(state,'game_id',None)} health={state.player.health}")
+    emit(logging.DEBUG, "wall_hit", state, health=state.player.health)
     if state.lives <= 0 or state.player.lives <= 0 or state.player.health <= 0:
-        print(f"[GAME_OVER] Collision caused game over: game={getattr(state,'game_id',None)} lives={state.lives} player.lives={state.player.lives} health={state.player.health}")
+        emit(logging.INFO, "game_over", state, cause="wall_hit", lives=state.lives, player_lives=state.player.lives, health=state.player.health)
         state.is_game_over = True
 
 
 def move_player(state: GameState, dx: int, dy: int) -> GameState:
+    # every action is logged before it runs, so game.replay can make the same calls
+    record_move(state, dx, dy)
     if not can_player_move(state):
         return state
 
@@ -31,11 +38,13 @@ def move_player(state: GameState, dx: int, dy: int) -> GameState:
     ny = state.player.y + dy
 
     # Out of bounds or wall
-    size = len(state.maze)
+    maze = state.maze
+    size = len(maze)
     if nx < 0 or ny < 0 or nx >= size or ny >= size:
         return state
 
-    cell = state.maze[ny][nx]
+    # read a Grid's cell directly rather than through a row view
+    cell = maze.cells[ny * maze.width + nx] if isinstance(maze, Grid) else maze[ny][nx]
 
     if cell == 1:
         # hit wall
@@ -47,6 +56,8 @@ def move_player(state: GameState, dx: int, dy: int) -> GameState:
     state.player.x = nx
     state.player.y = ny
     state.player.energy = max(0, state.player.energy - 1)
+    # darkness: the view follows the player one step at a time
+    reveal(state)
 
     # Check traps
     if cell == 4:
@@ -59,24 +70,28 @@ def move_player(state: GameState, dx: int, dy: int) -> GameState:
     # Check key
     if cell == 5:
         state.keys_collected = (state.keys_collected or 0) + 1
-        # remove key from maze
-        state.maze[ny][nx] = 0
+        # remove key from maze (and from the landmark index)
+        set_cell(state, nx, ny, 0)
 
-    move_enemies(state)
+    # chasers only close in on ticks: on every move they would be as fast as the player
+    move_enemies(state, chasers=False)
     check_victory(state)
     return state
 
 
 def apply_item(state: GameState, item_id: str) -> GameState:
+    record_item(state, item_id)
     return use_item(state, item_id)
 
 
 def apply_puzzle_result(state: GameState, correct: bool) -> GameState:
+    record_puzzle(state, correct)
     return solve_puzzle(state, correct)
 
 
 def apply_tick(state: GameState) -> GameState:
     # on each tick, advance enemies then timer
+    record_tick(state)
     try:
         move_enemies(state)
     except Exception:
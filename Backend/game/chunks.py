@@ -0,0 +1,187 @@
+# huge mazes stored and generated lazily in fixed-size chunks
+import random
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+from game.maze import _carve, _pick_openings
+
+# chunk edge in cells; even, so chunk origins keep the odd-cell lattice of generate_maze
+CHUNK_SIZE = 32
+# generated chunks kept per maze; the rest are dropped and regenerated when needed
+RESIDENT_CHUNKS = 16
+# cells around the player whose chunks are sent with each snapshot
+VIEW_RADIUS = 12
+
+# trap probability and extra-opening factor by difficulty, as in generate_maze
+_TRAPS = {"easy": 0.03, "medium": 0.06}
+_OPENINGS = {"easy": 0.08, "medium": 0.04}
+
+
+class _Row:
+    # maze[y] of a ChunkedGrid, so maze[y][x] reads and writes work as on a Grid
+    __slots__ = ("maze", "y")
+
+    def __init__(self, maze: "ChunkedGrid", y: int):
+        self.maze = maze
+        self.y = y
+
+    def __getitem__(self, x: int) -> int:
+        return self.maze.get(x, self.y)
+
+    def __setitem__(self, x: int, value: int) -> None:
+        self.maze.set(x, self.y, value)
+
+    def __len__(self) -> int:
+        return self.maze.width
+
+
+class ChunkedGrid:
+    """A maze of any size whose cells are generated a CHUNK_SIZE square at a time.
+
+    Each chunk is a pure function of (seed, chunk x, chunk y): a backtracker maze
+    over its own odd cells, plus openings into its left and upper neighbours, so
+    chunks never need each other and the whole maze stays connected. Only
+    RESIDENT_CHUNKS chunks are held at once; cell writes (start, exit, a taken
+    key) are kept as overrides and reapplied when a chunk is rebuilt. Memory per
+    game therefore follows what is near the player, not the maze area.
+
+    Supports the part of the Grid interface the game rules use: `maze[y][x]`
+    reads and writes, `len(maze)`, `width` and `height`. Whole-maze operations
+    (iterating rows, `to_rows`) are deliberately missing.
+    """
+
+    __slots__ = ("width", "height", "seed", "difficulty", "overrides", "chunks", "paths", "encoded")
+
+    def __init__(self, width: int, height: int, seed: int, difficulty: str = "easy", overrides: Dict[Tuple[int, int], int] = None):
+        self.width = width
+        self.height = height
+        self.seed = seed
+        self.difficulty = difficulty
+        self.overrides = dict(overrides or {})
+        self.chunks: "OrderedDict[Tuple[int, int], bytearray]" = OrderedDict()
+        # unused; present so code that resets Grid caches can treat both alike
+        self.paths = None
+        self.encoded = None
+
+    def __getitem__(self, y: int) -> _Row:
+        if y < 0:
+            y += self.height
+        if not 0 <= y < self.height:
+            raise IndexError("grid row out of range")
+        return _Row(self, y)
+
+    def __len__(self) -> int:
+        return self.height
+
+    def __iter__(self):
+        raise TypeError("a chunked maze is read by chunk, not row by row")
+
+    def __sizeof__(self) -> int:
+        return object.__sizeof__(self) + sum(c.__sizeof__() for c in self.chunks.values()) + self.overrides.__sizeof__()
+
+    def __getstate__(self):
+        # chunks are regenerated from the seed
+        return (self.width, self.height, self.seed, self.difficulty, self.overrides)
+
+    def __setstate__(self, state) -> None:
+        self.width, self.height, self.seed, self.difficulty, self.overrides = state
+        self.chunks = OrderedDict()
+        self.paths = None
+        self.encoded = None
+
+    @property
+    def chunks_across(self) -> Tuple[int, int]:
+        return -(-self.width // CHUNK_SIZE), -(-self.height // CHUNK_SIZE)
+
+    def get(self, x: int, y: int) -> int:
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            raise IndexError("grid cell out of range")
+        return self.chunk(x // CHUNK_SIZE, y // CHUNK_SIZE)[(y % CHUNK_SIZE) * CHUNK_SIZE + x % CHUNK_SIZE]
+
+    def set(self, x: int, y: int, value: int) -> None:
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            raise IndexError("grid cell out of range")
+        self.overrides[(x, y)] = value
+        cells = self.chunks.get((x // CHUNK_SIZE, y // CHUNK_SIZE))
+        if cells is not None:
+            cells[(y % CHUNK_SIZE) * CHUNK_SIZE + x % CHUNK_SIZE] = value
+
+    def chunk(self, cx: int, cy: int) -> bytearray:
+        """The CHUNK_SIZE x CHUNK_SIZE cells of one chunk (walls past the maze edge)."""
+        key = (cx, cy)
+        cells = self.chunks.get(key)
+        if cells is not None:
+            self.chunks.move_to_end(key)
+            return cells
+        cells = self.chunks[key] = self._generate(cx, cy)
+        while len(self.chunks) > RESIDENT_CHUNKS:
+            self.chunks.popitem(last=False)
+        return cells
+
+    def chunk_rows(self, cx: int, cy: int) -> List[List[int]]:
+        # the chunk as rows, cut at the maze edge
+        cells = self.chunk(cx, cy)
+        w = min(CHUNK_SIZE, self.width - cx * CHUNK_SIZE)
+        h = min(CHUNK_SIZE, self.height - cy * CHUNK_SIZE)
+        return [list(cells[y * CHUNK_SIZE:y * CHUNK_SIZE + w]) for y in range(h)]
+
+    def _generate(self, cx: int, cy: int) -> bytearray:
+        c = CHUNK_SIZE
+        x0, y0 = cx * c, cy * c
+        cells = bytearray(b"\x01") * (c * c)
+        # odd cells inside the outer wall; the maze edge may cut the chunk short
+        nx = len(range(1, min(c, self.width - 1 - x0), 2))
+        ny = len(range(1, min(c, self.height - 1 - y0), 2))
+        if nx > 0 and ny > 0:
+            rng = random.Random(f"{self.seed}:{cx}:{cy}")
+            # carve the chunk's cells as a small maze of their own, then copy it in
+            # without its right/bottom wall (that is the neighbour's left/top wall)
+            w, h = 2 * nx + 1, 2 * ny + 1
+            sub = bytearray(b"\x01") * (w * h)
+            _carve(sub, w, h, rng)
+            for i in _pick_openings(sub, w, h, max(1, int(sub.count(0) * _OPENINGS.get(self.difficulty, 0.01))), rng):
+                sub[i] = 0
+            trap_prob = _TRAPS.get(self.difficulty, 0.08)
+            rand = rng.random
+            for i, cell in enumerate(sub):
+                if cell == 0 and rand() < trap_prob:
+                    sub[i] = 4
+            cw, ch = min(w, c), min(h, c)
+            for y in range(ch):
+                cells[y * c:y * c + cw] = sub[y * w:y * w + cw]
+            # doors into the neighbours on the left and above, at some of the odd rows/columns
+            if cx > 0:
+                for y in rng.sample(range(1, 2 * ny, 2), max(1, ny // 4)):
+                    cells[y * c] = 0
+            if cy > 0:
+                for x in rng.sample(range(1, 2 * nx, 2), max(1, nx // 4)):
+                    cells[x] = 0
+        for (x, y), value in self.overrides.items():
+            if x0 <= x < x0 + c and y0 <= y < y0 + c:
+                cells[(y - y0) * c + x - x0] = value
+        return cells
+
+
+def viewport_chunks(maze: ChunkedGrid, x: int, y: int) -> List[Tuple[int, int]]:
+    """Chunks within VIEW_RADIUS cells of (x, y)."""
+    across, down = maze.chunks_across
+    cx0 = max(0, (x - VIEW_RADIUS) // CHUNK_SIZE)
+    cx1 = min(across - 1, (x + VIEW_RADIUS) // CHUNK_SIZE)
+    cy0 = max(0, (y - VIEW_RADIUS) // CHUNK_SIZE)
+    cy1 = min(down - 1, (y + VIEW_RADIUS) // CHUNK_SIZE)
+    return [(cx, cy) for cy in range(cy0, cy1 + 1) for cx in range(cx0, cx1 + 1)]
+
+
+def chunk_payload(maze, cx: int, cy: int) -> dict:
+    """One chunk of any maze (Grid, lists of rows or ChunkedGrid) as sent to clients."""
+    x0, y0 = cx * CHUNK_SIZE, cy * CHUNK_SIZE
+    height = len(maze)
+    width = maze.width if hasattr(maze, "width") else len(maze[0])
+    if cx < 0 or cy < 0 or x0 >= width or y0 >= height:
+        raise IndexError("chunk out of range")
+    if isinstance(maze, ChunkedGrid):
+        rows = maze.chunk_rows(cx, cy)
+    else:
+        x1 = min(width, x0 + CHUNK_SIZE)
+        rows = [list(maze[y][x0:x1]) for y in range(y0, min(height, y0 + CHUNK_SIZE))]
+    return {"cx": cx, "cy": cy, "x": x0, "y": y0, "rows": rows}
@@ -1,47 +1,93 @@
+import logging
 from .state import Enemy, GameState, Difficulty
+from .events import emit
 from game.maze import can_move
+from game.pathing import DistanceField, flow_field
 
 
-def move_enemies(state: GameState) -> None:
+# ambushers wait until the player is this many steps away (by maze distance)
+AMBUSH_RANGE = 4
+# chasers only pursue a player this close and patrol otherwise, so one spawned
+# across the maze does not end up waiting on the player's way back from the key
+CHASE_RANGE = 8
+
+
+def move_enemies(state: GameState, chasers: bool = True) -> None:
+    # Patrols step on every call. Chasers and ambushers only step when `chasers`
+    # is set (clock ticks, not player moves), so a player who keeps moving can
+    # outrun them; a player stepping onto one is still caught.
     # If difficulty is IMPOSSIBLE, moving enemies are disabled (map memorization mode)
     try:
         if state.difficulty == Difficulty.IMPOSSIBLE:
             return
     except Exception:
         pass
+    # one field toward the player, shared by every chasing enemy of this game
+    field = None
     for enemy in state.enemies:
         if not enemy.alive:
             continue
 
-        nx = enemy.x + enemy.dx
-        ny = enemy.y + enemy.dy
-
-        # reverse direction if blocked
-        if not can_move(state.maze, nx, ny):
-            enemy.dx *= -1
-            enemy.dy *= -1
-            nx = enemy.x + enemy.dx
-            ny = enemy.y + enemy.dy
-
-        # move enemy if possible
-        if can_move(state.maze, nx, ny):
-            enemy.x = nx
-            enemy.y = ny
+        if enemy.pattern == "patrol":
+            _patrol(state, enemy)
+        elif chasers:
+            if field is None:
+                field = flow_field(state.maze, (state.player.x, state.player.y), CHASE_RANGE)
+            _chase(state, enemy, field)
 
         # collision with player
         if enemy.x == state.player.x and enemy.y == state.player.y and enemy.alive:
-            # apply damage based on difficulty
-            if state.difficulty in (Difficulty.MEDIUM, Difficulty.IMPOSSIBLE):
-                # In NORMAL (MEDIUM) and IMPOSSIBLE difficulties, colliding with an enemy causes immediate game over
-                print(f"[ENEMY] collision {getattr(state,'difficulty',None)} -> immediate GAME_OVER: game={getattr(state,'game_id',None)}")
-                state.is_game_over = True
-            else:
-                # On other difficulties (easy/impossible), subtract health
-                state.player.health = max(0, state.player.health - 15)
-                print(f"[ENEMY] collision non-MEDIUM: game={getattr(state,'game_id',None)} health={state.player.health}")
-
-            # mark player hit for front-end feedback
-            setattr(state, "player_hit", True)
+            hit_player(state)
 
             # optionally kill or disable enemy for a moment
             # enemy.alive = False
+
+
+def _patrol(state: GameState, enemy: Enemy) -> None:
+    # bounce back and forth along one axis
+    nx = enemy.x + enemy.dx
+    ny = enemy.y + enemy.dy
+
+    # reverse direction if blocked
+    if not can_move(state.maze, nx, ny):
+        enemy.dx *= -1
+        enemy.dy *= -1
+        nx = enemy.x + enemy.dx
+        ny = enemy.y + enemy.dy
+
+    # move enemy if possible
+    if can_move(state.maze, nx, ny):
+        enemy.x = nx
+        enemy.y = ny
+
+
+def _chase(state: GameState, enemy: Enemy, field: DistanceField) -> None:
+    # "chase" steps toward a nearby player; "ambush" waits until the player comes close.
+    # The field only reaches CHASE_RANGE steps around the player: farther away (or
+    # cut off from the player), a chaser keeps patrolling and an ambusher keeps waiting.
+    distance = field.distance(enemy.x, enemy.y)
+    if enemy.pattern == "ambush":
+        if distance < 0 or distance > AMBUSH_RANGE:
+            return
+    elif distance < 0 or distance > CHASE_RANGE:
+        _patrol(state, enemy)
+        return
+    step = field.step_from(enemy.x, enemy.y)
+    if step is not None:
+        enemy.dx, enemy.dy = step[0] - enemy.x, step[1] - enemy.y
+        enemy.x, enemy.y = step
+
+
+def hit_player(state: GameState) -> None:
+    # apply damage based on difficulty
+    if state.difficulty in (Difficulty.MEDIUM, Difficulty.IMPOSSIBLE):
+        # In NORMAL (MEDIUM) and IMPOSSIBLE difficulties, colliding with an enemy causes immediate game over
+        emit(logging.INFO, "game_over", state, cause="enemy_hit", difficulty=state.difficulty)
+        state.is_game_over = True
+    else:
+        # On other difficulties (easy/impossible), subtract health
+        state.player.health = max(0, state.player.health - 15)
+        emit(logging.DEBUG, "enemy_hit", state, health=state.player.health)
+
+    # mark player hit for front-end feedback
+    state.player_hit = True
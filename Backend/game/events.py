@@ -0,0 +1,87 @@
+# structured game-event log (collisions, locked exits, victories, game overs)
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from typing import Optional
+
+logger = logging.getLogger("mindmaze.game")
+# silent unless configured: no handler, and nothing below this level is built at all
+logger.setLevel(logging.CRITICAL + 1)
+logger.propagate = False
+
+# fraction of DEBUG events kept (per-step noise like collisions); INFO and up are always kept
+_sample = 1.0
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def emit(level: int, event: str, state, **values) -> None:
+    """Log one game event with its game id, player position and values.
+
+    Costs one level check when the log is off. Records are handed to a queue and
+    written by a background thread, so game code never blocks on the output.
+    """
+    if not logger.isEnabledFor(level):
+        return
+    if level <= logging.DEBUG and _sample < 1.0 and random.random() >= _sample:
+        return
+    player = state.player
+    logger.log(level, event, extra={
+        "game_id": state.game_id,
+        "event": event,
+        "position": (player.x, player.y),
+        "values": values,
+    })
+
+
+class JsonFormatter(logging.Formatter):
+    # one JSON object per line
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps({
+            "time": round(record.created, 3),
+            "level": record.levelname,
+            "event": getattr(record, "event", record.getMessage()),
+            "game_id": getattr(record, "game_id", None),
+            "position": getattr(record, "position", None),
+            **getattr(record, "values", {}),
+        }, default=str)
+
+
+def configure(level="INFO", sample: float = 1.0, handler: Optional[logging.Handler] = None) -> None:
+    """Turn the event log on at `level`, writing JSON lines to `handler` (stderr by default)."""
+    global _listener, _sample
+    shutdown()
+    if handler is None:
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(JsonFormatter())
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    logger.handlers = [logging.handlers.QueueHandler(records)]
+    logger.setLevel(level)
+    _sample = sample
+    _listener = logging.handlers.QueueListener(records, handler, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown() -> None:
+    # flush queued records and go back to silent
+    global _listener
+    listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+    logger.handlers = []
+    logger.setLevel(logging.CRITICAL + 1)
+
+
+atexit.register(shutdown)
+
+# MINDMAZE_GAME_LOG=debug|info|warning turns the log on; MINDMAZE_GAME_LOG_SAMPLE keeps
+# that fraction of debug events
+if os.environ.get("MINDMAZE_GAME_LOG"):
+    configure(
+        os.environ["MINDMAZE_GAME_LOG"].upper(),
+        sample=float(os.environ.get("MINDMAZE_GAME_LOG_SAMPLE", "1.0")),
+    )
@@ -0,0 +1,73 @@
+# compact maze storage: one byte per cell
+from typing import Iterable, Iterator, List
+
+
+class Grid:
+    """A maze stored as a flat bytearray (index = y * width + x).
+
+    Indexing by row returns a writable memoryview over that row, so callers keep
+    using `maze[y][x]` for reads and writes and `len(maze)` / `for row in maze`
+    as before, while a session holds one byte per cell instead of a list of
+    lists of Python ints.
+
+    `paths` caches distance fields (see game.pathing) and `encoded` the JSON
+    form of the rows (see core.encoding); neither is pickled. Writes through
+    game.landmarks.set_cell keep both in sync.
+    """
+
+    __slots__ = ("width", "height", "cells", "paths", "encoded")
+
+    def __init__(self, width: int, height: int, cells=None):
+        self.width = width
+        self.height = height
+        self.cells = bytearray(cells) if cells is not None else bytearray(width * height)
+        self.paths = None
+        self.encoded = None
+        if len(self.cells) != width * height:
+            raise ValueError("cells do not match the grid size")
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Iterable[int]]) -> "Grid":
+        rows = [bytes(row) for row in rows]
+        width = len(rows[0]) if rows else 0
+        return cls(width, len(rows), b"".join(rows))
+
+    def __getitem__(self, y: int) -> memoryview:
+        if y < 0:
+            y += self.height
+        if not 0 <= y < self.height:
+            raise IndexError("grid row out of range")
+        w = self.width
+        return memoryview(self.cells)[y * w:y * w + w]
+
+    def __len__(self) -> int:
+        return self.height
+
+    def __iter__(self) -> Iterator[memoryview]:
+        view = memoryview(self.cells)
+        w = self.width
+        for start in range(0, self.height * w, w):
+            yield view[start:start + w]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Grid):
+            return self.width == other.width and self.cells == other.cells
+        return NotImplemented
+
+    def __sizeof__(self) -> int:
+        return object.__sizeof__(self) + self.cells.__sizeof__()
+
+    def __getstate__(self):
+        return (self.width, self.height, bytes(self.cells))
+
+    def __setstate__(self, state) -> None:
+        self.width, self.height, cells = state
+        self.cells = bytearray(cells)
+        self.paths = None
+        self.encoded = None
+
+    def to_rows(self) -> List[List[int]]:
+        # plain nested lists, for JSON responses
+        w = self.width
+        cells = self.cells
+        return [list(cells[start:start + w]) for start in range(0, self.height * w, w)]
@@ -0,0 +1,85 @@
+# index of start/exit/key/trap cells so rules never have to scan the maze
+from typing import Iterable, List, Optional, Tuple
+from game.grid import Grid
+from game.pathing import invalidate
+from game.state import GameState, Landmarks
+
+WALL = 1
+START = 3
+EXIT = 2
+TRAP = 4
+KEY = 5
+
+
+def build_landmarks(
+    maze: List[List[int]],
+    start: Optional[Tuple[int, int]] = None,
+    exit: Optional[Tuple[int, int]] = None,
+    keys: Optional[Iterable[Tuple[int, int]]] = None,
+    traps: Optional[Iterable[Tuple[int, int]]] = None,
+) -> Landmarks:
+    """Build the landmark index for a maze.
+
+    Positions already known from generation are taken as-is; the maze is only
+    scanned (once) when one of them is missing.
+    """
+    landmarks = Landmarks(
+        start=tuple(start) if start else None,
+        exit=tuple(exit) if exit else None,
+        keys=set(keys) if keys is not None else set(),
+        traps=set(traps) if traps is not None else set(),
+    )
+    if landmarks.start and landmarks.exit and keys is not None and traps is not None:
+        return landmarks
+
+    for y, row in enumerate(maze):
+        for x, cell in enumerate(row):
+            if cell == START and landmarks.start is None:
+                landmarks.start = (x, y)
+            elif cell == EXIT and landmarks.exit is None:
+                landmarks.exit = (x, y)
+            elif cell == KEY and keys is None:
+                landmarks.keys.add((x, y))
+            elif cell == TRAP and traps is None:
+                landmarks.traps.add((x, y))
+    return landmarks
+
+
+def get_landmarks(state: GameState) -> Landmarks:
+    # states built by hand (tests, older sessions) get their index on first use
+    if state.landmarks is None:
+        state.landmarks = build_landmarks(state.maze)
+    return state.landmarks
+
+
+def set_cell(state: GameState, x: int, y: int, value: int) -> None:
+    """Write a maze cell, keeping the landmark index and the delta cell log in sync."""
+    landmarks = get_landmarks(state)
+    pos = (x, y)
+    old = state.maze[y][x]
+    if old == value:
+        return
+    state.maze[y][x] = value
+    state.cell_log.append((x, y, value))
+    if isinstance(state.maze, Grid):
+        state.maze.encoded = None
+    if old == WALL or value == WALL:
+        invalidate(state.maze)
+
+    if old == KEY:
+        landmarks.keys.discard(pos)
+    elif old == TRAP:
+        landmarks.traps.discard(pos)
+    elif old == START and landmarks.start == pos:
+        landmarks.start = None
+    elif old == EXIT and landmarks.exit == pos:
+        landmarks.exit = None
+
+    if value == KEY:
+        landmarks.keys.add(pos)
+    elif value == TRAP:
+        landmarks.traps.add(pos)
+    elif value == START:
+        landmarks.start = pos
+    elif value == EXIT:
+        landmarks.exit = pos
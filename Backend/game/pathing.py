@@ -0,0 +1,185 @@
+# breadth-first distance fields over a maze, cached per maze
+from array import array
+from typing import Iterable, List, Optional, Tuple
+
+from game.grid import Grid
+
+# translation table: wall -> 0, anything walkable -> 1
+_WALKABLE = bytes(0 if c == 1 else 1 for c in range(256))
+
+Pos = Tuple[int, int]
+
+# distance fields kept per maze (exit, key, ...); each costs 4 bytes per cell
+CACHE_LIMIT = 8
+# cache key of the single moving-target field (see flow_field)
+_FLOW = "flow"
+
+
+class DistanceField:
+    """Steps from every cell to the nearest source cell (-1 = unreachable).
+
+    Stored over the maze padded with a ring of walls (index = (y + 1) * stride + x + 1),
+    so the search and the path walk never need bounds checks.
+    """
+
+    __slots__ = ("sources", "width", "height", "stride", "dist", "order", "limit")
+
+    def __init__(self, sources: Tuple[Pos, ...], width: int, height: int, dist: array, order: array, limit: Optional[int] = None):
+        self.sources = sources
+        self.width = width
+        self.height = height
+        self.stride = width + 2
+        self.dist = dist
+        # padded indices of the reachable cells, nearest first
+        self.order = order
+        # the search stopped this many steps out: farther cells read as unreachable
+        self.limit = limit
+
+    def distance(self, x: int, y: int) -> int:
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return -1
+        return self.dist[(y + 1) * self.stride + x + 1]
+
+    def path_from(self, x: int, y: int) -> Optional[List[Pos]]:
+        """One shortest path from (x, y) to the nearest source, both ends included."""
+        if self.distance(x, y) < 0:
+            return None
+        dist, s = self.dist, self.stride
+        cur = (y + 1) * s + x + 1
+        path = [(x, y)]
+        while dist[cur] > 0:
+            nd = dist[cur] - 1
+            for nxt in (cur + 1, cur - 1, cur + s, cur - s):
+                if dist[nxt] == nd:
+                    cur = nxt
+                    break
+            path.append((cur % s - 1, cur // s - 1))
+        return path
+
+    def step_from(self, x: int, y: int) -> Optional[Pos]:
+        # the neighbour one step closer to a source (None at a source or when unreachable)
+        d = self.distance(x, y)
+        if d <= 0:
+            return None
+        dist, s = self.dist, self.stride
+        cur = (y + 1) * s + x + 1
+        for nxt in (cur + 1, cur - 1, cur + s, cur - s):
+            if dist[nxt] == d - 1:
+                return nxt % s - 1, nxt // s - 1
+        return None
+
+    def reachable(self) -> List[Pos]:
+        # reachable cells ordered by distance, nearest first
+        s = self.stride
+        return [(i % s - 1, i // s - 1) for i in self.order]
+
+
+def padded_mask(maze: Grid, table: bytes = _WALKABLE) -> bytearray:
+    """The maze's cells mapped through translation `table`, laid out like a DistanceField
+    (padded with a ring of zeros), so it can be indexed with a field's `order`."""
+    w, h = maze.width, maze.height
+    s = w + 2
+    mask = bytearray(s * (h + 2))
+    walkable = maze.cells.translate(table)
+    for y in range(h):
+        start = (y + 1) * s + 1
+        mask[start:start + w] = walkable[y * w:y * w + w]
+    return mask
+
+
+def bfs(maze: Grid, sources: Iterable[Pos], limit: Optional[int] = None) -> DistanceField:
+    """Multi-source breadth-first search over the non-wall cells of `maze`, at most `limit` steps out."""
+    sources = tuple(sources)
+    w, h = maze.width, maze.height
+    s = w + 2
+    free = padded_mask(maze)
+    # distances and indices are below the cell count: two bytes each for small mazes
+    typecode = "h" if len(free) < 2 ** 15 else "i"
+    dist = array(typecode, [-1]) * len(free)
+    frontier = []
+    for x, y in sources:
+        i = (y + 1) * s + x + 1
+        if 0 <= x < w and 0 <= y < h and free[i]:
+            free[i] = 0
+            frontier.append(i)
+    order = list(frontier)
+
+    # level by level, so every cell of a frontier shares one distance
+    d = 0
+    while frontier:
+        if d == limit:
+            for cur in frontier:
+                dist[cur] = d
+            break
+        nxt: List[int] = []
+        push = nxt.append
+        for cur in frontier:
+            dist[cur] = d
+            n = cur + 1
+            if free[n]:
+                free[n] = 0
+                push(n)
+            n = cur - 1
+            if free[n]:
+                free[n] = 0
+                push(n)
+            n = cur + s
+            if free[n]:
+                free[n] = 0
+                push(n)
+            n = cur - s
+            if free[n]:
+                free[n] = 0
+                push(n)
+        order += nxt
+        frontier = nxt
+        d += 1
+    return DistanceField(sources, w, h, dist, array(typecode, order), limit)
+
+
+def distance_field(maze, *sources: Pos) -> DistanceField:
+    """Distance field to `sources`, cached on the maze until a wall changes.
+
+    Plain lists of rows (hand-built states) are searched every time.
+    """
+    if not isinstance(maze, Grid):
+        return bfs(Grid.from_rows(maze), sources)
+    key = tuple(sorted(sources))
+    if maze.paths is None:
+        maze.paths = {}
+    field = maze.paths.get(key)
+    if field is None:
+        if len(maze.paths) >= CACHE_LIMIT:
+            # oldest first; landmark fields are asked for early and then reused
+            del maze.paths[next(iter(maze.paths))]
+        field = maze.paths[key] = bfs(maze, sources)
+    return field
+
+
+def flow_field(maze, target: Pos, limit: Optional[int] = None) -> DistanceField:
+    """Distance field to a moving target (the player), shared by everything chasing it.
+
+    Kept on the maze next to the cached fields and only recomputed once the
+    target has moved, so each game pays at most one search per player step.
+    Chasers only care about a player close by: with a `limit` the search
+    covers the cells that many steps around the target, not the whole maze.
+    """
+    if not isinstance(maze, Grid):
+        return bfs(Grid.from_rows(maze), [target], limit)
+    if maze.paths is None:
+        maze.paths = {}
+    field = maze.paths.get(_FLOW)
+    if field is None or field.sources != (target,) or field.limit != limit:
+        field = maze.paths[_FLOW] = bfs(maze, [target], limit)
+    return field
+
+
+def invalidate(maze) -> None:
+    # call after a wall is added or removed
+    if isinstance(maze, Grid):
+        maze.paths = None
+
+
+def shortest_path(maze, start: Pos, goal: Pos) -> Optional[List[Pos]]:
+    """One shortest path from start to goal (both included), or None."""
+    return distance_field(maze, goal).path_from(*start)
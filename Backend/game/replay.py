@@ -0,0 +1,79 @@
+# headless re-run of a game's action log (see game.action_log), for audits and bug reports
+import struct
+import zlib
+from typing import List
+
+from game.action_log import (
+    ITEM, MOVE, MOVE_ARGS, PUZZLE_RIGHT, PUZZLE_WRONG, TICK, UNIT_MOVES, read_header,
+)
+from game.actions import apply_item, apply_puzzle_result, apply_tick, move_player
+from game.chunks import ChunkedGrid
+from game.grid import Grid
+from game.state import GameState
+
+
+def replay(log, game_id: str = "replay") -> GameState:
+    """Rebuild the game from the log header and run every action through game.actions.
+
+    Game rules draw no random numbers, so the result is the state the live game
+    reached. Raises ValueError on a truncated or corrupt log.
+    """
+    i = 0
+    try:
+        state, i = read_header(log, game_id)
+        log = bytes(log)
+        n = len(log)
+        while i < n:
+            op = log[i]
+            i += 1
+            if op < MOVE:
+                dx, dy = UNIT_MOVES[op]
+                move_player(state, dx, dy)
+            elif op == TICK:
+                apply_tick(state)
+            elif op == MOVE:
+                dx, dy = MOVE_ARGS.unpack_from(log, i)
+                i += MOVE_ARGS.size
+                move_player(state, dx, dy)
+            elif op == ITEM:
+                length = log[i]
+                item_id = log[i + 1:i + 1 + length].decode()
+                i += 1 + length
+                apply_item(state, item_id)
+            elif op == PUZZLE_RIGHT or op == PUZZLE_WRONG:
+                apply_puzzle_result(state, op == PUZZLE_RIGHT)
+            else:
+                raise ValueError(f"unknown action {op} at byte {i - 1}")
+    except (IndexError, UnicodeDecodeError, struct.error, zlib.error) as exc:
+        raise ValueError(f"truncated action log at byte {i}") from exc
+    return state
+
+
+def outcome(state: GameState) -> dict:
+    # everything a game's result depends on
+    maze = state.maze
+    if isinstance(maze, ChunkedGrid):
+        # the generated cells follow from the seed; only the writes can differ
+        cells = sorted(maze.overrides.items())
+    else:
+        cells = bytes(maze.cells if isinstance(maze, Grid) else Grid.from_rows(maze).cells)
+    return {
+        "player": (state.player.x, state.player.y, state.player.health, state.player.energy, state.player.lives),
+        "enemies": [(e.x, e.y, e.dx, e.dy, e.alive) for e in state.enemies],
+        "maze": cells,
+        "time_left": state.time_left,
+        "score": state.score,
+        "lives": state.lives,
+        "keys_collected": state.keys_collected,
+        "inventory": dict(state.inventory),
+        "map_preview_time": state.map_preview_time,
+        "is_game_over": state.is_game_over,
+        "is_victory": state.is_victory,
+    }
+
+
+def verify(state: GameState) -> List[str]:
+    """Replay the game's own log; returns the fields where the live game differs (none = consistent)."""
+    expected = outcome(replay(state.action_log, state.game_id))
+    actual = outcome(state)
+    return [name for name, value in expected.items() if actual[name] != value]
@@ -1,5 +1,5 @@
 # aturan & validasi
-from game.state import GameState
+from game.state import Difficulty, GameState
 
 
 def can_player_move(state: GameState) -> bool:
@@ -8,13 +8,9 @@ def can_player_move(state: GameState) -> bool:
     if state.player.energy <= 0:
         return False
     # During Impossible difficulty map preview/countdown, player cannot move
-    if getattr(state, "difficulty", None) is not None:
-        try:
-            from game.state import Difficulty
-            if state.difficulty == Difficulty.IMPOSSIBLE and getattr(state, "map_preview_time", 0) > 0:
-                return False
-        except Exception:
-            pass
+    # (checked on every move: no per-call import or getattr fallbacks here)
+    if state.map_preview_time > 0 and state.difficulty == Difficulty.IMPOSSIBLE:
+        return False
     return True
 
 
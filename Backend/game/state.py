@@ -1,7 +1,8 @@
 # representasi state game
 from dataclasses import dataclass, field
-from typing import List, Tuple, Dict
+from typing import List, Tuple, Dict, Optional, Set
 from enum import Enum
+from game.grid import Grid
 
 
 class Difficulty(str, Enum):
@@ -10,7 +11,7 @@ class Difficulty(str, Enum):
     IMPOSSIBLE = "impossible"
 
 
-@dataclass
+@dataclass(slots=True)
 class Player:
     x: int
     y: int
@@ -19,7 +20,7 @@ class Player:
     lives: int = 3
 
 
-@dataclass
+@dataclass(slots=True)
 class Enemy:
     id: str
     x: int
@@ -30,13 +31,23 @@ class Enemy:
     alive: bool = True
 
 
-@dataclass
+@dataclass(slots=True)
+class Landmarks:
+    # positions of the special maze cells, kept in sync with the maze by game.landmarks.set_cell
+    start: Optional[Tuple[int, int]] = None
+    exit: Optional[Tuple[int, int]] = None
+    keys: Set[Tuple[int, int]] = field(default_factory=set)
+    traps: Set[Tuple[int, int]] = field(default_factory=set)
+
+
+@dataclass(slots=True)
 class GameState:
     game_id: str
     difficulty: Difficulty
     player: Player
     enemies: List[Enemy]
-    maze: List[List[int]]
+    # one byte per cell (game.grid.Grid); hand-built states may still use lists of rows
+    maze: Grid
     time_left: int
     score: int
     inventory: Dict[str, int]
@@ -49,3 +60,37 @@ class GameState:
     traps: List[Tuple[int, int]] = field(default_factory=list)
     darkness: bool = False
     map_preview_time: int = 0
+    landmarks: Optional[Landmarks] = None
+    # seed the maze and enemy spawns were generated from, if the game was seeded
+    seed: Optional[int] = None
+    # false for seeded games and when the start request overrode the level's maze
+    # size (see core.game_manager.create_game): such games are kept off the leaderboard
+    ranked: bool = True
+    # what check_victory scores against: the level's starting time and energy
+    # allowance (0 = the level-1 values of the difficulty)
+    time_limit: int = 0
+    energy_limit: int = 0
+    # the next level's maze has been requested from the pool (see core.game_manager.update_game)
+    next_level_reserved: bool = False
+    # delta encoding: version of the last serialized snapshot, the fields it
+    # contained and the maze cells changed since (see core.game_manager.serialize_state)
+    version: int = 0
+    sent_fields: Optional[dict] = None
+    cell_log: List[Tuple[int, int, int]] = field(default_factory=list)
+    # darkness mode: cells the player has seen (one byte per cell) and the ones
+    # seen since the last snapshot (see game.visibility)
+    seen: Optional[bytearray] = None
+    reveal_log: List[Tuple[int, int]] = field(default_factory=list)
+    # chunked mazes: chunks the client was sent since its last full snapshot (see game.chunks)
+    sent_chunks: Optional[Set[Tuple[int, int]]] = None
+    # storage revision for optimistic concurrency (see core.storage.SessionBackend)
+    revision: int = 0
+    # last server clock epoch applied, so several workers never tick a game twice
+    clock_epoch: int = 0
+    # the victory/game over has been counted in core.metrics
+    outcome_recorded: bool = False
+    # append-only binary record of the game as created and every action since (see game.action_log)
+    action_log: bytearray = field(default_factory=bytearray)
+    # transient: set while handling one update and read back by serialize_state
+    player_hit: bool = False
+    puzzle: Optional[dict] = None
@@ -1,20 +1,13 @@
 # win / lose logic
+import logging
 from .state import GameState, Difficulty
+from .events import emit
+from .landmarks import get_landmarks
 
 
 def check_victory(state: GameState) -> None:
-    # Determine exit position from the maze if present, otherwise fall back to bottom-right
-    exit_pos = None
-    try:
-        for y, row in enumerate(state.maze):
-            for x, cell in enumerate(row):
-                if cell == 2:
-                    exit_pos = (x, y)
-                    break
-            if exit_pos:
-                break
-    except Exception:
-        exit_pos = None
+    # Exit position comes from the landmark index (no maze scan); fall back to bottom-right
+    exit_pos = get_landmarks(state).exit
 
     if not exit_pos:
         size = len(state.maze) if getattr(state, "maze", None) else 0
@@ -28,18 +21,20 @@ def check_victory(state: GameState) -> None:
         required = getattr(state, "keys_required", 0) or 0
         collected = getattr(state, "keys_collected", 0) or 0
         if required > collected:
-            print(f"[VICTORY] Exit reached but keys missing: game={getattr(state,'game_id',None)} collected={collected}/{required}")
+            emit(logging.DEBUG, "exit_locked", state, keys_collected=collected, keys_required=required)
             # do not set victory yet
             return
         # compute final score using weighted indicators: Time:Health:Energy = 4:3:3
         try:
-            # map difficulty to starting time (matches create_game)
-            if getattr(state, "difficulty", None) == Difficulty.EASY:
-                initial_time = 120
-            elif getattr(state, "difficulty", None) == Difficulty.MEDIUM:
-                initial_time = 180
-            else:
-                initial_time = 150
+            # starting time of the level; games without one get the difficulty's level-1 time
+            initial_time = getattr(state, "time_limit", 0) or 0
+            if not initial_time:
+                if getattr(state, "difficulty", None) == Difficulty.EASY:
+                    initial_time = 120
+                elif getattr(state, "difficulty", None) == Difficulty.MEDIUM:
+                    initial_time = 180
+                else:
+                    initial_time = 150
 
             time_left = max(0, getattr(state, "time_left", 0) or 0)
             time_pct = min(1.0, time_left / float(initial_time)) if initial_time > 0 else 0.0
@@ -48,8 +43,9 @@ def check_victory(state: GameState) -> None:
             hp_pct = min(1.0, hp / 100.0)
 
             en = max(0, getattr(state.player, "energy", 0) or 0)
-            # energy max is 50 as set in create_game
-            en_pct = min(1.0, en / 50.0)
+            # energy allowance of the level (50 on level 1, see create_game)
+            energy_limit = getattr(state, "energy_limit", 0) or 50
+            en_pct = min(1.0, en / float(energy_limit))
 
             weighted = (time_pct * 4.0) + (hp_pct * 3.0) + (en_pct * 3.0)
             score_val = (weighted / 10.0) * 100.0
@@ -61,7 +57,7 @@ def check_victory(state: GameState) -> None:
             except Exception:
                 pass
 
-        print(f"[VICTORY] Game {getattr(state,'game_id',None)} reached exit at {at_exit}; score={state.score}")
+        emit(logging.INFO, "victory", state, score=state.score)
         state.is_victory = True
         state.is_game_over = True
 
@@ -84,5 +80,5 @@ def check_victory(state: GameState) -> None:
             reasons.append(f"time_left={tl}")
         if lv is not None and lv <= 0:
             reasons.append(f"lives={lv}")
-        print(f"[GAME_OVER] Game {getattr(state,'game_id',None)} triggered by: {', '.join(reasons)}")
+        emit(logging.INFO, "game_over", state, cause=", ".join(reasons))
         state.is_game_over = True
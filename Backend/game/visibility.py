@@ -0,0 +1,89 @@
+# fog of war for darkness mode: which cells the player has seen
+from itertools import product
+from typing import List, Optional, Tuple
+
+from game.grid import Grid
+from game.state import GameState
+
+# cells within this many steps (either axis) can be seen, unless a wall is in the way
+VISION_RADIUS = 2
+# value sent for cells the player has not seen
+HIDDEN = -1
+
+
+def _rays(radius: int) -> List[Tuple[int, int, Tuple[Tuple[Tuple[int, int], ...], ...]]]:
+    # per offset in the square: the cells between it and the player, once rounding
+    # down and once up (a cell is seen when either line is free of walls)
+    rays = []
+    for dx, dy in product(range(-radius, radius + 1), repeat=2):
+        n = max(abs(dx), abs(dy))
+        lines = set()
+        for rnd in (lambda v: int(v // 1), lambda v: -int(-v // 1)):
+            lines.add(tuple((rnd(dx * k / n), rnd(dy * k / n)) for k in range(1, n)))
+        rays.append((dx, dy, tuple(lines)))
+    # nearest first
+    rays.sort(key=lambda r: max(abs(r[0]), abs(r[1])))
+    return rays
+
+
+_RAYS = _rays(VISION_RADIUS)
+
+
+def is_fogged(state: GameState) -> bool:
+    # the whole map is sent while the preview runs, only seen cells after it
+    return state.darkness and state.map_preview_time <= 0
+
+
+def reveal(state: GameState) -> None:
+    """Mark the cells in view of the player as seen.
+
+    Incremental: only the window around the player's current cell is looked at,
+    and newly seen cells are queued in `state.reveal_log` for the next snapshot.
+    """
+    if not state.darkness:
+        return
+    maze = state.maze
+    w, h = (maze.width, maze.height) if isinstance(maze, Grid) else (len(maze[0]), len(maze))
+    seen = state.seen
+    if seen is None:
+        seen = state.seen = bytearray(w * h)
+    px, py = state.player.x, state.player.y
+    queue = state.reveal_log
+    for dx, dy, lines in _RAYS:
+        x, y = px + dx, py + dy
+        if not (0 <= x < w and 0 <= y < h) or seen[y * w + x]:
+            continue
+        for line in lines:
+            for mx, my in line:
+                if maze[py + my][px + mx] == 1:
+                    break
+            else:
+                seen[y * w + x] = 1
+                queue.append((x, y))
+                break
+
+
+def visible_cells(state: GameState) -> List[Tuple[int, int, int]]:
+    # changes the fogged client may see: writes to seen cells, then newly seen cells
+    # with their current value
+    maze = state.maze
+    seen = state.seen
+    if seen is None:
+        return []
+    w = len(seen) // len(maze)
+    cells = [c for c in state.cell_log if seen[c[1] * w + c[0]]]
+    cells += [(x, y, maze[y][x]) for x, y in state.reveal_log]
+    return cells
+
+
+def fogged_rows(state: GameState) -> List[List[int]]:
+    # the maze with every unseen cell replaced by HIDDEN
+    maze = state.maze
+    rows = maze.to_rows() if isinstance(maze, Grid) else [list(row) for row in maze]
+    seen: Optional[bytearray] = state.seen
+    w = len(rows[0]) if rows else 0
+    for y, row in enumerate(rows):
+        for x in range(w):
+            if seen is None or not seen[y * w + x]:
+                row[x] = HIDDEN
+    return rows
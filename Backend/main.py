@@ -1,12 +1,25 @@
-from fastapi import FastAPI
+import asyncio
+from typing import Optional
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+from pydantic import ValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from core.game_manager import create_game, get_game, serialize_state
+from core.encoding import dumps
+from core.commands import COMMANDS
+from core.game_manager import create_game, encode_state, level_settings, warm_maze_pool
+from core.leaderboard import LEADERBOARD
+from core.maze_pool import MAZE_POOL
+from core.metrics import Gauge, MetricsMiddleware, render as render_metrics
+from core.scheduler import SCHEDULER, SERVER_TICKS
+from core.storage import GAMES, SessionGone, SessionNotFound
 from game.actions import (
     move_player,
     apply_item,
     apply_puzzle_result,
     apply_tick,
 )
+from game.chunks import chunk_payload
 from game.state import Difficulty
 from schemas import (
     MoveRequest,
@@ -14,9 +27,28 @@ from schemas import (
     PuzzleRequest,
     TickRequest,
     StartRequest,
+    ActionMessage,
+    ActionsRequest,
 )
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # pre-generate mazes in worker processes so /game/start does not have to
+    warm_maze_pool()
+    # the server owns the game clock; clients no longer need to call /game/tick
+    if SERVER_TICKS:
+        SCHEDULER.start()
+    # drop idle and finished sessions in the background
+    sweeper = asyncio.create_task(GAMES.run_sweeper())
+    yield
+    sweeper.cancel()
+    await SCHEDULER.stop()
+    MAZE_POOL.shutdown()
+    LEADERBOARD.close()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Allow CORS from frontend dev server
 app.add_middleware(
@@ -28,55 +60,238 @@ app.add_middleware(
 )
 
 
+# per-route latency and request/error counts; scraped from /metrics
+app.add_middleware(MetricsMiddleware)
+
+Gauge("mindmaze_live_sessions", "Game sessions currently stored.", lambda: len(GAMES))
+Gauge("mindmaze_sessions_evicted", "Sessions evicted to stay within the session limits (since this process started).", lambda: GAMES.stats()["evicted"])
+Gauge("mindmaze_sessions_expired", "Idle or finished sessions expired by the sweeper (since this process started).", lambda: GAMES.stats()["expired"])
+Gauge("mindmaze_tick_lag_seconds", "How late the last server tick started.", lambda: SCHEDULER.last_lag)
+Gauge("mindmaze_tick_duration_seconds", "Time the last server tick took.", lambda: SCHEDULER.last_duration)
+
+
+@app.get("/metrics")
+def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+@app.exception_handler(SessionNotFound)
+async def session_not_found(request: Request, exc: SessionNotFound):
+    # evicted/expired sessions are 410 so the client knows to start a new game
+    if isinstance(exc, SessionGone):
+        return JSONResponse(status_code=410, content={"detail": f"game {exc.reason}"})
+    return JSONResponse(status_code=404, content={"detail": "game not found"})
+
+
+# Game endpoints are async: each action goes through COMMANDS, which runs the
+# actions for one game one at a time (a tick can no longer interleave with a
+# move) without tying up a threadpool slot per request.
+
+
 @app.post("/game/start")
-def start_game(req: StartRequest):
-    # convert difficulty string to enum; accept frontend's "normal" -> MEDIUM
-    val = (req.difficulty or "").lower()
-    if val == "easy":
-        diff = Difficulty.EASY
-    elif val in ("normal", "medium"):
-        diff = Difficulty.MEDIUM
-    elif val in ("hard", "impossible"):
-        diff = Difficulty.IMPOSSIBLE
+async def start_game(req: StartRequest):
+    diff = parse_difficulty(req.difficulty)
+    # a maze that is not ready yet is generated in a thread, off the event loop;
+    # a ready (or small) one is taken right here: on a busy server the thread
+    # would spend far longer waiting for the GIL than the start takes
+    args = (diff, req.level, req.seed, req.size, req.previous_game_id)
+    if MAZE_POOL.ready(diff.value, req.size or level_settings(diff, req.level).size, req.seed, req.level, owner=req.previous_game_id):
+        state = create_game(*args)
     else:
-        diff = Difficulty.EASY
-
-    # allow client to pass desired level for progression
-    lvl = getattr(req, "level", 1) or 1
-    state = create_game(diff, level=lvl)
-    return serialize_state(state)
+        state = await asyncio.to_thread(create_game, *args)
+    return json_bytes(await COMMANDS.run(state.game_id, encode_state))
 
 
 @app.post("/game/move")
-def move(req: MoveRequest):
-    state = get_game(req.game_id)
-    new_state = move_player(state, req.dx, req.dy)
-    return serialize_state(new_state)
+async def move(req: MoveRequest):
+    return json_bytes(await COMMANDS.run(req.game_id, lambda state: encode_state(move_player(state, req.dx, req.dy), since=req.version)))
 
 
 @app.post("/game/use-item")
-def use_item(req: ItemRequest):
-    state = get_game(req.game_id)
-    new_state = apply_item(state, req.item_id)
-    return serialize_state(new_state)
+async def use_item(req: ItemRequest):
+    return json_bytes(await COMMANDS.run(req.game_id, lambda state: encode_state(apply_item(state, req.item_id), since=req.version)))
 
 
 @app.post("/game/puzzle")
-def puzzle(req: PuzzleRequest):
-    state = get_game(req.game_id)
-    new_state = apply_puzzle_result(state, req.correct)
-    return serialize_state(new_state)
+async def puzzle(req: PuzzleRequest):
+    return json_bytes(await COMMANDS.run(req.game_id, lambda state: encode_state(apply_puzzle_result(state, req.correct), since=req.version)))
 
 
 @app.post("/game/tick")
-def tick(req: TickRequest):
-    state = get_game(req.game_id)
-    new_state = apply_tick(state)
-    return serialize_state(new_state)
+async def tick(req: TickRequest):
+    return json_bytes(await COMMANDS.run(req.game_id, lambda state: encode_state(client_tick(state), since=req.version)))
+
+
+@app.post("/game/actions")
+async def actions(req: ActionsRequest):
+    def apply_all(state):
+        applied = apply_actions(state, req.actions)
+        return encode_state(state, since=req.version, applied=applied)
+
+    return json_bytes(await COMMANDS.run(req.game_id, apply_all))
 
 
 @app.get("/game/state/{game_id}")
-def get_state(game_id: str):
-    state = get_game(game_id)
-    return serialize_state(state)
+async def get_state(game_id: str, version: Optional[int] = None):
+    # serializing records the sent snapshot, so it is saved like an action
+    return json_bytes(await COMMANDS.run(game_id, lambda state: encode_state(state, since=version)))
+
+
+@app.get("/game/chunk/{game_id}/{cx}/{cy}")
+async def chunk(game_id: str, cx: int, cy: int):
+    # one CHUNK_SIZE square of the maze, e.g. ahead of the viewport
+    try:
+        return json_bytes(await COMMANDS.run(game_id, lambda state: dumps(chunk_payload(state.maze, cx, cy))))
+    except IndexError:
+        raise HTTPException(status_code=404, detail="chunk out of range")
+
+
+@app.get("/game/log/{game_id}")
+async def action_log(game_id: str):
+    # the binary action log, for replaying the game offline (see game.replay)
+    log = await COMMANDS.run(game_id, lambda state: bytes(state.action_log))
+    return Response(content=log, media_type="application/octet-stream")
+
+
+# Leaderboard reads are SQLite queries (or cache hits): plain handlers, run in
+# the threadpool. Victories are recorded by update_game.
+
+
+@app.get("/leaderboard/rank/{game_id}")
+def leaderboard_rank(game_id: str):
+    entry = LEADERBOARD.rank(game_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="game not on the leaderboard")
+    return json_bytes(dumps(entry))
+
+
+# registered after /leaderboard/rank/..., which this pattern would also match
+@app.get("/leaderboard/{difficulty}/{level}")
+def leaderboard(difficulty: str, level: int, offset: int = Query(0, ge=0), limit: int = Query(20, ge=1, le=100)):
+    diff = parse_difficulty(difficulty)
+    entries = LEADERBOARD.top(diff.value, level, limit=limit, offset=offset)
+    return json_bytes(dumps({"difficulty": diff.value, "level": level, "offset": offset, "entries": entries}))
+
+
+def parse_difficulty(value: Optional[str]) -> Difficulty:
+    # convert difficulty string to enum; accept frontend's "normal" -> MEDIUM
+    val = (value or "").lower()
+    if val in ("normal", "medium"):
+        return Difficulty.MEDIUM
+    if val in ("hard", "impossible"):
+        return Difficulty.IMPOSSIBLE
+    return Difficulty.EASY
+
+
+def json_bytes(body: bytes) -> Response:
+    # states are encoded by encode_state already; skip FastAPI's jsonable_encoder pass
+    return Response(content=body, media_type="application/json")
+
+
+def client_tick(state):
+    # client-driven ticks only advance time when the server clock is not running
+    if SCHEDULER.running:
+        return state
+    return apply_tick(state)
+
+
+def action_runs(action: ActionMessage) -> bool:
+    # whether apply_action does anything with this message: a "state" request,
+    # an item or puzzle message missing its field and a client tick while the
+    # server clock is running all leave the game as it is
+    if action.type == "item":
+        return action.item_id is not None
+    if action.type == "puzzle":
+        return action.correct is not None
+    if action.type == "tick":
+        return not SCHEDULER.running
+    return action.type == "move"
+
+
+def apply_action(state, action: ActionMessage):
+    # route a session-channel message to the matching game.actions function
+    if not action_runs(action):
+        return state
+    if action.type == "move":
+        return move_player(state, action.dx, action.dy)
+    if action.type == "item":
+        return apply_item(state, action.item_id)
+    if action.type == "puzzle":
+        return apply_puzzle_result(state, action.correct)
+    return apply_tick(state)
+
+
+def apply_actions(state, batch) -> int:
+    # apply in order until the game ends (victory also ends it); returns how
+    # many ran, not counting the messages that do nothing
+    applied = 0
+    for action in batch:
+        if state.is_game_over:
+            break
+        if action_runs(action):
+            apply_action(state, action)
+            applied += 1
+    return applied
+
+
+@app.websocket("/game/ws/{game_id}")
+async def game_socket(websocket: WebSocket, game_id: str):
+    # long-lived session channel: one message in, one state update out.
+    # after the first full snapshot the connection only receives deltas
+    # against the version it was last sent
+    async def push(action, since):
+        # apply and encode in one command; returns the body and the version it carries
+        return await COMMANDS.run(game_id, lambda state: (encode_state(action(state), since=since), state.version))
+
+    # accepted first: a close before the handshake reaches browsers as a plain
+    # rejection, without the 4404/4410 code that tells a missing game from an expired one
+    await websocket.accept()
+    try:
+        body, version = await push(lambda state: state, None)
+    except SessionGone:
+        await websocket.close(code=4410)
+        return
+    except SessionNotFound:
+        await websocket.close(code=4404)
+        return
+
+    await websocket.send_text(body.decode())
+
+    # server clock ticks are pushed to the client as they happen
+    ticked = asyncio.Event()
+    SCHEDULER.subscribe(game_id, ticked.set)
+    receive = asyncio.ensure_future(websocket.receive_text())
+    tick_wait = asyncio.ensure_future(ticked.wait())
+    try:
+        while True:
+            done, _ = await asyncio.wait({receive, tick_wait}, return_when=asyncio.FIRST_COMPLETED)
+            since = version
+            if tick_wait in done:
+                ticked.clear()
+                tick_wait = asyncio.ensure_future(ticked.wait())
+                if receive not in done:
+                    body, version = await push(lambda state: state, since)
+                    await websocket.send_text(body.decode())
+                    continue
 
+            raw = receive.result()
+            receive = asyncio.ensure_future(websocket.receive_text())
+            try:
+                action = ActionMessage.model_validate_json(raw)
+            except ValidationError as exc:
+                await websocket.send_json({"error": "invalid message", "detail": exc.errors(include_url=False)})
+                continue
+            # a "state" message asks for a full snapshot
+            if action.type == "state":
+                since = None
+            body, version = await push(lambda state: apply_action(state, action), since)
+            await websocket.send_text(body.decode())
+    except WebSocketDisconnect:
+        pass
+    except SessionNotFound:
+        # evicted or expired while connected
+        await websocket.close(code=4410)
+    finally:
+        SCHEDULER.unsubscribe(game_id, ticked.set)
+        receive.cancel()
+        tick_wait.cancel()
@@ -1,27 +1,63 @@
 # request/response model
-from pydantic import BaseModel
+from typing import List, Literal, Optional
+from pydantic import BaseModel, Field
+
+# most actions accepted by one /game/actions request
+MAX_ACTIONS = 64
+# largest maze edge a client may ask for
+MAX_MAZE_SIZE = 8193
+# highest level a game can start at (mazes stop growing long before this)
+MAX_LEVEL = 1000
 
 
 class MoveRequest(BaseModel):
     game_id: str
     dx: int
     dy: int
+    # state version the client already holds; when current, the reply is a delta
+    version: Optional[int] = None
 
 
 class ItemRequest(BaseModel):
     game_id: str
     item_id: str
+    version: Optional[int] = None
 
 
 class PuzzleRequest(BaseModel):
     game_id: str
     correct: bool
+    version: Optional[int] = None
 
 
 class TickRequest(BaseModel):
     game_id: str
+    version: Optional[int] = None
 
 
 class StartRequest(BaseModel):
     difficulty: str
-    level: int = 1
+    level: int = Field(1, ge=1, le=MAX_LEVEL)
+    # same seed, same maze and enemies (e.g. a daily challenge); random when omitted
+    seed: Optional[int] = Field(None, ge=0, lt=2 ** 63)
+    # maze edge in cells instead of the level's; large ones are explored by chunk.
+    # A game of any other size than the level's is unranked (kept off the leaderboard)
+    size: Optional[int] = Field(None, ge=5, le=MAX_MAZE_SIZE)
+    # the game just won; its next level may already be generated (see core.maze_pool.MazePool.reserve)
+    previous_game_id: Optional[str] = None
+
+
+class ActionMessage(BaseModel):
+    # one message on the /game/ws session channel
+    type: Literal["move", "item", "puzzle", "tick", "state"]
+    dx: int = 0
+    dy: int = 0
+    item_id: Optional[str] = None
+    correct: Optional[bool] = None
+
+
+class ActionsRequest(BaseModel):
+    # buffered inputs (e.g. a held arrow key), applied in order
+    game_id: str
+    actions: List[ActionMessage] = Field(max_length=MAX_ACTIONS)
+    version: Optional[int] = None
@@ -0,0 +1,211 @@
+import pytest
+
+pytest.importorskip("httpx")
+from fastapi.testclient import TestClient
+from main import app
+
+client = TestClient(app)
+
+
+def start(difficulty="easy"):
+    res = client.post("/game/start", json={"difficulty": difficulty})
+    assert res.status_code == 200
+    return res.json()
+
+
+def test_seeded_games_share_maze_and_enemies():
+    first = client.post("/game/start", json={"difficulty": "normal", "level": 3, "seed": 2024}).json()
+    second = client.post("/game/start", json={"difficulty": "normal", "level": 3, "seed": 2024}).json()
+    assert first["seed"] == 2024
+    assert first["game_id"] != second["game_id"]
+    assert first["maze"] == second["maze"]
+    assert [e["position"] for e in first["enemies"]] == [e["position"] for e in second["enemies"]]
+    assert client.post("/game/start", json={"difficulty": "easy", "seed": -1}).status_code == 422
+
+
+def test_session_socket_applies_actions():
+    game = start()
+    with client.websocket_connect(f"/game/ws/{game['game_id']}") as ws:
+        first = ws.receive_json()
+        assert first["player_position"] == game["player_position"]
+        ws.send_json({"type": "tick"})
+        assert ws.receive_json()["time_left"] == game["time_left"] - 1
+        ws.send_json({"type": "teleport"})
+        assert ws.receive_json()["error"] == "invalid message"
+
+
+def test_session_socket_closes_unknown_games_after_the_handshake(monkeypatch):
+    from starlette.websockets import WebSocketDisconnect
+    from core.storage import GAMES
+
+    # the connection is accepted, so the client gets the close code, not a rejected handshake
+    with client.websocket_connect("/game/ws/nope") as ws:
+        with pytest.raises(WebSocketDisconnect) as closed:
+            ws.receive_json()
+    assert closed.value.code == 4404
+
+    game = start()
+    monkeypatch.setattr(GAMES, "idle_ttl", 0)
+    GAMES.sweep()
+    with client.websocket_connect(f"/game/ws/{game['game_id']}") as ws:
+        with pytest.raises(WebSocketDisconnect) as closed:
+            ws.receive_json()
+    assert closed.value.code == 4410
+
+
+def test_server_clock_ticks_and_pushes_to_session():
+    from core.scheduler import SCHEDULER
+
+    old_interval = SCHEDULER.interval
+    SCHEDULER.interval = 0.05
+    try:
+        with TestClient(app) as live:
+            game = live.post("/game/start", json={"difficulty": "easy"}).json()
+            assert game["server_clock"] is True
+            with live.websocket_connect(f"/game/ws/{game['game_id']}") as ws:
+                ws.receive_json()
+                pushed = ws.receive_json()
+                assert pushed["time_left"] < game["time_left"]
+                # client ticks no longer advance time while the server clock runs
+                before = live.get(f"/game/state/{game['game_id']}").json()["time_left"]
+                after = live.post("/game/tick", json={"game_id": game["game_id"]}).json()["time_left"]
+                assert after <= before
+    finally:
+        SCHEDULER.interval = old_interval
+
+
+def test_delta_responses_follow_versions():
+    game = start("medium")
+    assert game["delta"] is False and "maze" in game
+    gid, version = game["game_id"], game["version"]
+
+    res = client.post("/game/tick", json={"game_id": gid, "version": version}).json()
+    assert res["delta"] is True
+    assert "maze" not in res
+    assert res["version"] == version + 1
+    assert res["time_left"] == game["time_left"] - 1
+    assert "difficulty" not in res
+
+    # stale version -> full snapshot
+    res = client.post("/game/tick", json={"game_id": gid, "version": version}).json()
+    assert res["delta"] is False and "maze" in res
+
+    # nothing changed -> empty delta at the same version
+    res2 = client.get(f"/game/state/{gid}", params={"version": res["version"]}).json()
+    assert res2["delta"] is True and res2["version"] == res["version"] and res2["cells"] == []
+
+
+def test_unknown_and_expired_games_are_clean_errors(monkeypatch):
+    from core.storage import GAMES
+
+    assert client.get("/game/state/nope").status_code == 404
+    game = start()
+    monkeypatch.setattr(GAMES, "idle_ttl", 0)
+    GAMES.sweep()
+    res = client.post("/game/move", json={"game_id": game["game_id"], "dx": 1, "dy": 0})
+    assert res.status_code == 410
+
+
+def test_out_of_range_start_requests_are_rejected():
+    # the level is stored in the action log header as an int32
+    for level in (0, 2 ** 31):
+        assert client.post("/game/start", json={"difficulty": "easy", "level": level}).status_code == 422
+
+
+def test_batched_actions_count_only_what_ran(monkeypatch):
+    import main
+
+    game = start()
+    noops = [{"type": "state"}, {"type": "item"}, {"type": "puzzle"}]
+    res = client.post("/game/actions", json={"game_id": game["game_id"], "actions": noops + [{"type": "tick"}]})
+    assert res.json()["applied"] == 1
+
+    # the server clock owns time: client ticks are ignored
+    monkeypatch.setattr(type(main.SCHEDULER), "running", property(lambda self: True))
+    res = client.post("/game/actions", json={"game_id": game["game_id"], "actions": [{"type": "tick"}] * 2})
+    assert res.json()["applied"] == 0
+    assert res.json()["time_left"] == game["time_left"] - 1
+
+
+def test_batched_actions_stop_at_game_over():
+    from core.storage import GAMES
+
+    game = start()
+    res = client.post("/game/actions", json={"game_id": game["game_id"], "actions": [{"type": "tick"}] * 3})
+    assert res.json()["applied"] == 3
+    assert res.json()["time_left"] == game["time_left"] - 3
+
+    GAMES[game["game_id"]].time_left = 1
+    body = res.json()
+    res = client.post("/game/actions", json={"game_id": game["game_id"], "version": body["version"], "actions": [{"type": "tick"}] * 3})
+    assert res.json()["applied"] == 1
+    assert res.json()["delta"] is True and res.json()["phase"] == "gameOver"
+
+    too_many = [{"type": "move", "dx": 1, "dy": 0}] * 65
+    assert client.post("/game/actions", json={"game_id": game["game_id"], "actions": too_many}).status_code == 422
+
+
+def test_metrics_endpoint_reports_routes_and_games():
+    from core.metrics import HTTP_LATENCY, HTTP_REQUESTS
+
+    route = "/game/state/{game_id}"
+    before = HTTP_LATENCY.count(route, "GET"), HTTP_REQUESTS.value(route, "GET", "404")
+    game = start("medium")
+    client.get(f"/game/state/{game['game_id']}")
+    client.get("/game/state/unknown")
+    assert HTTP_LATENCY.count(route, "GET") == before[0] + 2
+    assert HTTP_REQUESTS.value(route, "GET", "404") == before[1] + 1
+
+    from core.metrics import GAMES_FINISHED
+    from core.storage import GAMES
+
+    finished = GAMES_FINISHED.value("medium", "game_over")
+    GAMES[game["game_id"]].time_left = 1
+    client.post("/game/tick", json={"game_id": game["game_id"]})
+    client.post("/game/tick", json={"game_id": game["game_id"]})
+    # counted once, however often the finished game is touched
+    assert GAMES_FINISHED.value("medium", "game_over") == finished + 1
+
+    text = client.get("/metrics").text
+    assert 'mindmaze_http_request_seconds_bucket{route="/game/state/{game_id}",method="GET",le="+Inf"}' in text
+    assert 'mindmaze_games_started_total{difficulty="medium"}' in text
+    assert 'mindmaze_serialize_state_seconds_count{kind="full"}' in text
+    assert "mindmaze_live_sessions " in text
+    stats = GAMES.stats()
+    assert f"mindmaze_sessions_evicted {stats['evicted']}" in text
+    assert f"mindmaze_sessions_expired {stats['expired']}" in text
+
+
+def test_api_benchmark_smoke():
+    import asyncio
+    from benchmarks.bench_api import run
+
+    results = asyncio.run(run(players=2, rounds=2, burst=2, seed=1))
+    for result in results.values():
+        assert set(result["routes"]) >= {"/game/start", "/game/move", "/game/tick", "/game/state/{game_id}"}
+        assert all(stats["errors"] == 0 for stats in result["routes"].values())
+
+
+def test_action_log_endpoint_replays_to_the_served_state():
+    from game.replay import replay
+
+    game = start("medium")
+    moved = client.post("/game/move", json={"game_id": game["game_id"], "dx": 1, "dy": 0}).json()
+    res = client.get(f"/game/log/{game['game_id']}")
+    assert res.headers["content-type"] == "application/octet-stream"
+    state = replay(res.content)
+    assert (state.player.x, state.player.y) == (moved["player_position"]["x"], moved["player_position"]["y"])
+    assert client.get("/game/log/missing").status_code == 404
+
+
+def test_huge_mazes_are_served_by_chunk():
+    game = client.post("/game/start", json={"difficulty": "easy", "size": 2001}).json()
+    assert "maze" not in game and game["maze_width"] == 2001
+    # other sizes than the level's stay off the leaderboard
+    assert game["ranked"] is False
+    assert client.post("/game/start", json={"difficulty": "easy", "size": 7}).json()["ranked"] is False
+    assert client.post("/game/start", json={"difficulty": "easy", "size": 8}).json()["ranked"] is True
+    chunk = client.get(f"/game/chunk/{game['game_id']}/3/2").json()
+    assert (chunk["x"], chunk["y"]) == (3 * game["chunk_size"], 2 * game["chunk_size"])
+    assert client.get(f"/game/chunk/{game['game_id']}/500/0").status_code == 404
+    assert client.post("/game/start", json={"difficulty": "easy", "size": 10 ** 6}).status_code == 422
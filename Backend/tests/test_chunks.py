@@ -0,0 +1,63 @@
+import pickle
+from collections import deque
+from core.game_manager import create_game, serialize_state
+from core.maze_pool import build_chunked_layout
+from game.actions import move_player
+from game.chunks import CHUNK_SIZE, RESIDENT_CHUNKS, ChunkedGrid
+from game.replay import replay, verify
+from game.state import Difficulty
+
+
+def test_chunked_maze_is_connected_and_deterministic():
+    layout = build_chunked_layout(101, "medium", seed=9)
+    maze = layout.maze
+    seen = {(1, 1)}
+    queue = deque(seen)
+    while queue:
+        x, y = queue.popleft()
+        for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+            if (nx, ny) not in seen and maze[ny][nx] != 1:
+                seen.add((nx, ny))
+                queue.append((nx, ny))
+    assert layout.exit_pos in seen and layout.keys[0] in seen
+    # every odd cell is part of the maze, the border is wall
+    assert all((x, y) in seen for x in range(1, 100, 2) for y in range(1, 100, 2))
+    assert all(maze[0][x] == 1 and maze[100][x] == 1 for x in range(101))
+
+    again = ChunkedGrid(101, 101, 9, "medium", maze.overrides)
+    assert again.chunk_rows(2, 1) == maze.chunk_rows(2, 1)
+
+
+def test_chunks_are_dropped_and_rebuilt_with_writes():
+    maze = ChunkedGrid(1025, 1025, 3)
+    maze[5][5] = 7
+    for cy in range(RESIDENT_CHUNKS + 4):
+        maze.chunk(cy, cy)
+    assert len(maze.chunks) == RESIDENT_CHUNKS
+    assert (0, 0) not in maze.chunks
+    assert maze[5][5] == 7
+    restored = pickle.loads(pickle.dumps(maze))
+    assert not restored.chunks
+    assert restored[5][5] == 7 and len(restored.chunks) == 1
+
+
+def test_huge_game_sends_only_viewport_chunks():
+    state = create_game(Difficulty.MEDIUM, size=4097, seed=1)
+    full = serialize_state(state)
+    assert "maze" not in full
+    assert full["maze_width"] == 4097 and full["chunk_size"] == CHUNK_SIZE
+    assert [(c["cx"], c["cy"]) for c in full["chunks"]] == [(0, 0)]
+    assert len(state.maze.chunks) <= RESIDENT_CHUNKS
+
+    # one step, then far enough right for the viewport to reach the next chunk
+    dx, dy = next(d for d in ((1, 0), (0, 1)) if state.maze[1 + d[1]][1 + d[0]] != 1)
+    move_player(state, dx, dy)
+    assert verify(state) == []
+    assert replay(state.action_log).maze.overrides == state.maze.overrides
+    step = serialize_state(state, since=full["version"])
+    assert "chunks" not in step
+
+    state.player.x, state.player.y = CHUNK_SIZE - 3, 1
+    delta = serialize_state(state, since=step["version"])
+    assert [(c["cx"], c["cy"]) for c in delta["chunks"]] == [(1, 0)]
+    assert len(delta["chunks"][0]["rows"]) == CHUNK_SIZE
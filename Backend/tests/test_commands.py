@@ -0,0 +1,42 @@
+import asyncio
+import time
+from core.commands import CommandQueue
+from core.game_manager import create_game
+from core.storage import GAMES
+from game.state import Difficulty
+
+
+def slow_increment(state):
+    # read-modify-write with a thread switch in the middle
+    score = state.score
+    time.sleep(0.001)
+    state.score = score + 1
+    return state.score
+
+
+def test_commands_for_one_game_run_in_order():
+    state = create_game(Difficulty.EASY)
+    queue = CommandQueue(GAMES, offload=True)
+
+    async def main():
+        return await asyncio.gather(*(queue.run(state.game_id, slow_increment) for _ in range(40)))
+
+    results = asyncio.run(main())
+    assert results == list(range(1, 41))
+    assert GAMES[state.game_id].score == 40
+    # locks go away with their last command
+    assert queue.pending() == 0 and not queue._locks
+
+
+def test_inline_queue_reports_missing_games():
+    queue = CommandQueue(GAMES)
+    assert queue.offload is False
+
+    async def main():
+        try:
+            await queue.run("missing", slow_increment)
+        except KeyError:
+            return True
+
+    assert asyncio.run(main()) is True
+    assert not queue._locks
@@ -0,0 +1,40 @@
+import copy
+import json
+
+from core.encoding import maze_bytes
+from core.game_manager import encode_state, serialize_state
+from game.grid import Grid
+from game.landmarks import set_cell
+from game.state import GameState, Player, Difficulty
+
+
+def make_state():
+    maze = [[0 for _ in range(8)] for _ in range(8)]
+    maze[7][7] = 2
+    return GameState(
+        game_id="test",
+        difficulty=Difficulty.MEDIUM,
+        player=Player(x=7, y=7, health=100, energy=50, lives=1),
+        enemies=[],
+        maze=Grid.from_rows(maze),
+        time_left=100,
+        score=0,
+        inventory={},
+        level=1,
+        is_game_over=False,
+        is_victory=False,
+        lives=1,
+        keys_required=1,
+    )
+
+
+def test_encoded_state_matches_serialize_and_caches_maze():
+    state = make_state()
+    state.maze[0][1] = 5
+    twin = copy.deepcopy(state)
+    assert json.loads(encode_state(state, applied=2)) == {**serialize_state(twin), "applied": 2}
+
+    cached = maze_bytes(state.maze)
+    assert maze_bytes(state.maze) is cached
+    set_cell(state, 1, 0, 0)
+    assert json.loads(maze_bytes(state.maze))[0][1] == 0
@@ -0,0 +1,54 @@
+from game.enemies import move_enemies
+from game.state import GameState, Player, Enemy, Difficulty
+
+
+def test_chasers_share_one_flow_field_per_player_position():
+    from game.grid import Grid
+    from game import pathing
+
+    maze = Grid.from_rows([[0] * 7 for _ in range(7)])
+    enemies = [
+        Enemy(id="c", x=6, y=6, pattern="chase"),
+        Enemy(id="a", x=6, y=0, pattern="ambush"),
+        Enemy(id="p", x=0, y=6, pattern="patrol"),
+    ]
+    state = GameState("g", Difficulty.EASY, Player(x=0, y=0, health=100, energy=50), enemies, maze, 60, 0, {})
+
+    searches = []
+    original = pathing.bfs
+    pathing.bfs = lambda *args: searches.append(args) or original(*args)
+    try:
+        move_enemies(state)
+        move_enemies(state)
+        state.player.x = 1
+        move_enemies(state)
+    finally:
+        pathing.bfs = original
+
+    # one search per player position, not one per enemy or tick
+    assert len(searches) == 2
+    chaser, ambusher, patroller = enemies
+    assert abs(chaser.x) + abs(chaser.y) == 9  # three steps closer along the field
+    assert (ambusher.x, ambusher.y) == (6, 0)  # player still out of range
+    assert (patroller.x, patroller.y) == (3, 6)
+
+
+def test_player_who_keeps_moving_outruns_a_chaser():
+    from game.actions import apply_tick, move_player
+    from game.grid import Grid
+
+    # a long corridor along the top of a (square) maze, chaser two cells behind the player
+    maze = Grid.from_rows([[1] * 30, [1] + [0] * 28 + [1]] + [[1] * 30 for _ in range(28)])
+    chaser = Enemy(id="c", x=1, y=1, pattern="chase")
+    state = GameState("g", Difficulty.MEDIUM, Player(x=3, y=1, health=100, energy=500), [chaser], maze, 600, 0, {})
+    # a few moves per second of game clock, as any player walking the maze makes
+    for _ in range(12):
+        move_player(state, 1, 0)
+        move_player(state, 1, 0)
+        apply_tick(state)
+        assert not state.is_game_over
+    assert state.player.x - chaser.x > 2
+    # standing still, the chaser does catch up
+    while not state.is_game_over:
+        apply_tick(state)
+    assert (chaser.x, chaser.y) == (state.player.x, state.player.y)
@@ -0,0 +1,33 @@
+import logging
+
+from game import events
+from game.state import GameState, Player, Difficulty
+from game.victory import check_victory
+
+
+def test_game_events_are_structured_and_off_by_default():
+    class Collect(logging.Handler):
+        def __init__(self):
+            super().__init__()
+            self.records = []
+
+        def emit(self, record):
+            self.records.append(record)
+
+    state = GameState(
+        game_id="g", difficulty=Difficulty.EASY, player=Player(x=1, y=1, health=100, energy=50),
+        enemies=[], maze=[[0, 0, 0], [0, 0, 0], [0, 0, 2]], time_left=0, score=0, inventory={},
+    )
+    assert not events.logger.isEnabledFor(logging.CRITICAL)
+
+    handler = Collect()
+    events.configure("INFO", handler=handler)
+    try:
+        events.emit(logging.DEBUG, "wall_hit", state, health=90)
+        check_victory(state)
+    finally:
+        events.shutdown()
+    assert [r.event for r in handler.records] == ["game_over"]
+    record = handler.records[0]
+    assert record.game_id == "g" and record.position == (1, 1) and record.values == {"cause": "time_left=0"}
+    assert not events.logger.isEnabledFor(logging.CRITICAL)
@@ -0,0 +1,122 @@
+import pytest
+
+from core.leaderboard import Leaderboard
+from game.state import Difficulty, GameState, Player
+
+
+def won(game_id, score, difficulty=Difficulty.EASY, level=1):
+    return GameState(
+        game_id=game_id,
+        difficulty=difficulty,
+        player=Player(x=1, y=1, health=100, energy=50),
+        enemies=[],
+        maze=[[0]],
+        time_left=60,
+        score=score,
+        inventory={},
+        level=level,
+        is_game_over=True,
+        is_victory=True,
+    )
+
+
+def test_boards_rank_by_score_then_finish_order(tmp_path):
+    board = Leaderboard(str(tmp_path / "scores.db"), top_k=3)
+    for game_id, score in (("a", 50), ("b", 90), ("c", 50), ("d", 70)):
+        board.record(won(game_id, score))
+    board.record(won("other", 100, level=2))
+    # recorded once, and only victories
+    assert board.record(won("a", 99)) is None
+    lost = won("lost", 0)
+    lost.is_victory = False
+    assert board.record(lost) is None
+
+    assert [e["game_id"] for e in board.top("easy", 1)] == ["b", "d", "a", "c"]
+    assert [(e["rank"], e["game_id"]) for e in board.top("easy", 1, limit=2, offset=2)] == [(3, "a"), (4, "c")]
+    assert board.rank("c")["rank"] == 4 and board.rank("other")["rank"] == 1
+    assert board.rank("nope") is None
+
+    # the cached top 3 follows inserts; deeper ranks still come from the database
+    board.record(won("e", 80))
+    assert [e["game_id"] for e in board.top("easy", 1, limit=3)] == ["b", "e", "d"]
+    assert board.rank("c")["rank"] == 5 and board.rank("e")["rank"] == 2
+
+
+def test_unranked_games_stay_off_the_board(tmp_path):
+    from core.game_manager import create_game
+
+    board = Leaderboard(str(tmp_path / "scores.db"))
+    # a custom maze size or a known seed
+    for state in (create_game(Difficulty.EASY, size=5), create_game(Difficulty.EASY, seed=7)):
+        assert not state.ranked
+        state.is_game_over = state.is_victory = True
+        state.score = 999
+        assert board.record(state) is None
+        board.submit(state)
+    assert board.top("easy", 1) == []
+    assert create_game(Difficulty.EASY).ranked
+
+
+def test_other_writers_invalidate_the_cache(tmp_path):
+    path = str(tmp_path / "scores.db")
+    mine, theirs = Leaderboard(path), Leaderboard(path)
+    mine.record(won("a", 40))
+    assert [e["game_id"] for e in mine.top("easy", 1)] == ["a"]
+    # another worker process wins a game
+    theirs.record(won("b", 60))
+    assert [e["game_id"] for e in mine.top("easy", 1)] == ["b", "a"]
+
+
+def test_submitted_wins_are_written_off_the_callers_thread(tmp_path):
+    import sqlite3
+    import time
+
+    path = str(tmp_path / "scores.db")
+    board = Leaderboard(path)
+    board.top("easy", 1)
+    # another worker holds the write lock
+    other = sqlite3.connect(path, isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+    started = time.perf_counter()
+    board.submit(won("a", 10))
+    assert time.perf_counter() - started < 0.5
+    other.execute("ROLLBACK")
+    # reads wait for what this process submitted
+    assert [e["game_id"] for e in board.top("easy", 1)] == ["a"]
+    board.close()
+
+
+def test_top_pages_come_off_the_index(tmp_path):
+    board = Leaderboard(str(tmp_path / "scores.db"))
+    board.record(won("a", 1))
+    plan = " ".join(row[-1] for row in board._conn().execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM scores WHERE difficulty = 'easy' AND level = 1 ORDER BY score DESC, id LIMIT 100"
+    ))
+    assert "scores_board" in plan and "TEMP B-TREE" not in plan
+
+
+def test_victories_reach_the_leaderboard_endpoints(tmp_path, monkeypatch):
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+
+    import main
+    from core import game_manager
+    from game.victory import check_victory
+
+    board = Leaderboard(str(tmp_path / "scores.db"))
+    monkeypatch.setattr(game_manager, "LEADERBOARD", board)
+    monkeypatch.setattr(main, "LEADERBOARD", board)
+    client = TestClient(main.app)
+
+    state = game_manager.create_game(Difficulty.MEDIUM, level=2)
+    state.player.x, state.player.y = state.landmarks.exit
+    state.keys_collected = state.keys_required
+    # the win is ranked once its update is saved
+    game_manager.update_game(state.game_id, check_victory)
+
+    page = client.get("/leaderboard/normal/2").json()
+    assert page["difficulty"] == "medium" and [e["game_id"] for e in page["entries"]] == [state.game_id]
+    assert page["entries"][0]["score"] == state.score > 0
+    assert client.get(f"/leaderboard/rank/{state.game_id}").json()["rank"] == 1
+    assert client.get("/leaderboard/rank/unknown").status_code == 404
+    assert client.get("/leaderboard/easy/1?limit=500").status_code == 422
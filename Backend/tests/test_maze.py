@@ -0,0 +1,102 @@
+import pytest
+from collections import deque
+from game.maze import generate_maze, maze_size
+
+
+def reachable_from(maze, start):
+    size = len(maze)
+    seen = {start}
+    q = deque([start])
+    while q:
+        cx, cy = q.popleft()
+        for ox, oy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+            nx, ny = cx + ox, cy + oy
+            if 0 <= nx < size and 0 <= ny < size and maze[ny][nx] != 1 and (nx, ny) not in seen:
+                seen.add((nx, ny))
+                q.append((nx, ny))
+    return seen
+
+
+@pytest.mark.parametrize("difficulty", ["easy", "medium", "impossible"])
+def test_maze_contract(difficulty):
+    maze, traps, keys, exit_pos = generate_maze(12, difficulty)
+    assert len(maze) == 13 and all(len(row) == 13 for row in maze)
+    assert all(cell in (0, 1, 2, 3, 4, 5) for row in maze for cell in row)
+    assert maze[1][1] == 3
+    assert exit_pos == (11, 11) and maze[11][11] == 2
+    assert all(maze[y][x] == 4 for x, y in traps)
+    assert len(keys) == 1 and maze[keys[0][1]][keys[0][0]] == 5
+    # border stays solid
+    assert all(c == 1 for c in maze[0]) and all(c == 1 for c in maze[-1])
+    assert all(row[0] == 1 and row[-1] == 1 for row in maze)
+
+
+def test_exit_and_key_reachable_from_start():
+    maze, _, keys, exit_pos = generate_maze(21, "medium")
+    seen = reachable_from(maze, (1, 1))
+    assert exit_pos in seen
+    assert keys[0] in seen
+
+
+def test_maze_size_is_the_generated_edge():
+    for size in (3, 8, 12, 27):
+        assert len(generate_maze(size)[0]) == maze_size(size)
+
+
+def test_large_maze_does_not_hit_recursion_limit():
+    maze, _, keys, exit_pos = generate_maze(401, "impossible")
+    assert len(maze) == 401
+    assert exit_pos in reachable_from(maze, (1, 1))
+
+
+def test_grid_rows_read_and_write_in_place():
+    import pickle
+    from game.grid import Grid
+
+    maze, _, _, _ = generate_maze(12, "easy")
+    assert isinstance(maze, Grid) and len(maze.cells) == 13 * 13
+    maze[2][3] = 4
+    assert maze.cells[2 * 13 + 3] == 4 and maze[-11][3] == 4
+    assert maze.to_rows()[2][3] == 4
+    assert pickle.loads(pickle.dumps(maze)) == maze
+    with pytest.raises(IndexError):
+        maze[13]
+
+
+def test_game_state_rejects_undeclared_attributes():
+    from game.state import GameState, Player, Difficulty
+
+    state = GameState("g", Difficulty.EASY, Player(1, 1, 100, 50), [], generate_maze(8)[0], 10, 0, {})
+    state.player_hit = True
+    with pytest.raises(AttributeError):
+        state.undeclared = True
+
+
+def test_maze_quality_metrics_and_report(tmp_path):
+    import json
+    from game.grid import Grid
+    from tools.maze_quality import analyze, collect, write
+
+    # a ring corridor around one wall: a single loop, no dead ends; the key's
+    # side of the ring is as long as the other, so the route takes no detour
+    maze = Grid.from_rows([
+        [1, 1, 1, 1, 1],
+        [1, 3, 0, 5, 1],
+        [1, 4, 1, 0, 1],
+        [1, 0, 0, 2, 1],
+        [1, 1, 1, 1, 1],
+    ])
+    metrics = analyze(maze, [(3, 1)], (3, 3))
+    assert metrics["loop_count"] == 1 and metrics["dead_end_ratio"] == 0
+    assert metrics["solution_length"] == 4 and metrics["key_detour"] == 0
+    assert metrics["branching_factor"] == 0 and metrics["trap_density"] == 0
+
+    stats = collect(["impossible"], {"impossible": [8]}, mazes=30, workers=1, batch=7)
+    summary = stats[("impossible", 8)]
+    assert summary["loop_count"]["count"] == 30 and summary["loop_count"]["min"] >= 1
+    assert summary["solution_length"]["p50"] <= summary["solution_length"]["max"]
+    csv_path, json_path = write(stats, str(tmp_path), level=1)
+    with open(json_path) as f:
+        assert json.load(f)["mazes"]["impossible"]["8"]["key_detour"]["count"] == 30
+    with open(csv_path) as f:
+        assert f.readline().startswith("difficulty,size,level,metric,bin,count")
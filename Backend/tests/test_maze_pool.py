@@ -0,0 +1,117 @@
+from concurrent.futures import ThreadPoolExecutor
+from core.maze_pool import MazePool, build_layout
+
+
+def test_build_layout_marks_start_and_critical_path():
+    layout = build_layout(8, "easy")
+    assert layout.landmarks.start == (1, 1)
+    assert layout.maze[1][1] == 3
+    assert layout.landmarks.keys == set(layout.keys)
+    assert layout.landmarks.start in layout.critical
+    assert layout.exit_pos in layout.critical
+
+
+def test_acquire_falls_back_to_sync_generation_when_empty():
+    pool = MazePool(low_watermark=1, high_watermark=2)
+    layout = pool.acquire("easy", 8)
+    assert len(layout.maze) == 9
+    # not started: nothing is generated in the background
+    assert pool.available("easy", 8) == 0
+
+
+def test_refill_up_to_high_watermark():
+    pool = MazePool(low_watermark=2, high_watermark=4)
+    executor = ThreadPoolExecutor(max_workers=2)
+    pool.start(executor)
+    pool.warm("medium", 12)
+    executor.shutdown(wait=True)
+    assert pool.available("medium", 12) == 4
+    pool.acquire("medium", 12)
+    pool.acquire("medium", 12)
+    # still at the low watermark: no refill requested
+    assert pool.available("medium", 12) == 2
+    pool.shutdown()
+
+
+def test_seeded_layouts_are_deterministic():
+    a = build_layout(21, "medium", seed=7)
+    b = build_layout(21, "medium", seed=7)
+    assert a.maze == b.maze and a.keys == b.keys and a.traps == b.traps
+    assert build_layout(21, "medium", seed=8).maze != a.maze
+
+
+def test_seeded_acquire_is_cached_and_copied():
+    pool = MazePool(cache_size=2)
+    first = pool.acquire("easy", 8, seed=3)
+    second = pool.acquire("easy", 8, seed=3)
+    assert len(pool.seeded) == 1
+    assert first.maze == second.maze and first.maze is not second.maze
+    # one game taking its key does not change the cached layout
+    key = first.keys[0]
+    first.maze[key[1]][key[0]] = 0
+    first.landmarks.keys.clear()
+    third = pool.acquire("easy", 8, seed=3)
+    assert third.maze[key[1]][key[0]] == 5 and third.landmarks.keys == {key}
+    pool.acquire("easy", 8, seed=4)
+    pool.acquire("easy", 8, seed=5)
+    assert len(pool.seeded) == 2
+
+
+def test_reserved_layout_goes_to_its_owner():
+    pool = MazePool()
+    # not started: nothing is reserved
+    assert not pool.reserve("g1", "easy", 12, level=2)
+    executor = ThreadPoolExecutor(max_workers=1)
+    pool.start(executor)
+    assert pool.reserve("g1", "easy", 12, level=2)
+    assert not pool.reserve("g1", "easy", 12, level=2)
+    reserved = pool._reserved["g1"][1].result()
+    # only the owner, asking for the same level, gets it
+    assert pool.acquire("easy", 12, level=2) is not reserved
+    assert pool.acquire("easy", 12, level=2, owner="g1") is reserved
+    assert pool.reserved() == 0
+    pool.reserve("g2", "easy", 12, level=2)
+    assert pool.acquire("easy", 18, level=3, owner="g2") is not None
+    assert pool.reserved() == 0
+    pool.shutdown()
+
+
+def test_ready_when_acquire_would_not_generate():
+    pool = MazePool(inline_max_size=10, chunked_min_size=100)
+    # small and chunked mazes are always ready
+    assert pool.ready("easy", 8) and pool.ready("easy", 101)
+    assert not pool.ready("easy", 41, seed=3)
+    pool.acquire("easy", 41, seed=3)
+    assert pool.ready("easy", 41, seed=3)
+    assert not pool.ready("easy", 41)
+    executor = ThreadPoolExecutor(max_workers=1)
+    pool.start(executor)
+    pool.reserve("g1", "easy", 41, level=2)
+    pool._reserved["g1"][1].result()
+    assert pool.ready("easy", 41, level=2, owner="g1")
+    assert not pool.ready("easy", 41, level=2, owner="g2")
+    pool.shutdown()
+
+
+def test_key_pickup_reserves_the_next_level(monkeypatch):
+    from core import game_manager
+    from game.state import Difficulty
+
+    pool = MazePool()
+    pool.start(ThreadPoolExecutor(max_workers=1))
+    monkeypatch.setattr(game_manager, "MAZE_POOL", pool)
+    first = game_manager.create_game(Difficulty.MEDIUM, level=1)
+    second = game_manager.create_game(Difficulty.MEDIUM, level=3)
+    assert len(second.maze) > len(first.maze)
+    assert len(second.enemies) > len(first.enemies) and second.time_left > first.time_left
+
+    def take_key(state):
+        state.keys_collected = state.keys_required
+
+    game_manager.update_game(first.game_id, take_key)
+    game_manager.update_game(first.game_id, take_key)
+    assert pool.reserved() == 1
+    reserved = pool._reserved[first.game_id][1].result()
+    nxt = game_manager.create_game(Difficulty.MEDIUM, level=2, previous_game_id=first.game_id)
+    assert nxt.maze is reserved.maze and nxt.time_limit == game_manager.level_settings(Difficulty.MEDIUM, 2).time_left
+    pool.shutdown()
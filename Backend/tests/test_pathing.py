@@ -0,0 +1,52 @@
+from game.grid import Grid
+from game.maze import generate_maze
+from game.pathing import bfs, distance_field, shortest_path
+from game.state import GameState, Player, Difficulty
+from game.landmarks import set_cell
+
+
+def test_multi_source_distances_and_paths():
+    maze = Grid.from_rows([
+        [0, 0, 0, 0, 0],
+        [0, 1, 1, 1, 0],
+        [0, 0, 0, 1, 0],
+    ])
+    field = bfs(maze, [(0, 0), (4, 2)])
+    assert field.distance(0, 0) == 0 and field.distance(4, 2) == 0
+    assert field.distance(2, 0) == 2
+    assert field.distance(2, 2) == 4  # via (0, 0); the way from (4, 2) is walled off
+    assert field.distance(1, 1) == -1 and field.distance(9, 9) == -1
+    assert field.path_from(2, 2) == [(2, 2), (1, 2), (0, 2), (0, 1), (0, 0)]
+    assert field.step_from(2, 2) == (1, 2)
+    assert field.reachable()[:2] == [(0, 0), (4, 2)]
+
+
+def test_limited_search_stops_at_the_limit():
+    maze = Grid.from_rows([[0] * 9])
+    field = bfs(maze, [(0, 0)], limit=3)
+    assert [field.distance(x, 0) for x in range(5)] == [0, 1, 2, 3, -1]
+    assert field.step_from(3, 0) == (2, 0) and field.step_from(4, 0) is None
+    assert field.reachable() == [(0, 0), (1, 0), (2, 0), (3, 0)]
+
+
+def test_paths_are_shortest_on_generated_mazes():
+    maze, _, keys, exit_pos = generate_maze(21, "medium")
+    path = shortest_path(maze, (1, 1), exit_pos)
+    assert path[0] == (1, 1) and path[-1] == exit_pos
+    assert all(abs(ax - bx) + abs(ay - by) == 1 for (ax, ay), (bx, by) in zip(path, path[1:]))
+    assert all(maze[y][x] != 1 for x, y in path)
+    assert len(path) - 1 == distance_field(maze, exit_pos).distance(1, 1)
+
+
+def test_fields_are_cached_until_a_wall_changes():
+    maze, _, _, exit_pos = generate_maze(12, "easy")
+    # generate_maze already searched from the exit
+    field = distance_field(maze, exit_pos)
+    assert distance_field(maze, exit_pos) is field
+
+    state = GameState("g", Difficulty.EASY, Player(1, 1, 100, 50), [], maze, 10, 0, {})
+    # walkable -> walkable keeps the cache
+    set_cell(state, 1, 1, 0)
+    assert distance_field(maze, exit_pos) is field
+    set_cell(state, 1, 1, 1)
+    assert distance_field(maze, exit_pos) is not field
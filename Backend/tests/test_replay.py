@@ -0,0 +1,53 @@
+import random
+import pytest
+from core.game_manager import create_game
+from game.action_log import start_log
+from game.actions import apply_item, apply_puzzle_result, apply_tick, move_player
+from game.replay import replay, verify
+from game.state import Difficulty
+
+
+def play(state, rng, steps):
+    for _ in range(steps):
+        r = rng.random()
+        if r < 0.7:
+            move_player(state, *rng.choice([(1, 0), (-1, 0), (0, 1), (0, -1)]))
+        elif r < 0.85:
+            apply_tick(state)
+        elif r < 0.9:
+            move_player(state, rng.randint(-3, 3), 2 ** 40)
+        elif r < 0.95:
+            apply_item(state, rng.choice(["health_potion", "energy_boost", "x" * 300]))
+        else:
+            apply_puzzle_result(state, rng.random() < 0.5)
+
+
+@pytest.mark.parametrize("difficulty", list(Difficulty))
+def test_replay_matches_live_game(difficulty):
+    rng = random.Random(difficulty.value)
+    for level, seed in ((1, None), (3, 11)):
+        state = create_game(difficulty, level=level, seed=seed)
+        state.inventory = {"health_potion": 2, "energy_boost": 1}
+        start_log(state)
+        play(state, rng, 300)
+        assert verify(state) == []
+        again = replay(state.action_log)
+        assert again.action_log == state.action_log
+        assert again.seed == seed and again.level == level
+
+
+def test_verify_reports_tampered_fields():
+    state = create_game(Difficulty.EASY)
+    play(state, random.Random(1), 50)
+    state.score += 40
+    state.player.x += 1
+    assert verify(state) == ["player", "score"]
+
+
+def test_corrupt_logs_are_rejected():
+    state = create_game(Difficulty.MEDIUM)
+    move_player(state, 5, 0)
+    with pytest.raises(ValueError):
+        replay(state.action_log[:-3])
+    with pytest.raises(ValueError):
+        replay(b"nope" + bytes(state.action_log[4:]))
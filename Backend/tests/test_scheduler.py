@@ -0,0 +1,88 @@
+import asyncio
+import time
+from core.scheduler import TickScheduler
+from core.storage import SessionStore
+from game.state import GameState, Player, Difficulty
+
+
+def make_state(game_id, is_game_over=False):
+    maze = [[0 for _ in range(5)] for _ in range(5)]
+    maze[4][4] = 2
+    return GameState(
+        game_id=game_id,
+        difficulty=Difficulty.EASY,
+        player=Player(x=0, y=0, health=100, energy=50),
+        enemies=[],
+        maze=maze,
+        time_left=10,
+        score=0,
+        inventory={},
+        is_game_over=is_game_over,
+    )
+
+
+def test_tick_all_advances_live_games_in_batches():
+    games = SessionStore()
+    for i in range(5):
+        games[f"g{i}"] = make_state(f"g{i}")
+    games["done"] = make_state("done", is_game_over=True)
+    scheduler = TickScheduler(games, batch_size=2)
+    pushed = []
+    scheduler.subscribe("g0", lambda: pushed.append("g0"))
+
+    asyncio.run(scheduler.tick_all(epoch=7))
+    # the same epoch is never applied twice (e.g. by a second worker)
+    asyncio.run(scheduler.tick_all(epoch=7))
+
+    assert all(games[f"g{i}"].time_left == 9 for i in range(5))
+    assert games["done"].time_left == 10
+    assert pushed == ["g0", "g0"]
+    assert scheduler.ticks == 2
+
+
+def test_run_loop_catches_up_after_stall():
+    games = SessionStore()
+    games["g"] = make_state("g")
+    scheduler = TickScheduler(games, interval=0.01, max_catch_up=2)
+
+    async def main():
+        scheduler.start()
+        await asyncio.sleep(0.015)
+        # block the loop for several intervals
+        time.sleep(0.08)
+        await asyncio.sleep(0.02)
+        await scheduler.stop()
+
+    asyncio.run(main())
+    assert scheduler.max_lag > 0.05
+    assert scheduler.skipped_ticks > 0
+    assert not scheduler.running
+
+
+def test_blocking_backends_tick_their_own_games_off_the_loop(tmp_path):
+    import threading
+
+    from core.sqlite_storage import SqliteSessionStore
+
+    path = str(tmp_path / "sessions.db")
+    mine, theirs = SqliteSessionStore(path), SqliteSessionStore(path)
+    mine["a"] = make_state("a")
+    theirs["b"] = make_state("b")
+    scheduler = TickScheduler(mine)
+    loop_thread = threading.get_ident()
+    peeked = []
+    peek = mine.peek
+
+    def tracked(game_id):
+        peeked.append((game_id, threading.get_ident() != loop_thread))
+        return peek(game_id)
+
+    mine.peek = tracked
+    asyncio.run(scheduler.tick_all(epoch=7))
+    # only the game this worker owns is read, and not on the event loop
+    assert peeked == [("a", True)]
+    assert mine["a"].time_left == 9 and mine["b"].time_left == 10
+
+    # a player action saved by this worker hands the game over to it
+    mine.update("b", lambda state: None)
+    assert sorted(mine.active_ids()) == ["a", "b"] and theirs.active_ids() == []
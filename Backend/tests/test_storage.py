@@ -0,0 +1,124 @@
+import pytest
+from core.storage import SessionStore, SessionGone, SessionNotFound
+from game.state import GameState, Player, Difficulty
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_state(game_id, size=5):
+    return GameState(
+        game_id=game_id,
+        difficulty=Difficulty.EASY,
+        player=Player(x=0, y=0, health=100, energy=50),
+        enemies=[],
+        maze=[[0] * size for _ in range(size)],
+        time_left=10,
+        score=0,
+        inventory={},
+    )
+
+
+def test_lru_eviction_over_max_sessions():
+    store = SessionStore(max_sessions=2)
+    store["a"] = make_state("a")
+    store["b"] = make_state("b")
+    store["a"]  # touch: b is now least recently used
+    store["c"] = make_state("c")
+    assert set(store) == {"a", "c"}
+    assert store.stats()["evicted"] == 1
+    with pytest.raises(SessionGone) as exc:
+        store["b"]
+    assert exc.value.reason == "evicted"
+    with pytest.raises(SessionNotFound):
+        store["never"]
+
+
+def test_byte_budget_evicts_oldest():
+    store = SessionStore(max_bytes=1)
+    store["a"] = make_state("a")
+    store["b"] = make_state("b")
+    assert list(store) == ["b"]
+    assert store.stats()["bytes"] > 0
+
+
+def test_sweep_expires_idle_and_finished_sessions():
+    clock = FakeClock()
+    store = SessionStore(idle_ttl=100, finished_ttl=10, clock=clock)
+    store["idle"] = make_state("idle")
+    store["done"] = make_state("done")
+    store["done"].is_game_over = True
+    store["fresh"] = make_state("fresh")
+
+    clock.now = 20
+    store["fresh"]
+    assert store.sweep() == 1
+    assert "done" not in store and "idle" in store
+
+    clock.now = 150
+    # the scheduler's peek does not keep a session alive
+    assert store.peek("idle") is not None
+    assert store.sweep() == 2
+    assert len(store) == 0
+    assert store.stats()["expired"] == 3
+    with pytest.raises(SessionGone):
+        store["idle"]
+
+
+def test_sqlite_backend_roundtrip_and_conflict(tmp_path):
+    from core.sqlite_storage import SqliteSessionStore
+    from core.storage import SessionConflict
+
+    store = SqliteSessionStore(str(tmp_path / "sessions.db"))
+    store["a"] = make_state("a")
+    first = store["a"]
+    second = store["a"]
+    first.score = 5
+    store.save(first)
+    # `second` was loaded before the save above: writing it would lose the update
+    second.score = 1
+    with pytest.raises(SessionConflict):
+        store.save(second)
+    assert store["a"].score == 5
+
+    store.update("a", lambda state: setattr(state, "score", state.score + 1))
+    assert store["a"].score == 6
+    assert store.active_ids() == ["a"]
+
+
+def test_sqlite_backend_sweep_leaves_tombstones(tmp_path):
+    from core.sqlite_storage import SqliteSessionStore
+
+    clock = FakeClock()
+    store = SqliteSessionStore(str(tmp_path / "sessions.db"), idle_ttl=10, max_sessions=2, clock=clock)
+    store["a"] = make_state("a")
+    clock.now = 5
+    store["b"] = make_state("b")
+    clock.now = 12
+    assert store.sweep() == 1
+    with pytest.raises(SessionGone) as exc:
+        store["a"]
+    assert exc.value.reason == "expired"
+
+    store["c"] = make_state("c")
+    store["d"] = make_state("d")
+    with pytest.raises(SessionGone) as exc:
+        store["b"]
+    assert exc.value.reason == "evicted"
+    with pytest.raises(SessionNotFound):
+        store["never"]
+
+
+def test_incomplete_backend_fails_at_construction():
+    from core.storage import SessionBackend
+
+    class NoSweep(SessionStore):
+        sweep = SessionBackend.sweep
+
+    with pytest.raises(TypeError, match="sweep"):
+        NoSweep()
@@ -1,6 +1,8 @@
 import pytest
 from game.state import GameState, Player, Difficulty
 from game.victory import check_victory
+from game.landmarks import get_landmarks, set_cell
+from game.actions import move_player
 
 
 def make_state(difficulty=Difficulty.MEDIUM, time_left=100, health=100, energy=50, maze_size=8, player_pos=(7,7), keys_required=0, keys_collected=0):
@@ -49,9 +51,40 @@ def test_score_scaling_easy():
     assert s.score == 100
 
 
+def test_score_is_relative_to_the_level_limits():
+    s = make_state(difficulty=Difficulty.EASY, time_left=120, health=100, energy=50)
+    # a later level: 120s and 50 energy left of 240s and 100 is half marks on both
+    s.time_limit, s.energy_limit = 240, 100
+    check_victory(s)
+    assert s.score == 65
+
+
 def test_score_scaling_worse_stats():
     s = make_state(difficulty=Difficulty.IMPOSSIBLE, time_left=0, health=50, energy=10)
     check_victory(s)
     assert s.is_game_over is True
     # score should be computed and within 0-100
     assert 0 <= s.score <= 100
+
+
+def test_exit_taken_from_landmark_index():
+    s = make_state(difficulty=Difficulty.EASY, player_pos=(3, 3))
+    check_victory(s)
+    assert s.is_victory is False
+    assert s.landmarks.exit == (7, 7)
+    # move the exit through the index-aware setter
+    set_cell(s, 7, 7, 0)
+    set_cell(s, 3, 3, 2)
+    assert s.landmarks.exit == (3, 3)
+    check_victory(s)
+    assert s.is_victory is True
+
+
+def test_key_pickup_updates_landmarks():
+    s = make_state(difficulty=Difficulty.EASY, player_pos=(0, 0), keys_required=1)
+    s.maze[0][1] = 5
+    assert get_landmarks(s).keys == {(1, 0)}
+    move_player(s, 1, 0)
+    assert s.keys_collected == 1
+    assert s.maze[0][1] == 0
+    assert s.landmarks.keys == set()
@@ -0,0 +1,56 @@
+from core.game_manager import create_game, serialize_state
+from game.actions import apply_tick, move_player
+from game.grid import Grid
+from game.state import Difficulty, GameState, Player
+from game.visibility import HIDDEN, reveal
+
+
+def corridor_state():
+    # a corridor along y=1 with a wall between it and the room below
+    rows = [
+        [1, 1, 1, 1, 1, 1, 1],
+        [1, 3, 0, 0, 0, 2, 1],
+        [1, 1, 1, 1, 1, 0, 1],
+        [1, 0, 0, 4, 0, 0, 1],
+        [1, 1, 1, 1, 1, 1, 1],
+    ]
+    return GameState("g", Difficulty.IMPOSSIBLE, Player(1, 1, 100, 50), [], Grid.from_rows(rows), 60, 0, {}, darkness=True)
+
+
+def test_walls_block_the_view():
+    state = corridor_state()
+    reveal(state)
+    seen = {(x, y) for x, y in state.reveal_log}
+    assert (3, 1) in seen and (1, 2) in seen
+    # two rows down, behind the wall
+    assert (1, 3) not in seen and (2, 3) not in seen
+
+
+def test_fogged_snapshots_send_only_seen_cells():
+    state = create_game(Difficulty.IMPOSSIBLE, seed=5)
+    preview = serialize_state(state)
+    assert HIDDEN not in {c for row in preview["maze"] for c in row}
+
+    while state.map_preview_time > 0:
+        apply_tick(state)
+    full = serialize_state(state)
+    cells = [c for row in full["maze"] for c in row]
+    assert 0 < sum(c != HIDDEN for c in cells) <= 25
+    px, py = full["player_position"]["x"], full["player_position"]["y"]
+    assert full["maze"][py][px] == 3
+
+    # one step reveals a few new cells, each sent once with its real value
+    dx, dy = next((dx, dy) for dx, dy in ((1, 0), (0, 1)) if state.maze[py + dy][px + dx] != 1)
+    move_player(state, dx, dy)
+    delta = serialize_state(state, since=full["version"])
+    assert delta["delta"] is True and delta["cells"]
+    for x, y, value in delta["cells"]:
+        assert full["maze"][y][x] == HIDDEN and state.maze[y][x] == value
+    again = serialize_state(state, since=delta["version"])
+    assert "cells" not in again or again["cells"] == []
+
+
+def test_lit_games_keep_the_whole_map():
+    state = create_game(Difficulty.EASY)
+    assert state.seen is None
+    assert HIDDEN not in {c for row in serialize_state(state)["maze"] for c in row}
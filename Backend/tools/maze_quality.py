@@ -0,0 +1,206 @@
+"""Maze quality: histograms of what generate_maze produces, over many seeded mazes.
+
+For every (difficulty, size) asked for, generates `--mazes` mazes from
+consecutive seeds and measures each one:
+
+    solution_length   steps of the route the player must take, start -> key -> exit
+    key_detour        steps that route adds to the direct start -> exit path
+    dead_end_ratio    share of walkable cells with a single way out
+    branching_factor  mean onward choices (ways out minus the one you came in by)
+                      at the junctions, cells with three or four ways out
+    loop_count        independent loops (edges - cells + 1 over the walkable cells);
+                      the backtracker alone makes none, so these all come from the
+                      extra-openings step
+    trap_density      share of the cells on the route that are traps
+
+The work is split into batches spread over a process pool; each batch returns
+histograms only, so the parent never holds per-maze rows. Writes
+maze_quality.csv (difficulty, size, level, metric, bin, count: one row per
+non-empty bin, ratios binned to 1/100) and maze_quality.json (the same histograms plus
+count, mean, min, max and percentiles per metric) to `--out`. Nothing here runs
+on the live path.
+
+    cd Backend && python -m tools.maze_quality --mazes 200000 --sizes 8 12 27 61 --out stats
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import random
+import time
+from collections import Counter
+from typing import Dict, Iterator, List, Tuple
+
+from game.maze import generate_maze
+from game.pathing import bfs, distance_field
+
+METRICS = ("solution_length", "key_detour", "dead_end_ratio", "branching_factor", "loop_count", "trap_density")
+# ratios are counted in bins this many to the unit
+RATIO_BINS = 100
+_RATIOS = {"dead_end_ratio", "branching_factor", "trap_density"}
+DIFFICULTIES = ("easy", "medium", "impossible")
+# the level 1 maze size of each difficulty (core.game_manager.MAZE_SIZES)
+DEFAULT_SIZES = {"easy": 8, "medium": 12, "impossible": 8}
+
+
+def analyze(maze, keys: List[Tuple[int, int]], exit_pos: Tuple[int, int], start: Tuple[int, int] = (1, 1)) -> Dict[str, float]:
+    """The METRICS of one generated maze (a Grid, as returned by generate_maze)."""
+    grid, w = maze.cells, maze.width
+    cells = edges = dead_ends = junctions = choices = 0
+    # the border is always wall, so the neighbours of a walkable cell are in range
+    for i, cell in enumerate(grid):
+        if cell == 1:
+            continue
+        degree = (grid[i + 1] != 1) + (grid[i - 1] != 1) + (grid[i + w] != 1) + (grid[i - w] != 1)
+        cells += 1
+        edges += degree
+        if degree == 1:
+            dead_ends += 1
+        elif degree > 2:
+            junctions += 1
+            choices += degree - 1
+    # every edge was counted from both ends
+    edges //= 2
+
+    from_exit = distance_field(maze, exit_pos)
+    direct = from_exit.path_from(*start) or []
+    if keys:
+        to_key = bfs(maze, [keys[0]]).path_from(*start) or []
+        route = to_key + (from_exit.path_from(*keys[0]) or [])[1:]
+    else:
+        route = direct
+    steps = max(0, len(route) - 1)
+    traps = sum(grid[y * w + x] == 4 for x, y in route)
+    return {
+        "solution_length": steps,
+        "key_detour": steps - max(0, len(direct) - 1),
+        "dead_end_ratio": dead_ends / cells if cells else 0.0,
+        "branching_factor": choices / junctions if junctions else 0.0,
+        "loop_count": edges - cells + 1 if cells else 0,
+        "trap_density": traps / len(route) if route else 0.0,
+    }
+
+
+def _bin(metric: str, value: float) -> int:
+    # ratios by their lower 1/RATIO_BINS edge, counts as they are
+    return int(value * RATIO_BINS) if metric in _RATIOS else int(value)
+
+
+def run_batch(task: Tuple[str, int, int, int, int]) -> Tuple[Tuple[str, int], Dict[str, Counter], Dict[str, float]]:
+    """Histograms and sums of the metrics of `count` mazes seeded first_seed, first_seed + 1, ..."""
+    difficulty, size, level, first_seed, count = task
+    histograms = {metric: Counter() for metric in METRICS}
+    sums = dict.fromkeys(METRICS, 0.0)
+    for seed in range(first_seed, first_seed + count):
+        maze, _, keys, exit_pos = generate_maze(size, difficulty, random.Random(seed), level)
+        for metric, value in analyze(maze, keys, exit_pos).items():
+            histograms[metric][_bin(metric, value)] += 1
+            sums[metric] += value
+    return (difficulty, size), histograms, sums
+
+
+def tasks(difficulties: List[str], sizes: Dict[str, List[int]], mazes: int, level: int, seed: int, batch: int) -> Iterator[Tuple[str, int, int, int, int]]:
+    # seeds depend only on --seed and the position in the run, so a run is reproducible
+    for difficulty in difficulties:
+        for size in sizes[difficulty]:
+            for first in range(0, mazes, batch):
+                yield difficulty, size, level, seed + first, min(batch, mazes - first)
+
+
+def summarize(histogram: Counter, total: float, metric: str) -> dict:
+    n = sum(histogram.values())
+    # bins back to values: the lower edge of a ratio bin, counts unchanged
+    label = (lambda b: b / RATIO_BINS) if metric in _RATIOS else (lambda b: b)
+    bins = sorted(histogram)
+    summary = {
+        "count": n,
+        "mean": round(total / n, 4) if n else 0.0,
+        "min": label(bins[0]) if bins else 0,
+        "max": label(bins[-1]) if bins else 0,
+    }
+    # percentiles as the bin they fall in
+    for q in (50, 90, 99):
+        seen, rank = 0, q / 100 * n
+        for b in bins:
+            seen += histogram[b]
+            if seen >= rank:
+                summary[f"p{q}"] = label(b)
+                break
+    summary["histogram"] = {str(label(b)): histogram[b] for b in bins}
+    return summary
+
+
+def collect(difficulties: List[str], sizes: Dict[str, List[int]], mazes: int, level: int = 1, seed: int = 0, workers: int = 0, batch: int = 2000) -> Dict[Tuple[str, int], dict]:
+    """Run every batch (on `workers` processes, 0 = one per core) and merge the results."""
+    histograms: Dict[Tuple[str, int], Dict[str, Counter]] = {}
+    sums: Dict[Tuple[str, int], Dict[str, float]] = {}
+    jobs = list(tasks(difficulties, sizes, mazes, level, seed, batch))
+    if workers == 1:
+        results = map(run_batch, jobs)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(workers or os.cpu_count())
+        results = pool.imap_unordered(run_batch, jobs)
+    try:
+        for key, batch_histograms, batch_sums in results:
+            merged = histograms.setdefault(key, {metric: Counter() for metric in METRICS})
+            totals = sums.setdefault(key, dict.fromkeys(METRICS, 0.0))
+            for metric in METRICS:
+                merged[metric].update(batch_histograms[metric])
+                totals[metric] += batch_sums[metric]
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return {
+        key: {metric: summarize(histograms[key][metric], sums[key][metric], metric) for metric in METRICS}
+        for key in sorted(histograms)
+    }
+
+
+def write(stats: Dict[Tuple[str, int], dict], out: str, level: int) -> Tuple[str, str]:
+    os.makedirs(out, exist_ok=True)
+    csv_path = os.path.join(out, "maze_quality.csv")
+    json_path = os.path.join(out, "maze_quality.json")
+    with open(csv_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(("difficulty", "size", "level", "metric", "bin", "count"))
+        for (difficulty, size), metrics in stats.items():
+            for metric, summary in metrics.items():
+                for b, count in summary["histogram"].items():
+                    writer.writerow((difficulty, size, level, metric, b, count))
+    nested: Dict[str, dict] = {}
+    for (difficulty, size), metrics in stats.items():
+        nested.setdefault(difficulty, {})[str(size)] = metrics
+    with open(json_path, "w") as f:
+        json.dump({"level": level, "ratio_bins": RATIO_BINS, "mazes": nested}, f, indent=1)
+    return csv_path, json_path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mazes", type=int, default=100000, help="mazes per difficulty and size")
+    parser.add_argument("--difficulties", nargs="+", choices=DIFFICULTIES, default=list(DIFFICULTIES))
+    parser.add_argument("--sizes", type=int, nargs="+", help="maze sizes (default: each difficulty's level 1 size)")
+    parser.add_argument("--level", type=int, default=1, help="level the mazes are generated for (trap density)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first maze")
+    parser.add_argument("--workers", type=int, default=0, help="processes (0 = one per core)")
+    parser.add_argument("--batch", type=int, default=2000, help="mazes per task handed to a worker")
+    parser.add_argument("--out", default="maze_quality")
+    args = parser.parse_args()
+    sizes = {d: args.sizes or [DEFAULT_SIZES[d]] for d in args.difficulties}
+
+    started = time.perf_counter()
+    stats = collect(args.difficulties, sizes, args.mazes, args.level, args.seed, args.workers, args.batch)
+    elapsed = time.perf_counter() - started
+    for (difficulty, size), metrics in stats.items():
+        means = "  ".join(f"{metric} {summary['mean']}" for metric, summary in metrics.items())
+        print(f"{difficulty:10} {size:5}  {means}")
+    total = args.mazes * sum(len(s) for s in sizes.values())
+    csv_path, json_path = write(stats, args.out, args.level)
+    print(f"{total} mazes in {elapsed:.1f}s ({round(total / elapsed)} mazes/s); wrote {csv_path} and {json_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
-import { GameState, Difficulty } from "../types/game";
+import { GameState, Difficulty, MazeChunk } from "../types/game";
 
 const BASE_URL = "http://127.0.0.1:8000";
+const WS_URL = BASE_URL.replace(/^http/, "ws");
 
 async function request<T>(url: string, options?: RequestInit): Promise<T> {
   const res = await fetch(`${BASE_URL}${url}`, {
@@ -15,76 +16,182 @@ async function request<T>(url: string, options?: RequestInit): Promise<T> {
   return res.json();
 }
 
+// Last full state per game. Requests send its version so the server can reply
+// with a delta (changed fields + changed maze cells), which is merged back here.
+const snapshots = new Map<string, GameState>();
+
+function versionOf(gameId: string): number | undefined {
+  return snapshots.get(gameId)?.version;
+}
+
+function absorb(raw: GameState): GameState {
+  const base = snapshots.get(raw.game_id);
+  let merged = raw;
+  if (raw.delta && base) {
+    const { cells, chunks, ...changes } = raw;
+    if (base.chunks) {
+      // chunked maze: new chunks are added, changed cells patched into their chunk
+      const mergedChunks = mergeChunks(base.chunks, chunks ?? [], cells ?? []);
+      merged = { ...base, ...changes, chunks: mergedChunks };
+    } else {
+      const maze = cells && cells.length ? base.maze.map((row) => row.slice()) : base.maze;
+      for (const [x, y, value] of cells ?? []) maze[y][x] = value;
+      merged = { ...base, ...changes, maze };
+    }
+  }
+  snapshots.set(merged.game_id, merged);
+  return merged;
+}
+
+function mergeChunks(known: MazeChunk[], added: MazeChunk[], cells: [number, number, number][]): MazeChunk[] {
+  const byKey = new Map(known.map((c) => [`${c.cx},${c.cy}`, c]));
+  for (const c of added) byKey.set(`${c.cx},${c.cy}`, c);
+  const chunks = [...byKey.values()];
+  for (const [x, y, value] of cells) {
+    const i = chunks.findIndex((c) => x >= c.x && y >= c.y && y < c.y + c.rows.length && x < c.x + c.rows[0].length);
+    if (i < 0) continue;
+    const c = chunks[i];
+    const rows = c.rows.map((row) => row.slice());
+    rows[y - c.y][x - c.x] = value;
+    chunks[i] = { ...c, rows };
+  }
+  return chunks;
+}
+
+// Messages accepted by the /game/ws/{game_id} session channel
+export type SessionMessage =
+  | { type: "move"; dx: number; dy: number }
+  | { type: "item"; item_id: string }
+  | { type: "puzzle"; correct: boolean }
+  | { type: "tick" }
+  | { type: "state" };
+
+export interface GameSession {
+  // returns false when the socket is not open so callers can fall back to HTTP
+  send(message: SessionMessage): boolean;
+  close(): void;
+}
+
+// Convert a direction name ('up','down','left','right') to a move delta
+export function directionDelta(direction: string): { dx: number; dy: number } {
+  switch (direction) {
+    case "up":
+      return { dx: 0, dy: -1 };
+    case "down":
+      return { dx: 0, dy: 1 };
+    case "left":
+      return { dx: -1, dy: 0 };
+    case "right":
+      return { dx: 1, dy: 0 };
+    default:
+      return { dx: 0, dy: 0 };
+  }
+}
+
 export const gameApi = {
-  startGame(difficulty: Difficulty, level?: number): Promise<GameState> {
+  async startGame(difficulty: Difficulty, level?: number, seed?: number, previousGameId?: string): Promise<GameState> {
     const body: any = { difficulty };
     if (typeof level === "number") body.level = level;
-    return request("/game/start", {
+    // the same seed always yields the same maze and enemies
+    if (typeof seed === "number") body.seed = seed;
+    // the game just won: the server may have its next level ready
+    if (previousGameId) body.previous_game_id = previousGameId;
+    const res = await request<GameState>("/game/start", {
       method: "POST",
       body: JSON.stringify(body),
     });
+    snapshots.clear();
+    return absorb(res);
   },
 
-  move(gameId: string, dxOrDir: number | string, dy?: number): Promise<GameState> {
+  async move(gameId: string, dxOrDir: number | string, dy?: number): Promise<GameState> {
     // Allow calling with direction string ('up','down','left','right')
     let dx = 0;
     let dyVal = 0;
 
     if (typeof dxOrDir === "string") {
-      switch (dxOrDir) {
-        case "up":
-          dx = 0;
-          dyVal = -1;
-          break;
-        case "down":
-          dx = 0;
-          dyVal = 1;
-          break;
-        case "left":
-          dx = -1;
-          dyVal = 0;
-          break;
-        case "right":
-          dx = 1;
-          dyVal = 0;
-          break;
-        default:
-          dx = 0;
-          dyVal = 0;
-      }
+      ({ dx, dy: dyVal } = directionDelta(dxOrDir));
     } else {
       dx = dxOrDir;
       dyVal = dy ?? 0;
     }
 
-    return request("/game/move", {
+    const res = await request<GameState>("/game/move", {
+      method: "POST",
+      body: JSON.stringify({ game_id: gameId, dx, dy: dyVal, version: versionOf(gameId) }),
+    });
+    return absorb(res);
+  },
+
+  async useItem(gameId: string, itemId: string): Promise<GameState> {
+    const res = await request<GameState>("/game/use-item", {
       method: "POST",
-      body: JSON.stringify({ game_id: gameId, dx, dy: dyVal }),
+      body: JSON.stringify({ game_id: gameId, item_id: itemId, version: versionOf(gameId) }),
     });
+    return absorb(res);
   },
 
-  useItem(gameId: string, itemId: string): Promise<GameState> {
-    return request("/game/use-item", {
+  async puzzle(gameId: string, correct: boolean): Promise<GameState> {
+    const res = await request<GameState>("/game/puzzle", {
       method: "POST",
-      body: JSON.stringify({ game_id: gameId, item_id: itemId }),
+      body: JSON.stringify({ game_id: gameId, correct, version: versionOf(gameId) }),
     });
+    return absorb(res);
   },
 
-  puzzle(gameId: string, correct: boolean): Promise<GameState> {
-    return request("/game/puzzle", {
+  async tick(gameId: string): Promise<GameState> {
+    const res = await request<GameState>("/game/tick", {
       method: "POST",
-      body: JSON.stringify({ game_id: gameId, correct }),
+      body: JSON.stringify({ game_id: gameId, version: versionOf(gameId) }),
     });
+    return absorb(res);
   },
 
-  tick(gameId: string): Promise<GameState> {
-    return request("/game/tick", {
+  // Apply buffered inputs (e.g. a held arrow key) in one round trip; the server
+  // stops at game over and reports how many were applied
+  async applyActions(gameId: string, actions: SessionMessage[]): Promise<{ state: GameState; applied: number }> {
+    const { applied, ...res } = await request<GameState & { applied: number }>("/game/actions", {
       method: "POST",
-      body: JSON.stringify({ game_id: gameId }),
+      body: JSON.stringify({ game_id: gameId, actions, version: versionOf(gameId) }),
     });
+    return { state: absorb(res as GameState), applied };
   },
 
-  getState(gameId: string): Promise<GameState> {
-    return request(`/game/state/${gameId}`);
+  async getChunk(gameId: string, cx: number, cy: number): Promise<MazeChunk> {
+    return request<MazeChunk>(`/game/chunk/${gameId}/${cx}/${cy}`);
+  },
+
+  // Always a full snapshot; use it to resync
+  async getState(gameId: string): Promise<GameState> {
+    return absorb(await request<GameState>(`/game/state/${gameId}`));
+  },
+
+  // Open the long-lived session channel; the server pushes a full snapshot first,
+  // then deltas against what it last sent on this connection. onClose gets the
+  // close code: 4404 for an unknown game, 4410 for an evicted or expired one
+  openSession(gameId: string, onState: (state: GameState) => void, onClose?: (code: number) => void): GameSession {
+    const ws = new WebSocket(`${WS_URL}/game/ws/${gameId}`);
+
+    ws.onmessage = (event) => {
+      try {
+        const data = JSON.parse(event.data);
+        if (data && typeof data === "object" && !("error" in data)) onState(absorb(data as GameState));
+      } catch (err) {
+        console.debug("gameApi: bad session message", err);
+      }
+    };
+    ws.onclose = (event) => onClose?.(event.code);
+
+    return {
+      send(message: SessionMessage) {
+        if (ws.readyState !== WebSocket.OPEN) return false;
+        ws.send(JSON.stringify(message));
+        return true;
+      },
+      close() {
+        ws.onclose = null;
+        ws.close();
+      },
+    };
   },
 };
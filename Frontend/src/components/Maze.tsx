@@ -67,7 +67,8 @@ export default function Maze() {
     let bgColor = "bg-slate-800";
     let content = null;
 
-    if (!isVisible && !state.mapVisible) {
+    // -1: a cell the server has not revealed yet (darkness)
+    if ((!isVisible && !state.mapVisible) || cellValue < 0) {
       bgColor = "bg-black";
     } else {
       switch (cellValue) {
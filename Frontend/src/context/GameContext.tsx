@@ -2,7 +2,8 @@ import * as React from "react";
 import { createContext, useContext, useState, useEffect, useRef } from "react";
 import type { ReactNode } from "react";
 import type { Difficulty } from "../types/game";
-import { gameApi } from "../api/gameApi";
+import { gameApi, directionDelta } from "../api/gameApi";
+import type { GameSession, SessionMessage } from "../api/gameApi";
 // Audio assets (Vite will bundle these)
 import MenuSrc from "../sound/Menu.mp3";
 import GameSrc from "../sound/Game.mp3";
@@ -366,6 +367,35 @@ export function GameProvider({ children }: { children: ReactNode }) {
 
   const reset = () => setStateRaw(defaultState);
 
+  // Session channel for the running game. Pushed states go through the latest
+  // setState so progression updates never see a stale `progress`.
+  const sessionRef = useRef<GameSession | null>(null);
+  const setStateRef = useRef(setState);
+  setStateRef.current = setState;
+
+  const closeSession = () => {
+    sessionRef.current?.close();
+    sessionRef.current = null;
+  };
+
+  const openSession = (gameId: unknown) => {
+    closeSession();
+    if (typeof gameId !== "string" || !gameId) return;
+    const session = gameApi.openSession(
+      gameId,
+      (s) => setStateRef.current(s),
+      () => {
+        if (sessionRef.current === session) sessionRef.current = null;
+      }
+    );
+    sessionRef.current = session;
+  };
+
+  // true when the message went over the socket; otherwise the caller uses HTTP
+  const sendOnSession = (message: SessionMessage) => sessionRef.current?.send(message) ?? false;
+
+  useEffect(() => () => sessionRef.current?.close(), []);
+
   const dispatch = async (action: { type: string; payload?: unknown }) => {
     try {
       const getStateString = (key: string, fallback = "") => {
@@ -395,12 +425,14 @@ export function GameProvider({ children }: { children: ReactNode }) {
           const difficulty = asDifficulty(getStateString("difficulty", "normal"));
           const res = await gameApi.startGame(difficulty, requestedLevel);
           setState(res);
+          openSession(res.game_id);
           break;
         }
 
         // 'USE_ITEM' removed — items/inventory UI is not used in this build
 
         case "COMPLETE_PUZZLE": {
+          if (sendOnSession({ type: "puzzle", correct: true })) break;
           const gameId = getStateString("game_id", "");
           const res = await gameApi.puzzle(gameId, true);
           setState(res);
@@ -408,6 +440,7 @@ export function GameProvider({ children }: { children: ReactNode }) {
         }
 
         case "FAIL_PUZZLE": {
+          if (sendOnSession({ type: "puzzle", correct: false })) break;
           const gameId = getStateString("game_id", "");
           const res = await gameApi.puzzle(gameId, false);
           setState(res);
@@ -415,6 +448,10 @@ export function GameProvider({ children }: { children: ReactNode }) {
         }
 
         case "TICK": {
+          // with the server clock running, ticks are pushed over the session channel;
+          // without a channel the HTTP tick still works as a state poll
+          if ((state as Record<string, unknown>)?.server_clock === true && sessionRef.current) break;
+          if (sendOnSession({ type: "tick" })) break;
           const gameId = getStateString("game_id", "");
           const res = await gameApi.tick(gameId);
           setState(res);
@@ -427,11 +464,13 @@ export function GameProvider({ children }: { children: ReactNode }) {
           const gameId = getStateString("game_id", "");
           let res;
           if (typeof payload === "string") {
+            if (sendOnSession({ type: "move", ...directionDelta(payload) })) break;
             res = await gameApi.move(gameId, payload);
           } else if (typeof payload === "object" && payload !== null) {
             const p = payload as Record<string, unknown>;
             const dx = typeof p.dx === "number" ? p.dx : 0;
             const dy = typeof p.dy === "number" ? p.dy : 0;
+            if (sendOnSession({ type: "move", dx, dy })) break;
             res = await gameApi.move(gameId, dx, dy);
           } else {
             // invalid payload; no-op
@@ -446,12 +485,15 @@ export function GameProvider({ children }: { children: ReactNode }) {
           const current = getStateNumber("level", 1);
           const next = Math.min(6, current + 1);
           const difficulty = asDifficulty(getStateString("difficulty", "normal"));
-          const res = await gameApi.startGame(difficulty, next);
+          const previous = getStateString("game_id", "");
+          const res = await gameApi.startGame(difficulty, next, undefined, previous || undefined);
           setState(res);
+          openSession(res.game_id);
           break;
         }
 
         case "RESET_GAME": {
+          closeSession();
           reset();
           break;
         }
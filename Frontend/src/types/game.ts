@@ -11,6 +11,8 @@ export interface Position {
 export interface Enemy {
   id: string;
   position: Position;
+  // "patrol" bounces along one axis; "chase" and "ambush" follow the player
+  pattern?: "patrol" | "chase" | "ambush";
 }
 
 export interface Item {
@@ -28,6 +30,8 @@ export interface GameState {
   phase: GamePhase;
   difficulty: Difficulty;
   level: number;
+  seed?: number | null;
+  // -1 marks cells not yet seen in darkness mode
   maze: number[][];
   player_position: Position;
   playerPosition?: Position;
@@ -48,4 +52,26 @@ export interface GameState {
   map_visible_alias?: boolean;
 
   puzzle: PuzzleState | null;
+
+  // delta encoding: version of this snapshot; delta responses omit the maze
+  // and carry the changed cells as [x, y, value]
+  version?: number;
+  delta?: boolean;
+  cells?: [number, number, number][];
+
+  // huge mazes are sent by chunk instead of as `maze`: the chunks around the
+  // player, more in later deltas as they come into view
+  maze_width?: number;
+  maze_height?: number;
+  chunk_size?: number;
+  chunks?: MazeChunk[];
+}
+
+export interface MazeChunk {
+  cx: number;
+  cy: number;
+  // top-left cell of the chunk
+  x: number;
+  y: number;
+  rows: number[][];
 }